@@ -138,7 +138,7 @@ else
     echo -e "${BLUE}Generating $months month(s) of demo data...${NC}"
 fi
 
-"pkm_venv/bin/python" pkm/generate_demo_data.py "$months"
+"pkm_venv/bin/python" -m pkm.generate_demo_data "$months"
 if [ $? -ne 0 ]; then
     echo -e "${RED}Error: Failed to generate demo data.${NC}"
     exit 1
@@ -72,8 +72,7 @@ mkdir -p db/backups
 touch db/backups/.gitignore
 if [ ! -f "db/pkm.db" ]; then
     echo -e "${YELLOW}📝 Creating db/pkm.db...${NC}"
-    sqlite3 db/pkm.db < db/init.sql
-    sqlite3 db/pkm.db < pkm/web/update_schema.sql
+    python3 -m pkm.manage migrate --db db/pkm.db
 fi
 
 # PKM database in pkm/db/
@@ -84,9 +83,10 @@ mkdir -p pkm/db/md_backups
 touch pkm/db/backups/.gitignore
 if [ ! -f "pkm/db/pkm.db" ]; then
     echo -e "${YELLOW}📝 Creating pkm/db/pkm.db...${NC}"
-    sqlite3 pkm/db/pkm.db < db/init.sql
-    sqlite3 pkm/db/pkm.db < pkm/web/update_schema.sql
+else
+    echo -e "${YELLOW}📝 Upgrading pkm/db/pkm.db...${NC}"
 fi
+python3 -m pkm.manage migrate --db pkm/db/pkm.db
 
 # Create daily directories if they don't exist
 echo -e "${BLUE}📁 Setting up daily log directories...${NC}"
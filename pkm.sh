@@ -67,7 +67,6 @@ source "$VENV_ACTIVATE"
 
 # Database paths
 DB_PATH="pkm/db/pkm.db"
-INIT_SQL="db/init.sql"
 BACKUP_DIR="pkm/db/backups"
 LAST_BACKUP_FILE="pkm/db/.last_backup"
 
@@ -85,7 +84,10 @@ show_help() {
     Options:
     $EMOJI_WEB web           Start the web interface
     $EMOJI_CONFIG config        Open the configuration menu
-    $EMOJI_DB init-db       Initialize the database
+    $EMOJI_DB init-db       Initialize or upgrade the database
+    $EMOJI_DAILY report        Print a report (metrics|work|habits|alcohol|logs|heatmap|correlations|tasks|search <query>) [--lines N]
+    $EMOJI_DB sync-md       Sync daily log Metrics/Habits/Alcohol sections into the database [--full]
+    $EMOJI_DAILY watch         Keep indexes up to date as daily logs change [--poll]
     $EMOJI_BACKUP backup-db     Create a database backup
     $EMOJI_RESTORE restore-db    Restore database from backup
     $EMOJI_BACKUP backup-md     Create a backup of markdown files
@@ -167,7 +169,7 @@ restore_md() {
 init_db() {
     gum style --border="rounded" "Database Initialization Information:" \
     "--------------------------------" \
-    "This will create or reinitialize the following tables:" \
+    "This will create or upgrade the following tables:" \
     "1. habits - Habit tracking definitions" \
     "2. habit_logs - Daily habit completion records" \
     "3. alcohol_logs - Alcohol consumption tracking" \
@@ -176,49 +178,49 @@ init_db() {
     "6. goals - Goal tracking and planning"
 
     if [ -f "$DB_PATH" ]; then
-        if gum confirm "Database already exists. Do you want to reinitialize it?"; then
-            echo "Backing up existing database before reinitialization..."
-            backup_db "silent"
-            echo "Removing existing database..."
-            rm "$DB_PATH"
-        else
-            echo "Database initialization cancelled."
-            wait_for_key
-            return
-        fi
+        ACTION=$(gum choose "Upgrade schema (keep data)" "Reinitialize (backup and wipe)" "Cancel")
+        case "$ACTION" in
+            "Upgrade schema (keep data)")
+                echo "Backing up existing database before upgrade..."
+                backup_db "silent"
+                ;;
+            "Reinitialize (backup and wipe)")
+                echo "Backing up existing database before reinitialization..."
+                backup_db "silent"
+                echo "Removing existing database..."
+                rm "$DB_PATH"
+
+                # Ask about markdown files
+                if [ -d "$DAILY_DIR" ] && [ "$(ls -A $DAILY_DIR)" ]; then
+                    if gum confirm "Do you want to backup and remove existing markdown files as well?"; then
+                        echo "Backing up markdown files before removal..."
+                        backup_md "silent"
+                        echo "Removing markdown files..."
+                        rm -rf "$DAILY_DIR"
+                        mkdir -p "$DAILY_DIR"
+                    fi
+                fi
+                ;;
+            *)
+                echo "Database initialization cancelled."
+                wait_for_key
+                return
+                ;;
+        esac
     fi
 
-    # Ask about markdown files
-    if [ -d "$DAILY_DIR" ] && [ "$(ls -A $DAILY_DIR)" ]; then
-        if gum confirm "Do you want to backup and remove existing markdown files as well?"; then
-            echo "Backing up markdown files before removal..."
-            backup_md "silent"
-            echo "Removing markdown files..."
-            rm -rf "$DAILY_DIR"
-            mkdir -p "$DAILY_DIR"
-        fi
-    fi
-    
-    gum spin --spinner dot --title "Initializing database..." -- sqlite3 "$DB_PATH" < "$INIT_SQL"
+    gum spin --spinner dot --show-output --title "Applying database migrations..." -- python3 -m pkm.manage migrate --db "$DB_PATH"
     if [ $? -eq 0 ]; then
-        # Apply update schema
-        sqlite3 "$DB_PATH" < "pkm/web/update_schema.sql"
-        if [ $? -eq 0 ]; then
-            display_success "Database initialized successfully with empty tables."
-            gum style --border="rounded" "You can now track:" \
-            "- Habits and their completion" \
-            "- Alcohol consumption" \
-            "- Work hours and projects" \
-            "- Daily metrics (mood, energy, sleep)" \
-            "- Goals and plans"
-            wait_for_key
-        else
-            display_error "Error applying schema updates."
-            wait_for_key
-            exit 1
-        fi
+        display_success "Database schema is up to date."
+        gum style --border="rounded" "You can now track:" \
+        "- Habits and their completion" \
+        "- Alcohol consumption" \
+        "- Work hours and projects" \
+        "- Daily metrics (mood, energy, sleep)" \
+        "- Goals and plans"
+        wait_for_key
     else
-        display_error "Error initializing database."
+        display_error "Error applying database migrations."
         wait_for_key
         exit 1
     fi
@@ -427,6 +429,18 @@ case "$1" in
     "init-db")
         init_db
         ;;
+    "report")
+        shift
+        python3 -m pkm.report "$@"
+        ;;
+    "sync-md")
+        shift
+        python3 -m pkm.manage sync-markdown --db "$DB_PATH" "$@"
+        ;;
+    "watch")
+        shift
+        python3 -m pkm.watcher --db "$DB_PATH" "$@"
+        ;;
     "backup-db")
         backup_db
         ;;
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Cross-Metric Analytics
+
+Loads the per-day columns of daily_rollup (migration 0003) into aligned
+numpy arrays - one entry per calendar day, NaN where nothing was logged -
+and computes correlation matrices, lagged correlations (e.g. alcohol on day
+t against mood on day t+1) and rolling-window statistics with vectorized
+operations.
+
+Loaded columns and computed results are cached until a write bumps one of
+the table_stats change counters of the tables feeding daily_rollup, in a
+least-recently-used map of at most MAX_CACHED entries. Date ranges are
+clamped to the logged span before loading, so no request builds arrays
+longer than the history.
+
+Usage:
+    analytics = Analytics(pkm)
+    names, matrix, counts = analytics.correlations()
+    lags = analytics.lagged('alcohol_units', 'mood_rating', max_lag=3)
+    first, mean, std, count = analytics.rolling('sleep_hours', window=7)
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .streaks import epoch_day
+
+# Column name -> (daily_rollup expression, fill for days without a row)
+COLUMNS = {
+    'mood_rating': ('CASE WHEN metrics_logged THEN mood_rating END', np.nan),
+    'energy_level': ('CASE WHEN metrics_logged THEN energy_level END', np.nan),
+    'sleep_hours': ('CASE WHEN metrics_logged THEN sleep_hours END', np.nan),
+    'alcohol_units': ('alcohol_units', 0.0),
+    'work_hours': ('work_hours', 0.0),
+    'habit_completions': ('habit_completions', 0.0),
+    'sub_mood_avg': ('CASE WHEN mood_entries > 0 THEN mood_avg END', np.nan),
+    'sub_energy_avg': ('CASE WHEN mood_entries > 0 THEN energy_avg END', np.nan),
+}
+
+# Entry counts per day (log rows behind each value); loaded alongside COLUMNS
+ENTRY_COLUMNS = {
+    'metrics_entries': 'metrics_logged',
+    'work_entries': 'work_entries',
+    'alcohol_entries': 'alcohol_entries',
+    'habit_entries': 'habit_completions',
+    'mood_entries': 'mood_entries',
+}
+
+LOAD_SQL = f'''
+    SELECT date, {', '.join(expression for expression, _ in COLUMNS.values())},
+           {', '.join(ENTRY_COLUMNS.values())}
+    FROM daily_rollup
+    WHERE date >= ? AND date <= ?
+    ORDER BY date
+'''
+
+VERSION_SQL = '''
+    SELECT table_name, changes FROM table_stats
+    WHERE table_name IN ('daily_metrics', 'habit_logs', 'work_logs', 'alcohol_logs', 'sub_daily_moods')
+      AND column_name = '*'
+'''
+
+SPAN_SQL = 'SELECT MIN(date), MAX(date) FROM daily_rollup'
+
+MIN_PERIODS = 10  # Pairs needed before a correlation is reported
+MAX_CACHED = 64  # Columns and results kept in memory
+
+
+def load_columns(rows, start, end):
+    """
+    Spread daily_rollup rows over a dense per-day calendar.
+
+    Args:
+        rows (list): Rows from LOAD_SQL
+        start (int): First epoch day
+        end (int): Last epoch day (inclusive)
+
+    Returns:
+        dict: Column name (COLUMNS and ENTRY_COLUMNS) -> float array with
+            one entry per day
+    """
+    length = max(end - start + 1, 0)
+    columns = {name: np.full(length, fill) for name, (_, fill) in COLUMNS.items()}
+    columns.update({name: np.zeros(length) for name in ENTRY_COLUMNS})
+    if not rows:
+        return columns
+
+    index = np.array([epoch_day(row[0]) for row in rows], dtype=np.int64) - start
+    values = np.array([row[1:] for row in rows], dtype=float)  # None -> nan
+    for position, name in enumerate(list(COLUMNS) + list(ENTRY_COLUMNS)):
+        columns[name][index] = values[:, position]
+    return columns
+
+
+def correlation_matrix(data, min_periods=MIN_PERIODS):
+    """
+    Pairwise Pearson correlations, each over the days both columns have.
+
+    Args:
+        data (np.ndarray): Days x columns, NaN for missing values
+        min_periods (int, optional): Minimum overlapping days per pair
+
+    Returns:
+        tuple: (correlations, overlapping day counts), both columns x columns;
+            correlations are NaN where the overlap is too small or constant
+    """
+    present = ~np.isnan(data)
+    filled = np.where(present, data, 0.0)
+    mask = present.astype(float)
+
+    # Sums over each pair's joint days, for all pairs at once
+    n = mask.T @ mask
+    sum_x = filled.T @ mask           # [i, j]: sum of column i where j is present too
+    sum_xx = (filled ** 2).T @ mask
+    sum_xy = filled.T @ filled
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sum_xy - sum_x * sum_x.T / n
+        var_x = sum_xx - sum_x ** 2 / n
+        corr = cov / np.sqrt(var_x * var_x.T)
+    corr[(n < min_periods) | ~np.isfinite(corr)] = np.nan
+    return np.clip(corr, -1.0, 1.0), n.astype(int)
+
+
+def lagged_correlations(x, y, lags, min_periods=MIN_PERIODS):
+    """
+    Correlate x on day t with y on day t + lag for each lag.
+
+    Args:
+        x (np.ndarray): Leading series (one value per day)
+        y (np.ndarray): Following series, aligned with x
+        lags (iterable): Day offsets; negative lags let y lead
+        min_periods (int, optional): Minimum overlapping days per lag
+
+    Returns:
+        list: (lag, correlation or None, overlapping days) tuples
+    """
+    results = []
+    for lag in lags:
+        if lag >= 0:
+            a, b = x[:len(x) - lag], y[lag:]
+        else:
+            a, b = x[-lag:], y[:len(y) + lag]
+        corr, n = correlation_matrix(np.column_stack((a, b)), min_periods)
+        value = corr[0, 1]
+        results.append((lag, None if np.isnan(value) else float(value), int(n[0, 1])))
+    return results
+
+
+def rolling_stats(x, window, min_periods=1):
+    """
+    Trailing-window mean, standard deviation and count, ignoring NaNs.
+
+    Args:
+        x (np.ndarray): One value per day
+        window (int): Days per window (ending on each day)
+        min_periods (int, optional): Values needed for a result
+
+    Returns:
+        tuple: (mean, std, count) arrays aligned with x; NaN where the
+            window has fewer than min_periods values
+    """
+    present = ~np.isnan(x)
+    filled = np.where(present, x, 0.0)
+
+    def window_sum(values):
+        total = np.concatenate(([0.0], np.cumsum(values)))
+        ends = np.arange(1, len(values) + 1)
+        return total[ends] - total[np.maximum(ends - window, 0)]
+
+    count = window_sum(present.astype(float))
+    total = window_sum(filled)
+    squares = window_sum(filled ** 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - mean ** 2, 0.0))
+    short = count < max(min_periods, 1)
+    mean[short] = np.nan
+    std[short] = np.nan
+    return mean, std, count.astype(int)
+
+
+class Analytics:
+    """
+    Aligned per-day columns and cached analysis results.
+
+    Attributes:
+        pkm (PKMManager): Manager whose connection pool is used
+    """
+
+    def __init__(self, pkm):
+        self.pkm = pkm
+        self._lock = threading.Lock()
+        self._version = None
+        self._cache = OrderedDict()  # (kind, args) -> result for the current version, least recently used first
+
+    def cached(self, key, compute):
+        """
+        Get a result for the current data, computing it on a miss.
+
+        Args:
+            key (tuple): Identifies the result
+            compute (callable): Called as compute(conn) on a miss
+
+        Returns:
+            The cached or freshly computed result
+        """
+        conn = self.pkm.get_db_connection()
+        try:
+            version = tuple(sorted(conn.execute(VERSION_SQL).fetchall()))
+            with self._lock:
+                if version != self._version:
+                    self._version = version
+                    self._cache = OrderedDict()
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    return self._cache[key]
+            result = compute(conn)
+        finally:
+            conn.close()
+        with self._lock:
+            if version == self._version:
+                self._cache[key] = result
+                self._cache.move_to_end(key)
+                while len(self._cache) > MAX_CACHED:
+                    self._cache.popitem(last=False)
+        return result
+
+    def span(self, start=None, end=None):
+        """
+        Clamp a date range to the days daily_rollup has rows for.
+
+        Args:
+            start (str, optional): First date (YYYY-MM-DD). Defaults to the first logged day.
+            end (str, optional): Last date (YYYY-MM-DD). Defaults to the last logged day.
+
+        Returns:
+            tuple: (start, end) within the logged span - start is after end
+                when the range misses it - or (None, None) before anything
+                is logged
+        """
+        conn = self.pkm.get_db_connection()
+        try:
+            first, last = conn.execute(SPAN_SQL).fetchone()
+        finally:
+            conn.close()
+        if first is None:
+            return None, None
+        return max(start or first, first), min(end or last, last)
+
+    def columns(self, start=None, end=None):
+        """
+        Load every column for a date range as aligned arrays.
+
+        Args:
+            start (str, optional): First date (YYYY-MM-DD). Defaults to the first logged day.
+            end (str, optional): Last date (YYYY-MM-DD). Defaults to the last logged day.
+
+        Returns:
+            tuple: (first epoch day, dict of column name -> array); the range
+                is clamped to the logged span (see span()). Treat the arrays
+                as read-only, they are shared by later calls
+        """
+        lo, hi = self.span(start, end)
+
+        def load(conn):
+            if lo is None:
+                return 0, load_columns([], 0, -1)
+            rows = conn.execute(LOAD_SQL, (lo, hi)).fetchall()
+            first_day = epoch_day(lo)
+            return first_day, load_columns(rows, first_day, epoch_day(hi))
+
+        return self.cached(('columns', lo, hi), load)
+
+    def correlations(self, names=None, start=None, end=None, min_periods=MIN_PERIODS):
+        """
+        Correlation matrix between columns.
+
+        Args:
+            names (list, optional): Columns to include. Defaults to all.
+            start (str, optional): First date (YYYY-MM-DD)
+            end (str, optional): Last date (YYYY-MM-DD)
+            min_periods (int, optional): Minimum overlapping days per pair
+
+        Returns:
+            tuple: (names, correlation matrix, overlapping day counts)
+        """
+        names = list(names or COLUMNS)
+        _unknown(names)
+
+        def compute(conn):
+            _, columns = self.columns(start, end)
+            data = np.column_stack([columns[name] for name in names])
+            return (names,) + correlation_matrix(data, min_periods)
+
+        return self.cached(('correlations', tuple(names), start, end, min_periods), compute)
+
+    def lagged(self, x, y, max_lag=7, start=None, end=None, min_periods=MIN_PERIODS):
+        """
+        Correlate column x on day t with column y on day t + lag, lag 0..max_lag.
+
+        Returns:
+            list: (lag, correlation or None, overlapping days) tuples
+        """
+        _unknown([x, y])
+
+        def compute(conn):
+            _, columns = self.columns(start, end)
+            return lagged_correlations(columns[x], columns[y], range(max_lag + 1), min_periods)
+
+        return self.cached(('lagged', x, y, max_lag, start, end, min_periods), compute)
+
+    def rolling(self, name, window=7, start=None, end=None, min_periods=1):
+        """
+        Trailing-window mean, standard deviation and count for one column.
+
+        Returns:
+            tuple: (first epoch day, mean, std, count)
+        """
+        _unknown([name])
+        if window < 1:
+            raise ValueError(f"window must be at least 1, got {window}")
+
+        def compute(conn):
+            first, columns = self.columns(start, end)
+            return (first,) + rolling_stats(columns[name], window, min_periods)
+
+        return self.cached(('rolling', name, window, start, end, min_periods), compute)
+
+    def invalidate(self):
+        """Drop every cached result."""
+        with self._lock:
+            self._version = None
+            self._cache = OrderedDict()
+
+
+def _unknown(names):
+    for name in names:
+        if name not in COLUMNS:
+            raise ValueError(f"Unknown column {name!r}; expected one of {', '.join(COLUMNS)}")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Rolling Anomaly Detection
+
+Flags unusual days for mood, energy, sleep (daily_metrics), alcohol units
+(alcohol_logs) and the intraday mood/energy averages (sub_daily_moods). Each
+day is scored against the trailing window of preceding days with a robust
+z-score (median and median absolute deviation), falling back to a plain
+z-score when the MAD is 0 - e.g. alcohol, where most days are 0.
+
+Detection is incremental. anomaly_state (migration 0008) persists each
+metric's trailing window and last scored day, so an update reads only the
+daily_rollup rows after it. Completed days are scored once; today is scored
+provisionally and rescored until it is over. Edits to already-scored days
+are not rescored - run `python3 -m pkm.manage rescan-anomalies` after
+backfilling history.
+
+Usage:
+    detector = AnomalyDetector(pkm, window=28, threshold=3.5)
+    for anomaly in detector.recent(days=14):
+        print(anomaly.date, anomaly.label, anomaly.value, anomaly.score)
+"""
+
+import threading
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .analytics import LOAD_SQL, VERSION_SQL, load_columns
+from .repository import days_ago, today
+from .streaks import epoch_day
+
+# Detected metric -> pkm.analytics column
+METRICS = {
+    'mood': 'mood_rating',
+    'energy': 'energy_level',
+    'sleep': 'sleep_hours',
+    'alcohol': 'alcohol_units',
+    'intraday_mood': 'sub_mood_avg',
+    'intraday_energy': 'sub_energy_avg',
+}
+
+LABELS = {
+    'mood': 'Mood',
+    'energy': 'Energy',
+    'sleep': 'Sleep',
+    'alcohol': 'Alcohol units',
+    'intraday_mood': 'Check-in mood',
+    'intraday_energy': 'Check-in energy',
+}
+
+DEFAULT_WINDOW = 28       # Days in the trailing window
+DEFAULT_MIN_PERIODS = 7   # Days with data needed before a day is scored
+DEFAULT_THRESHOLD = 3.5   # |score| at or above this is flagged
+MAD_SCALE = 0.6745        # Makes the MAD score comparable to a z-score
+MAX_SCORE = 99.0          # Score for a change after a perfectly constant window
+
+STATE_SQL = 'SELECT metric, config, last_day, history FROM anomaly_state'
+
+FIRST_DAY_SQL = 'SELECT MIN(date) FROM daily_rollup'
+
+RECENT_SQL = '''
+    SELECT date, metric, value, baseline, score FROM anomalies
+    WHERE date >= ?
+    ORDER BY date DESC, metric
+'''
+
+
+class Anomaly(namedtuple('Anomaly', 'date metric value baseline score')):
+    """A flagged day: the value, the window's median and the score."""
+    __slots__ = ()
+
+    @property
+    def label(self):
+        return LABELS.get(self.metric, self.metric)
+
+
+def score_days(history, values, min_periods=DEFAULT_MIN_PERIODS):
+    """
+    Score each value against the trailing window that precedes it.
+
+    Args:
+        history (np.ndarray): The window of days before values[0] (NaN = no data)
+        values (np.ndarray): Days to score
+        min_periods (int, optional): Days with data a window needs
+
+    Returns:
+        tuple: (window medians, scores) aligned with values; scores are NaN
+            for days without data or with too short a window
+    """
+    window = len(history)
+    full = np.concatenate((history, values))
+    windows = sliding_window_view(full[:-1], window)  # Row i: the window before values[i]
+
+    # The nan-reductions warn on all-NaN windows, so only rows with data are
+    # reduced; the rest stay NaN. (np.errstate is thread-local, warning
+    # filters are not, and this runs on request and writer threads.)
+    count = np.count_nonzero(~np.isnan(windows), axis=1)
+    rows = count > 0
+    median, mad, mean, std = (np.full(len(values), np.nan) for _ in range(4))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        present = windows[rows]
+        median[rows] = np.nanmedian(present, axis=1)
+        mad[rows] = np.nanmedian(np.abs(present - median[rows, None]), axis=1)
+        mean[rows] = np.nanmean(present, axis=1)
+        std[rows] = np.nanstd(present, axis=1)
+        diff = values - median
+        score = np.where(mad > 0, MAD_SCALE * diff / mad,
+                         np.where(std > 0, (values - mean) / std,
+                                  np.where(diff == 0, 0.0, np.sign(diff) * MAX_SCORE)))
+
+    score = np.clip(score, -MAX_SCORE, MAX_SCORE)
+    score[(count < min_periods) | np.isnan(values)] = np.nan
+    return median, score
+
+
+class AnomalyDetector:
+    """
+    Incremental rolling anomaly detection with persisted state.
+
+    Attributes:
+        pkm (PKMManager): Manager whose pool and writer are used
+        window (int): Days in the trailing window
+        min_periods (int): Days with data needed before a day is scored
+        threshold (float): |score| at or above which a day is flagged
+    """
+
+    def __init__(self, pkm, window=DEFAULT_WINDOW, min_periods=DEFAULT_MIN_PERIODS,
+                 threshold=DEFAULT_THRESHOLD):
+        self.pkm = pkm
+        self.window = window
+        self.min_periods = min_periods
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._checked = None  # (change counters, today) of the last update
+
+    @property
+    def config(self):
+        return f"{self.window}:{self.min_periods}:{self.threshold:g}"
+
+    def _plan(self, conn, day):
+        """Score the days each metric has not seen yet; returns the writes to make."""
+        # A metric without state (or built with another config) starts over
+        # from the first logged day, so its scored-through day precedes all flags
+        states = {row[0]: row[1:] for row in conn.execute(STATE_SQL)}
+        first_logged = conn.execute(FIRST_DAY_SQL).fetchone()[0]
+        if first_logged is None:
+            return []
+
+        current = epoch_day(day)
+        plans = []
+        for metric, column in METRICS.items():
+            config, last_day, history = states.get(metric, (None, None, None))
+            reset = config != self.config
+            if reset:
+                last = epoch_day(first_logged) - 1
+                history = np.full(self.window, np.nan)
+            else:
+                last = epoch_day(last_day)
+                history = np.frombuffer(history, dtype=np.float64)
+            if last >= current:
+                continue
+
+            start = str(np.datetime64(last + 1, 'D'))
+            rows = conn.execute(LOAD_SQL, (start, day)).fetchall()
+            values = load_columns(rows, last + 1, current)[column]
+            median, score = score_days(history, values, self.min_periods)
+
+            flagged = [
+                (str(np.datetime64(int(last + 1 + i), 'D')), metric, float(values[i]), float(median[i]),
+                 round(float(score[i]), 2))
+                for i in np.flatnonzero(np.abs(np.nan_to_num(score)) >= self.threshold)
+            ]
+            # Today is provisional: only completed days enter the window
+            completed = values[:-1]
+            history = np.concatenate((history, completed))[-self.window:]
+            state = (metric, self.config, str(np.datetime64(current - 1, 'D')), history.tobytes())
+            plans.append((metric, str(np.datetime64(last, 'D')), flagged, state))
+        return plans
+
+    def update(self):
+        """Score every day since the last update (a no-op if nothing changed)."""
+        conn = self.pkm.get_db_connection()
+        try:
+            day = today()
+            checked = (tuple(sorted(conn.execute(VERSION_SQL).fetchall())), day)
+            with self._lock:
+                if checked == self._checked:
+                    return
+            plans = self._plan(conn, day)
+        finally:
+            conn.close()
+
+        def write(cursor):
+            for metric, scored_through, flagged, state in plans:
+                # Replace everything after the last completed day, including
+                # the provisional flag of a day that has since ended
+                cursor.execute('DELETE FROM anomalies WHERE metric = ? AND date > ?', (metric, scored_through))
+                cursor.executemany('''
+                    INSERT INTO anomalies (date, metric, value, baseline, score) VALUES (?, ?, ?, ?, ?)
+                ''', flagged)
+                cursor.execute('''
+                    INSERT INTO anomaly_state (metric, config, last_day, history) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (metric) DO UPDATE SET
+                        config = excluded.config, last_day = excluded.last_day, history = excluded.history
+                ''', state)
+
+        if plans:
+            self.pkm.run_write(write)
+        with self._lock:
+            self._checked = checked
+
+    def recent(self, days=14):
+        """
+        Get the flagged days in the last `days` days, newest first.
+
+        Returns:
+            list: Anomaly records
+        """
+        self.update()
+        conn = self.pkm.get_db_connection()
+        try:
+            return [Anomaly(*row) for row in conn.execute(RECENT_SQL, (days_ago(days),))]
+        finally:
+            conn.close()
+
+    def invalidate(self):
+        """Re-check the database on the next update."""
+        with self._lock:
+            self._checked = None
+
+
+def reset(conn):
+    """
+    Drop all detection state and flags; the next update rescans history.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+    """
+    conn.executescript('BEGIN;\nDELETE FROM anomaly_state;\nDELETE FROM anomalies;\nCOMMIT;')
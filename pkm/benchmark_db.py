@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Database Benchmark
+
+Compares the connection pragma profiles from pkm.database on a multi-year
+demo database. Each profile gets its own copy of the same generated data
+and runs an identical mixed read/write workload from several threads.
+
+The --load-test mode instead measures concurrent write throughput of the
+per-request commit path against the single-writer queue (pkm.writer).
+
+Usage:
+    python3 -m pkm.benchmark_db --years 3 --threads 4 --ops 200
+    python3 -m pkm.benchmark_db --load-test --threads 16 --ops 200
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from .database import PROFILES
+from .generate_demo_data import DemoDataGenerator
+from .pkm_manager import PKMManager
+from .writer import WriteQueue
+
+
+def build_demo_database(db_path, years):
+    """Generate `years` of demo data into a fresh database at db_path."""
+    generator = DemoDataGenerator(months=years * 12)
+    data = generator.generate_demo_data()
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator.import_to_database(data, db_path=db_path)
+
+
+def run_workload(pkm, threads, ops):
+    """
+    Run a mixed workload against a PKMManager from several threads.
+
+    Returns:
+        tuple: (elapsed seconds, sorted per-op latencies, error count)
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    operations = [
+        lambda i: pkm.log_habit("Meditation", notes=f"bench {i}"),
+        lambda i: pkm.get_metrics(),
+        lambda i: pkm.log_alcohol("Synthehol", 1.0),
+        lambda i: pkm.get_work_log(),
+        lambda i: pkm.log_work_hours_direct(0.5, project="Benchmark"),
+        lambda i: pkm.query_database(),
+    ]
+
+    def worker(offset):
+        local = []
+        for i in range(ops):
+            start = time.perf_counter()
+            try:
+                operations[(offset + i) % len(operations)](i)
+            except sqlite3.Error as e:
+                with lock:
+                    errors.append(str(e))
+            local.append(time.perf_counter() - start)
+        pkm.pool.release_thread()
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+    elapsed = time.perf_counter() - start
+
+    return elapsed, sorted(latencies), len(errors)
+
+
+def benchmark(years=3, threads=4, ops=200, profiles=None):
+    """
+    Benchmark each profile (plus an unpooled legacy baseline) on the same data.
+
+    Returns:
+        list: One result dict per configuration
+    """
+    profiles = profiles or list(PROFILES)
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'base.db')
+        print(f"Generating {years} years of demo data...")
+        build_demo_database(base, years)
+
+        configs = [('legacy (unpooled)', 'legacy', 0)] + [(name, name, 8) for name in profiles]
+        for label, profile, max_idle in configs:
+            db_path = os.path.join(tmp, f'{profile}-{max_idle}.db')
+            shutil.copy(base, db_path)
+
+            pkm = PKMManager(db_path=db_path, profile=profile)
+            pkm.pool.max_idle = max_idle
+            elapsed, latencies, errors = run_workload(pkm, threads, ops)
+            pkm.pool.close_all()
+
+            total = threads * ops
+            results.append({
+                'label': label,
+                'ops_per_sec': total / elapsed,
+                'p50_ms': latencies[len(latencies) // 2] * 1000,
+                'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+                'errors': errors,
+            })
+
+    return results
+
+
+def run_write_load(pkm, threads, ops):
+    """
+    Post sub-daily mood rows from several threads, like concurrent web clients.
+
+    Returns:
+        tuple: (elapsed seconds, sorted per-write latencies, error count)
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(n):
+        local = []
+        for i in range(ops):
+            start = time.perf_counter()
+            try:
+                pkm.execute_write('''
+                    INSERT INTO sub_daily_moods (mood, energy, notes)
+                    VALUES (?, ?, ?)
+                ''', (i % 10 + 1, n % 10 + 1, f"load test {n}/{i}"))
+            except sqlite3.Error as e:
+                with lock:
+                    errors.append(str(e))
+            local.append(time.perf_counter() - start)
+        pkm.pool.release_thread()
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    return elapsed, sorted(latencies), len(errors)
+
+
+def load_test(years=1, threads=16, ops=200, profile='balanced', max_latency=0.0):
+    """
+    Compare concurrent write throughput: per-request commits vs. group commit.
+
+    Returns:
+        list: One result dict per configuration
+    """
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'base.db')
+        print(f"Generating {years} years of demo data...")
+        build_demo_database(base, years)
+
+        configs = [
+            ('per-request (legacy)', 'legacy', 0, False),
+            (f'per-request ({profile})', profile, 8, False),
+            (f'writer queue ({profile})', profile, 8, True),
+        ]
+        for label, config_profile, max_idle, use_writer in configs:
+            db_path = os.path.join(tmp, f'load-{len(results)}.db')
+            shutil.copy(base, db_path)
+
+            pkm = PKMManager(db_path=db_path, profile=config_profile)
+            pkm.pool.max_idle = max_idle
+            writer = None
+            if use_writer:
+                writer = WriteQueue(db_path, config_profile, max_latency=max_latency)
+                pkm.attach_writer(writer)
+
+            elapsed, latencies, errors = run_write_load(pkm, threads, ops)
+
+            if writer is not None:
+                writer.close()
+            pkm.pool.close_all()
+
+            total = threads * ops
+            result = {
+                'label': label,
+                'ops_per_sec': total / elapsed,
+                'p50_ms': latencies[len(latencies) // 2] * 1000,
+                'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+                'errors': errors,
+            }
+            if writer is not None:
+                result['label'] += f" [{writer.stats['jobs'] / max(writer.stats['transactions'], 1):.1f}/txn]"
+            results.append(result)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PKM database connection profiles')
+    parser.add_argument('--years', type=float, default=3, help='Years of demo data to generate')
+    parser.add_argument('--threads', type=int, default=4, help='Concurrent worker threads')
+    parser.add_argument('--ops', type=int, default=200, help='Operations per thread')
+    parser.add_argument('--profile', action='append', choices=sorted(PROFILES),
+                        help='Profile to include (repeatable, default: all)')
+    parser.add_argument('--load-test', action='store_true',
+                        help='Compare per-request commits with the single-writer queue')
+    parser.add_argument('--group-commit-ms', type=float, default=0,
+                        help='Writer queue latency budget for --load-test')
+    args = parser.parse_args()
+
+    if args.load_test:
+        profile = (args.profile or ['balanced'])[0]
+        results = load_test(args.years, args.threads, args.ops, profile, args.group_commit_ms / 1000)
+    else:
+        results = benchmark(args.years, args.threads, args.ops, args.profile)
+
+    print(f"\n{'Configuration':<32} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'errors':>8}")
+    print("-" * 74)
+    for r in results:
+        print(f"{r['label']:<32} {r['ops_per_sec']:>10.1f} {r['p50_ms']:>10.2f} {r['p95_ms']:>10.2f} {r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
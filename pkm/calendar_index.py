@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Calendar Bitmap Index
+
+Answers "which days" questions (habit completions, days with a markdown log,
+a daily_metrics row or a work log) from per-day bitmaps instead of scanning
+the log tables or listing the daily/ directory. Bitmaps live in the
+calendar_bitmaps table (migration 0006) as one 46-byte blob per source and
+calendar year, so a decade of one habit is ten primary-key lookups and
+calendar questions become numpy bitwise operations.
+
+Triggers queue the days touched by every write in calendar_pending; before
+answering a query the index recomputes just those bits. Markdown presence is
+rebuilt from pkm.daily_catalog whenever the catalog changes (logs are added,
+removed or renamed).
+
+Usage:
+    index = CalendarIndex(pkm)
+    done = index.habit_days(habit_id, '2024-01-01', '2024-12-31')
+    missing = index.missing_days('daily_metrics', '2024-01-01', '2024-12-31')
+    python3 -m pkm.manage rebuild-calendar [--db PATH]
+"""
+
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from . import daily_catalog
+from .streaks import epoch_day
+
+YEAR_BYTES = 46  # 366 bits, one per day of the year
+
+# Per-day presence sources; 'habit' bitmaps are keyed by habit id instead
+PRESENCE_SOURCES = ('markdown', 'daily_metrics', 'work_logs')
+
+PENDING_SQL = 'SELECT EXISTS (SELECT 1 FROM calendar_pending)'
+
+# Recompute each queued day's bit from the source table's date index
+RECOMPUTE_SQL = {
+    'habit': '''
+        SELECT p.key, p.day, EXISTS (
+            SELECT 1 FROM habit_logs h
+            WHERE h.habit_id = p.key
+              AND h.completed_at >= p.day AND h.completed_at < date(p.day, '+1 day')
+        )
+        FROM calendar_pending p
+        WHERE p.source = 'habit'
+    ''',
+    'daily_metrics': '''
+        SELECT p.key, p.day, EXISTS (SELECT 1 FROM daily_metrics m WHERE m.date = p.day)
+        FROM calendar_pending p
+        WHERE p.source = 'daily_metrics'
+    ''',
+    'work_logs': '''
+        SELECT p.key, p.day, EXISTS (SELECT 1 FROM work_logs w WHERE w.date = p.day)
+        FROM calendar_pending p
+        WHERE p.source = 'work_logs'
+    ''',
+}
+
+BITMAP_SQL = '''
+    SELECT year, bits FROM calendar_bitmaps
+    WHERE source = ? AND key = ? AND year BETWEEN ? AND ?
+'''
+
+# Queue every day of every database-backed source (see rebuild())
+QUEUE_ALL_SQL = '''
+INSERT OR IGNORE INTO calendar_pending (source, key, day)
+SELECT DISTINCT 'habit', habit_id, date(completed_at) FROM habit_logs
+WHERE habit_id IS NOT NULL AND date(completed_at) IS NOT NULL
+UNION SELECT 'daily_metrics', 0, date FROM daily_metrics
+UNION SELECT 'work_logs', 0, date FROM work_logs
+'''
+
+
+def _year_start(year):
+    return epoch_day(f'{year:04d}-01-01')
+
+
+def _parse_day(value):
+    """Split a YYYY-MM-DD string into (year, day of year), or None if invalid."""
+    try:
+        day = epoch_day(value)
+        year = int(value[:4])
+    except (TypeError, ValueError):
+        return None
+    return year, day - _year_start(year)
+
+
+def _store(cursor, source, key, year, bits):
+    if any(bits):
+        cursor.execute('''
+            INSERT INTO calendar_bitmaps (source, key, year, bits) VALUES (?, ?, ?, ?)
+            ON CONFLICT (source, key, year) DO UPDATE SET bits = excluded.bits
+        ''', (source, key, year, bytes(bits)))
+    else:
+        cursor.execute('DELETE FROM calendar_bitmaps WHERE source = ? AND key = ? AND year = ?',
+                       (source, key, year))
+
+
+def apply_pending(cursor):
+    """
+    Recompute the bits for every queued day and clear the queue.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the caller's write transaction
+
+    Returns:
+        int: Number of queued days applied
+    """
+    # (source, key, year) -> {day of year: bit}
+    changes = defaultdict(dict)
+    applied = 0
+    for source, sql in RECOMPUTE_SQL.items():
+        for key, day, present in cursor.execute(sql).fetchall():
+            applied += 1
+            parsed = _parse_day(day)
+            if parsed is not None:
+                year, offset = parsed
+                changes[(source, key, year)][offset] = present
+
+    for (source, key, year), days in changes.items():
+        cursor.execute('SELECT bits FROM calendar_bitmaps WHERE source = ? AND key = ? AND year = ?',
+                       (source, key, year))
+        row = cursor.fetchone()
+        bits = bytearray(row[0]) if row else bytearray(YEAR_BYTES)
+        for offset, present in days.items():
+            if present:
+                bits[offset >> 3] |= 1 << (offset & 7)
+            else:
+                bits[offset >> 3] &= ~(1 << (offset & 7)) & 0xFF
+        _store(cursor, source, key, year, bits)
+
+    cursor.execute('DELETE FROM calendar_pending')
+    return applied
+
+
+def scan_daily_dir(daily_dir):
+    """
+    Collect the dates that have a daily markdown log.
+
+    Args:
+        daily_dir (str): Directory of YYYY-MM-DD.md files
+
+    Returns:
+        list: Date strings (unsorted)
+    """
+    return list(daily_catalog.scan(daily_dir))
+
+
+def store_markdown(cursor, dates):
+    """
+    Replace the markdown presence bitmaps with the given dates.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the caller's write transaction
+        dates (iterable): Date strings that have a daily log
+    """
+    years = defaultdict(lambda: bytearray(YEAR_BYTES))
+    for value in dates:
+        parsed = _parse_day(value)
+        if parsed is not None:
+            year, offset = parsed
+            years[year][offset >> 3] |= 1 << (offset & 7)
+
+    cursor.execute("DELETE FROM calendar_bitmaps WHERE source = 'markdown'")
+    cursor.executemany('''
+        INSERT INTO calendar_bitmaps (source, key, year, bits) VALUES ('markdown', 0, ?, ?)
+    ''', [(year, bytes(bits)) for year, bits in sorted(years.items())])
+
+
+def rebuild(conn, daily_dir=None):
+    """
+    Rebuild every bitmap from the source tables (and daily_dir if given).
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        daily_dir (str, optional): Directory of daily markdown logs
+
+    Returns:
+        int: Number of bitmap rows after the rebuild
+    """
+    cursor = conn.cursor()
+    cursor.execute('BEGIN')
+    try:
+        cursor.execute("DELETE FROM calendar_bitmaps WHERE source != 'markdown'")
+        cursor.execute(QUEUE_ALL_SQL)
+        apply_pending(cursor)
+        if daily_dir is not None:
+            store_markdown(cursor, scan_daily_dir(daily_dir))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return conn.execute('SELECT COUNT(*) FROM calendar_bitmaps').fetchone()[0]
+
+
+def decode(rows, start, end):
+    """
+    Assemble per-year blobs into one boolean array over [start, end].
+
+    Args:
+        rows (list): (year, bits) rows from calendar_bitmaps
+        start (int): First epoch day
+        end (int): Last epoch day (inclusive)
+
+    Returns:
+        np.ndarray: Boolean array, index 0 = start
+    """
+    out = np.zeros(max(end - start + 1, 0), dtype=bool)
+    for year, blob in rows:
+        first = _year_start(year)
+        length = _year_start(year + 1) - first
+        bits = np.unpackbits(np.frombuffer(blob, dtype=np.uint8), bitorder='little')[:length]
+        lo, hi = max(first, start), min(first + length - 1, end)
+        if lo <= hi:
+            out[lo - start:hi - start + 1] = bits[lo - first:hi - first + 1]
+    return out
+
+
+def day_strings(start, mask):
+    """Convert a boolean day mask starting at epoch day `start` to date strings."""
+    days = np.flatnonzero(mask) + start
+    return [str(day) for day in days.astype('datetime64[D]')]
+
+
+class CalendarIndex:
+    """
+    Bitmap calendar queries over a PKMManager's database.
+
+    Attributes:
+        pkm (PKMManager): Manager whose pool, writer and daily_dir are used
+    """
+
+    def __init__(self, pkm):
+        self.pkm = pkm
+        self._lock = threading.Lock()
+        self._markdown_stamp = None  # daily_catalog version the markdown bitmaps reflect
+
+    def refresh(self):
+        """Apply queued writes and pick up daily/ changes before a query."""
+        conn = self.pkm.get_db_connection()
+        try:
+            pending = conn.execute(PENDING_SQL).fetchone()[0]
+        finally:
+            conn.close()
+
+        catalog = self.pkm.daily_catalog
+        catalog.refresh()
+        stamp = catalog.version
+        with self._lock:
+            markdown_stale = stamp != self._markdown_stamp
+        if not pending and not markdown_stale:
+            return
+        dates = catalog.dates() if markdown_stale else None
+
+        def write(cursor):
+            apply_pending(cursor)
+            if markdown_stale:
+                store_markdown(cursor, dates)
+
+        self.pkm.run_write(write)
+        if markdown_stale:
+            with self._lock:
+                self._markdown_stamp = stamp
+
+    def bitmap(self, source, key=0, start=None, end=None):
+        """
+        Get a source's per-day bits over a date range.
+
+        Args:
+            source (str): 'habit', 'markdown', 'daily_metrics' or 'work_logs'
+            key (int, optional): Habit id for 'habit'. Defaults to 0.
+            start (str, optional): First date (YYYY-MM-DD). Defaults to 364 days before end.
+            end (str, optional): Last date (YYYY-MM-DD). Defaults to today (UTC).
+
+        Returns:
+            tuple: (start epoch day, np.ndarray of bool with one entry per day)
+        """
+        self.refresh()
+        last = epoch_day(end)
+        first = epoch_day(start) if start else last - 364
+        first_year = int(np.datetime64(first, 'D').astype('datetime64[Y]').astype(int)) + 1970
+        last_year = int(np.datetime64(last, 'D').astype('datetime64[Y]').astype(int)) + 1970
+
+        conn = self.pkm.get_db_connection()
+        try:
+            rows = conn.execute(BITMAP_SQL, (source, key, first_year, last_year)).fetchall()
+        finally:
+            conn.close()
+        return first, decode(rows, first, last)
+
+    def habit_days(self, habit_id, start=None, end=None):
+        """
+        Get the dates a habit was completed.
+
+        Returns:
+            list: Date strings in ascending order
+        """
+        first, bits = self.bitmap('habit', habit_id, start, end)
+        return day_strings(first, bits)
+
+    def missing_days(self, source, start=None, end=None):
+        """
+        Get the dates without an entry in a presence source.
+
+        Args:
+            source (str): 'markdown', 'daily_metrics' or 'work_logs'
+
+        Returns:
+            list: Date strings in ascending order
+        """
+        first, bits = self.bitmap(source, 0, start, end)
+        return day_strings(first, ~bits)
+
+    def incomplete_days(self, start=None, end=None, sources=PRESENCE_SOURCES):
+        """
+        Get the dates missing at least one of several presence sources.
+
+        Returns:
+            dict: Date string -> list of missing sources, in date order
+        """
+        masks = {source: self.bitmap(source, 0, start, end) for source in sources}
+        first = next(iter(masks.values()))[0]
+        complete = np.logical_and.reduce([bits for _, bits in masks.values()])
+        missing = {}
+        for day in np.flatnonzero(~complete):
+            missing[str(np.datetime64(int(day + first), 'D'))] = [
+                source for source, (_, bits) in masks.items() if not bits[day]]
+        return missing
+
+    def count(self, source, key=0, start=None, end=None):
+        """Count the days with the source's bit set in a date range."""
+        return int(np.count_nonzero(self.bitmap(source, key, start, end)[1]))
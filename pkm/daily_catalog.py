@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Daily Log Catalog
+
+Keeps a catalog of the daily/ markdown logs - date, path, size, mtime,
+SHA-1 of the content and word count - in the daily_files table (migration
+0011) and in memory, so listing logs, finding the most recent ones and
+checking whether a day has a log no longer list and sort the directory on
+every request.
+
+Refreshes are incremental: the directory is only rescanned (one os.scandir
+pass) when its own mtime changes, which happens whenever a log is created,
+renamed or deleted, and a file is only re-read when its mtime or size
+differs from the catalog. In-place edits do not touch the directory mtime,
+so code that writes a log calls refresh_file(); readers that need content
+changes by other programs (search) ask for a per-file stat check.
+
+Usage:
+    catalog = DailyCatalog(pkm)
+    for entry in catalog.recent(5):
+        print(entry.date, entry.words, entry.path)
+    catalog.exists('2024-11-04')
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import namedtuple
+from datetime import date as Date
+
+DAILY_FILE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})\.md$')
+
+CATALOG_SQL = 'SELECT date, size, mtime_ns, sha1, words FROM daily_files'
+
+
+class DailyFile(namedtuple('DailyFile', 'date path size mtime_ns sha1 words')):
+    """One daily log: stat at catalog time plus content hash and word count."""
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+
+def log_date(name):
+    """
+    Date of a daily log file name.
+
+    Returns:
+        str: The YYYY-MM-DD date, or None for any other file - including
+            names of impossible dates such as 2023-02-29.md, which are not
+            daily logs
+    """
+    match = DAILY_FILE_PATTERN.match(name)
+    if match is None:
+        return None
+    try:
+        Date.fromisoformat(match.group(1))
+    except ValueError:
+        return None
+    return match.group(1)
+
+
+def scan(daily_dir):
+    """
+    Stat every daily log in one directory pass.
+
+    Args:
+        daily_dir (str): Directory of YYYY-MM-DD.md files
+
+    Returns:
+        dict: Date -> (mtime_ns, size)
+    """
+    files = {}
+    try:
+        with os.scandir(daily_dir) as entries:
+            for entry in entries:
+                date = log_date(entry.name)
+                if date and entry.is_file():
+                    stat = entry.stat()
+                    files[date] = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        pass
+    return files
+
+
+def describe(path):
+    """
+    Read a log once for its content-derived fields.
+
+    Returns:
+        tuple: (sha1 hex digest, word count), or None if the file is gone
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    return hashlib.sha1(data).hexdigest(), len(data.decode('utf-8', errors='replace').split())
+
+
+def catalog_changes(daily_dir, known, files):
+    """
+    Work out the catalog writes that bring `known` in line with a scan.
+
+    Args:
+        daily_dir (str): Directory of YYYY-MM-DD.md files
+        known (dict): Date -> DailyFile currently cataloged
+        files (dict): scan() result
+
+    Returns:
+        tuple: (dict of date -> new DailyFile, list of removed dates)
+    """
+    removed = [date for date in known if date not in files]
+    updated = {}
+    for date, (mtime_ns, size) in files.items():
+        entry = known.get(date)
+        if entry is not None and (entry.mtime_ns, entry.size) == (mtime_ns, size):
+            continue
+        path = os.path.join(daily_dir, f'{date}.md')
+        described = describe(path)
+        if described is None:
+            removed.append(date)  # Deleted since the scan
+        else:
+            updated[date] = DailyFile(date, path, size, mtime_ns, *described)
+    return updated, [date for date in removed if date in known]
+
+
+def store(cursor, updated, removed):
+    """Write catalog changes inside the caller's transaction."""
+    cursor.executemany('DELETE FROM daily_files WHERE date = ?', [(date,) for date in removed])
+    cursor.executemany('''
+        INSERT INTO daily_files (date, size, mtime_ns, sha1, words) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (date) DO UPDATE SET
+            size = excluded.size, mtime_ns = excluded.mtime_ns, sha1 = excluded.sha1, words = excluded.words
+    ''', [(e.date, e.size, e.mtime_ns, e.sha1, e.words) for e in updated.values()])
+
+
+def load(conn, daily_dir):
+    """Read the stored catalog as date -> DailyFile."""
+    return {date: DailyFile(date, os.path.join(daily_dir, f'{date}.md'), size, mtime_ns, sha1, words)
+            for date, size, mtime_ns, sha1, words in conn.execute(CATALOG_SQL)}
+
+
+def rebuild(conn, daily_dir):
+    """
+    Re-read every daily log into the catalog.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        daily_dir (str): Directory of YYYY-MM-DD.md files
+
+    Returns:
+        int: Number of cataloged logs
+    """
+    updated, _ = catalog_changes(daily_dir, {}, scan(daily_dir))
+    cursor = conn.cursor()
+    cursor.execute('BEGIN')
+    try:
+        cursor.execute('DELETE FROM daily_files')
+        store(cursor, updated, [])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(updated)
+
+
+class DailyCatalog:
+    """
+    Incrementally refreshed catalog of a PKMManager's daily_dir.
+
+    Attributes:
+        pkm (PKMManager): Manager whose pool, writer and daily_dir are used
+        version (int): Bumped whenever a log is added, changed or removed
+    """
+
+    def __init__(self, pkm):
+        self.pkm = pkm
+        self.version = 0
+        self._lock = threading.Lock()
+        self._entries = None   # date -> DailyFile
+        self._dates = []       # Sorted cataloged dates
+        self._dir_mtime = None  # daily_dir mtime_ns of the last scan
+
+    def _stamp(self):
+        try:
+            return os.stat(self.pkm.daily_dir).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _apply(self, updated, removed):
+        # Persist, then publish the new in-memory view
+        if updated or removed:
+            self.pkm.run_write(lambda cursor: store(cursor, updated, removed))
+        with self._lock:
+            entries = dict(self._entries)
+            for date in removed:
+                entries.pop(date, None)
+            entries.update(updated)
+            self._entries = entries
+            self._dates = sorted(entries)
+            if updated or removed:
+                self.version += 1
+
+    def refresh(self, check_files=False):
+        """
+        Bring the catalog up to date with daily_dir.
+
+        Args:
+            check_files (bool, optional): Stat every file even if the
+                directory is unchanged, to catch in-place edits by other
+                programs. Defaults to False.
+        """
+        stamp = self._stamp()
+        with self._lock:
+            if self._entries is not None and stamp == self._dir_mtime and not check_files:
+                return
+            known = self._entries
+
+        if known is None:
+            conn = self.pkm.get_db_connection()
+            try:
+                known = load(conn, self.pkm.daily_dir)
+            finally:
+                conn.close()
+            with self._lock:
+                if self._entries is None:
+                    self._entries = known
+                known = self._entries
+
+        updated, removed = catalog_changes(self.pkm.daily_dir, known, scan(self.pkm.daily_dir))
+        self._apply(updated, removed)
+        with self._lock:
+            self._dir_mtime = stamp
+
+    def refresh_file(self, date):
+        """Re-catalog one day's log after writing (or deleting) it."""
+        if log_date(f'{date}.md') is None:
+            return
+        self.refresh()
+        with self._lock:
+            known = self._entries
+        try:
+            stat = os.stat(self.path(date))
+            files = {date: (stat.st_mtime_ns, stat.st_size)}
+        except FileNotFoundError:
+            files = {}
+        updated, removed = catalog_changes(self.pkm.daily_dir, {date: known[date]} if date in known else {}, files)
+        if updated or removed:
+            self._apply(updated, removed)
+
+    def dates(self):
+        """All dates with a log, oldest first."""
+        self.refresh()
+        with self._lock:
+            return list(self._dates)
+
+    def entries(self, check_files=False):
+        """
+        Get every cataloged log.
+
+        Args:
+            check_files (bool, optional): See refresh()
+
+        Returns:
+            dict: Date -> DailyFile
+        """
+        self.refresh(check_files)
+        with self._lock:
+            return dict(self._entries)
+
+    def recent(self, count=5):
+        """The `count` most recent logs, newest first."""
+        self.refresh()
+        with self._lock:
+            return [self._entries[date] for date in reversed(self._dates[-count:])] if count > 0 else []
+
+    def get(self, date):
+        """A day's DailyFile, or None if it has no log."""
+        self.refresh()
+        with self._lock:
+            return self._entries.get(date)
+
+    def exists(self, date):
+        """Whether a day has a log."""
+        return self.get(date) is not None
+
+    def path(self, date):
+        """Where a day's log lives (whether or not it exists yet)."""
+        return os.path.join(self.pkm.daily_dir, f'{date}.md')
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Database Connection Module
+
+This module provides pooled SQLite connections for the PKM system.
+Connections are configured from a named pragma profile and handed out
+per thread, so repeated calls to PKMManager.get_db_connection() on the same
+thread reuse one connection instead of reconnecting every time.
+
+Profiles:
+    - legacy: SQLite defaults (rollback journal, synchronous FULL)
+    - balanced: WAL journal, synchronous NORMAL (default)
+    - durable: WAL journal, synchronous FULL
+    - fast: WAL journal, synchronous OFF, large cache and mmap
+
+Usage:
+    pool = ConnectionPool('pkm/db/pkm.db', profile='balanced')
+    conn = pool.get()
+    ...
+    conn.close()  # Returns the connection to the pool
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+
+DEFAULT_PROFILE = 'balanced'
+
+# Pragma settings applied to every new connection, per profile.
+# cache_size is negative to express KiB rather than pages.
+PROFILES = {
+    'legacy': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'busy_timeout': 5000,
+        'temp_store': 'DEFAULT',
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+        'mmap_size': 64 * 1024 * 1024,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    },
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -8000,
+        'mmap_size': 0,
+        'busy_timeout': 10000,
+        'temp_store': 'DEFAULT',
+    },
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    },
+}
+
+# Order matters: journal_mode must be set before the other pragmas take effect
+PRAGMA_ORDER = ['journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'busy_timeout', 'temp_store']
+
+
+def resolve_profile(profile=None):
+    """
+    Resolve a profile name to its pragma settings.
+
+    Args:
+        profile (str, optional): Profile name. Defaults to $PKM_DB_PROFILE or 'balanced'.
+
+    Returns:
+        tuple: (profile name, dict of pragma settings)
+
+    Raises:
+        ValueError: If the profile name is unknown
+    """
+    if profile is None:
+        profile = os.environ.get('PKM_DB_PROFILE', DEFAULT_PROFILE)
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown database profile '{profile}'. Choose from: {', '.join(sorted(PROFILES))}")
+    return profile, PROFILES[profile]
+
+
+def connect(db_path, profile=None):
+    """
+    Open a new connection configured with the given pragma profile.
+
+    Args:
+        db_path (str): Path to SQLite database
+        profile (str, optional): Profile name (see PROFILES)
+
+    Returns:
+        sqlite3.Connection: Configured connection
+    """
+    _, settings = resolve_profile(profile)
+    conn = sqlite3.connect(db_path, timeout=settings['busy_timeout'] / 1000, check_same_thread=False)
+    for pragma in PRAGMA_ORDER:
+        conn.execute(f"PRAGMA {pragma} = {settings[pragma]}")
+    return conn
+
+
+class PooledConnection:
+    """
+    Thin wrapper around a pooled sqlite3.Connection.
+
+    Behaves like the underlying connection, except close() hands the
+    connection back to the pool (rolling back any uncommitted work)
+    instead of closing it.
+    """
+
+    __slots__ = ('_pool', '_conn')
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        if name in PooledConnection.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._conn, name, value)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        self._pool.release(self._conn)
+
+
+class ConnectionPool:
+    """
+    Pool of configured SQLite connections leased per thread.
+
+    A thread that asks for a connection while it already holds one gets the
+    same connection back, so nested calls share a transaction. When the last
+    lease on a thread is released the connection returns to the idle queue
+    and can be reused by the next thread (e.g. the next Flask request).
+
+    Attributes:
+        db_path (str): Path to SQLite database
+        profile (str): Name of the pragma profile in use
+        max_idle (int): Maximum idle connections kept open (0 disables pooling)
+    """
+
+    def __init__(self, db_path, profile=None, max_idle=8):
+        self.db_path = db_path
+        self.profile, self.settings = resolve_profile(profile)
+        self.max_idle = max_idle
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+
+    def get(self):
+        """
+        Lease a connection for the current thread.
+
+        Returns:
+            PooledConnection: Connection wrapper; call close() to release it
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            return PooledConnection(self, conn)
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = connect(self.db_path, self.profile)
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return PooledConnection(self, conn)
+
+    def release(self, conn=None):
+        """
+        Release one lease held by the current thread.
+
+        Args:
+            conn (sqlite3.Connection, optional): Connection being released
+        """
+        held = getattr(self._local, 'conn', None)
+        if held is None or (conn is not None and conn is not held):
+            return
+
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+
+        self._local.conn = None
+        self._return(held)
+
+    def release_thread(self):
+        """Force-release whatever the current thread holds (e.g. after a failed request)."""
+        held = getattr(self._local, 'conn', None)
+        if held is None:
+            return
+        self._local.conn = None
+        self._local.depth = 0
+        self._return(held)
+
+    def _return(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+
+        if self._idle.qsize() < self.max_idle:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def close_all(self):
+        """Close every idle connection in the pool."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -1,4 +1,6 @@
--- Core tables for personal metrics tracking
+-- 0001: Core tables for personal metrics tracking
+-- Every statement is idempotent so databases created before versioned
+-- migrations existed can be baselined by simply applying this file.
 
 -- Habits tracking
 CREATE TABLE IF NOT EXISTS habits (
@@ -0,0 +1,36 @@
+-- 0002: Declared index set for date-range and lookup queries
+-- Covering indexes lead with the column used for range filters (date /
+-- completed_at / logged_at) and carry the columns the summaries read, so
+-- range queries and aggregates never touch the table b-tree.
+
+-- Daily metrics: date ranges and mood/energy/sleep averages
+CREATE INDEX IF NOT EXISTS idx_daily_metrics_date_values
+    ON daily_metrics (date, mood_rating, energy_level, sleep_hours);
+
+-- Work logs: date ranges with hours, plus project lookups/DISTINCT project
+CREATE INDEX IF NOT EXISTS idx_work_logs_date
+    ON work_logs (date, project, total_hours);
+CREATE INDEX IF NOT EXISTS idx_work_logs_project
+    ON work_logs (project);
+
+-- Alcohol logs: date ranges with units, plus drink type lookups
+CREATE INDEX IF NOT EXISTS idx_alcohol_logs_date
+    ON alcohol_logs (date, drink_type, units);
+CREATE INDEX IF NOT EXISTS idx_alcohol_logs_drink_type
+    ON alcohol_logs (drink_type);
+
+-- Habit logs: per-habit history and recent completions
+CREATE INDEX IF NOT EXISTS idx_habit_logs_habit
+    ON habit_logs (habit_id, completed_at);
+CREATE INDEX IF NOT EXISTS idx_habit_logs_completed_at
+    ON habit_logs (completed_at);
+
+-- Habits: name lookups
+CREATE INDEX IF NOT EXISTS idx_habits_name
+    ON habits (name);
+
+-- Sub-daily moods: "today's moods" filters on date(logged_at)
+CREATE INDEX IF NOT EXISTS idx_sub_daily_moods_day
+    ON sub_daily_moods (date(logged_at), logged_at);
+CREATE INDEX IF NOT EXISTS idx_sub_daily_moods_logged_at
+    ON sub_daily_moods (logged_at);
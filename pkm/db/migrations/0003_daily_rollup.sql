@@ -0,0 +1,268 @@
+-- 0003: Materialized per-day rollups maintained by triggers
+-- daily_rollup holds one row per date with everything the dashboard,
+-- statistics and charts aggregate; project_rollup breaks work hours down by
+-- project. Triggers on the source tables recompute only the affected day
+-- (through the date indexes from 0002), so the rollups stay exact under
+-- inserts, edits and deletes. `python3 -m pkm.manage rebuild-rollup`
+-- rebuilds both tables from scratch.
+
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    date DATE PRIMARY KEY NOT NULL,
+    metrics_logged INTEGER NOT NULL DEFAULT 0,
+    mood_rating INTEGER,
+    energy_level INTEGER,
+    sleep_hours FLOAT,
+    work_entries INTEGER NOT NULL DEFAULT 0,
+    work_hours FLOAT NOT NULL DEFAULT 0,
+    alcohol_entries INTEGER NOT NULL DEFAULT 0,
+    alcohol_units FLOAT NOT NULL DEFAULT 0,
+    habit_completions INTEGER NOT NULL DEFAULT 0,
+    mood_entries INTEGER NOT NULL DEFAULT 0,
+    mood_min INTEGER,
+    mood_avg FLOAT,
+    mood_max INTEGER,
+    energy_min INTEGER,
+    energy_avg FLOAT,
+    energy_max INTEGER
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS project_rollup (
+    date DATE NOT NULL,
+    project TEXT NOT NULL,
+    entries INTEGER NOT NULL DEFAULT 0,
+    hours FLOAT NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, project)
+) WITHOUT ROWID;
+
+-- Daily metrics: copy the day's values
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_rollup_insert
+AFTER INSERT ON daily_metrics
+BEGIN
+    INSERT INTO daily_rollup (date, metrics_logged, mood_rating, energy_level, sleep_hours)
+    VALUES (NEW.date, 1, NEW.mood_rating, NEW.energy_level, NEW.sleep_hours)
+    ON CONFLICT (date) DO UPDATE SET
+        metrics_logged = 1,
+        mood_rating = excluded.mood_rating,
+        energy_level = excluded.energy_level,
+        sleep_hours = excluded.sleep_hours;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_rollup_update
+AFTER UPDATE ON daily_metrics
+BEGIN
+    UPDATE daily_rollup
+    SET metrics_logged = 0, mood_rating = NULL, energy_level = NULL, sleep_hours = NULL
+    WHERE date = OLD.date;
+    INSERT INTO daily_rollup (date, metrics_logged, mood_rating, energy_level, sleep_hours)
+    VALUES (NEW.date, 1, NEW.mood_rating, NEW.energy_level, NEW.sleep_hours)
+    ON CONFLICT (date) DO UPDATE SET
+        metrics_logged = 1,
+        mood_rating = excluded.mood_rating,
+        energy_level = excluded.energy_level,
+        sleep_hours = excluded.sleep_hours;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_rollup_delete
+AFTER DELETE ON daily_metrics
+BEGIN
+    UPDATE daily_rollup
+    SET metrics_logged = 0, mood_rating = NULL, energy_level = NULL, sleep_hours = NULL
+    WHERE date = OLD.date;
+END;
+
+-- Work logs: recompute the day's totals and the (day, project) row
+CREATE TRIGGER IF NOT EXISTS trg_work_logs_rollup_insert
+AFTER INSERT ON work_logs
+BEGIN
+    INSERT INTO daily_rollup (date) VALUES (NEW.date) ON CONFLICT (date) DO NOTHING;
+    UPDATE daily_rollup
+    SET (work_entries, work_hours) = (
+        SELECT COUNT(*), COALESCE(SUM(total_hours), 0) FROM work_logs WHERE date = NEW.date
+    )
+    WHERE date = NEW.date;
+    DELETE FROM project_rollup WHERE date = NEW.date AND project = NEW.project;
+    INSERT INTO project_rollup (date, project, entries, hours)
+    SELECT date, project, COUNT(*), COALESCE(SUM(total_hours), 0)
+    FROM work_logs WHERE date = NEW.date AND project = NEW.project
+    GROUP BY date, project;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_work_logs_rollup_update
+AFTER UPDATE OF date, project, total_hours ON work_logs
+BEGIN
+    UPDATE daily_rollup
+    SET (work_entries, work_hours) = (
+        SELECT COUNT(*), COALESCE(SUM(total_hours), 0) FROM work_logs WHERE date = OLD.date
+    )
+    WHERE date = OLD.date;
+    DELETE FROM project_rollup WHERE date = OLD.date AND project = OLD.project;
+    INSERT INTO project_rollup (date, project, entries, hours)
+    SELECT date, project, COUNT(*), COALESCE(SUM(total_hours), 0)
+    FROM work_logs WHERE date = OLD.date AND project = OLD.project
+    GROUP BY date, project;
+
+    INSERT INTO daily_rollup (date) VALUES (NEW.date) ON CONFLICT (date) DO NOTHING;
+    UPDATE daily_rollup
+    SET (work_entries, work_hours) = (
+        SELECT COUNT(*), COALESCE(SUM(total_hours), 0) FROM work_logs WHERE date = NEW.date
+    )
+    WHERE date = NEW.date;
+    DELETE FROM project_rollup WHERE date = NEW.date AND project = NEW.project;
+    INSERT INTO project_rollup (date, project, entries, hours)
+    SELECT date, project, COUNT(*), COALESCE(SUM(total_hours), 0)
+    FROM work_logs WHERE date = NEW.date AND project = NEW.project
+    GROUP BY date, project;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_work_logs_rollup_delete
+AFTER DELETE ON work_logs
+BEGIN
+    UPDATE daily_rollup
+    SET (work_entries, work_hours) = (
+        SELECT COUNT(*), COALESCE(SUM(total_hours), 0) FROM work_logs WHERE date = OLD.date
+    )
+    WHERE date = OLD.date;
+    DELETE FROM project_rollup WHERE date = OLD.date AND project = OLD.project;
+    INSERT INTO project_rollup (date, project, entries, hours)
+    SELECT date, project, COUNT(*), COALESCE(SUM(total_hours), 0)
+    FROM work_logs WHERE date = OLD.date AND project = OLD.project
+    GROUP BY date, project;
+END;
+
+-- Alcohol logs: recompute the day's units
+CREATE TRIGGER IF NOT EXISTS trg_alcohol_logs_rollup_insert
+AFTER INSERT ON alcohol_logs
+BEGIN
+    INSERT INTO daily_rollup (date) VALUES (NEW.date) ON CONFLICT (date) DO NOTHING;
+    UPDATE daily_rollup
+    SET (alcohol_entries, alcohol_units) = (
+        SELECT COUNT(*), COALESCE(SUM(units), 0) FROM alcohol_logs WHERE date = NEW.date
+    )
+    WHERE date = NEW.date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_alcohol_logs_rollup_update
+AFTER UPDATE OF date, units ON alcohol_logs
+BEGIN
+    UPDATE daily_rollup
+    SET (alcohol_entries, alcohol_units) = (
+        SELECT COUNT(*), COALESCE(SUM(units), 0) FROM alcohol_logs WHERE date = OLD.date
+    )
+    WHERE date = OLD.date;
+    INSERT INTO daily_rollup (date) VALUES (NEW.date) ON CONFLICT (date) DO NOTHING;
+    UPDATE daily_rollup
+    SET (alcohol_entries, alcohol_units) = (
+        SELECT COUNT(*), COALESCE(SUM(units), 0) FROM alcohol_logs WHERE date = NEW.date
+    )
+    WHERE date = NEW.date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_alcohol_logs_rollup_delete
+AFTER DELETE ON alcohol_logs
+BEGIN
+    UPDATE daily_rollup
+    SET (alcohol_entries, alcohol_units) = (
+        SELECT COUNT(*), COALESCE(SUM(units), 0) FROM alcohol_logs WHERE date = OLD.date
+    )
+    WHERE date = OLD.date;
+END;
+
+-- Habit logs: recompute the day's completion count
+CREATE TRIGGER IF NOT EXISTS trg_habit_logs_rollup_insert
+AFTER INSERT ON habit_logs
+BEGIN
+    INSERT INTO daily_rollup (date)
+    SELECT date(NEW.completed_at) WHERE date(NEW.completed_at) IS NOT NULL
+    ON CONFLICT (date) DO NOTHING;
+    UPDATE daily_rollup
+    SET habit_completions = (
+        SELECT COUNT(*) FROM habit_logs
+        WHERE completed_at >= date(NEW.completed_at)
+          AND completed_at < date(NEW.completed_at, '+1 day')
+    )
+    WHERE date = date(NEW.completed_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_habit_logs_rollup_update
+AFTER UPDATE OF completed_at ON habit_logs
+BEGIN
+    UPDATE daily_rollup
+    SET habit_completions = (
+        SELECT COUNT(*) FROM habit_logs
+        WHERE completed_at >= date(OLD.completed_at)
+          AND completed_at < date(OLD.completed_at, '+1 day')
+    )
+    WHERE date = date(OLD.completed_at);
+    INSERT INTO daily_rollup (date)
+    SELECT date(NEW.completed_at) WHERE date(NEW.completed_at) IS NOT NULL
+    ON CONFLICT (date) DO NOTHING;
+    UPDATE daily_rollup
+    SET habit_completions = (
+        SELECT COUNT(*) FROM habit_logs
+        WHERE completed_at >= date(NEW.completed_at)
+          AND completed_at < date(NEW.completed_at, '+1 day')
+    )
+    WHERE date = date(NEW.completed_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_habit_logs_rollup_delete
+AFTER DELETE ON habit_logs
+BEGIN
+    UPDATE daily_rollup
+    SET habit_completions = (
+        SELECT COUNT(*) FROM habit_logs
+        WHERE completed_at >= date(OLD.completed_at)
+          AND completed_at < date(OLD.completed_at, '+1 day')
+    )
+    WHERE date = date(OLD.completed_at);
+END;
+
+-- Sub-daily moods: recompute the day's min/mean/max
+CREATE TRIGGER IF NOT EXISTS trg_sub_daily_moods_rollup_insert
+AFTER INSERT ON sub_daily_moods
+BEGIN
+    INSERT INTO daily_rollup (date)
+    SELECT date(NEW.logged_at) WHERE date(NEW.logged_at) IS NOT NULL
+    ON CONFLICT (date) DO NOTHING;
+    UPDATE daily_rollup
+    SET (mood_entries, mood_min, mood_avg, mood_max, energy_min, energy_avg, energy_max) = (
+        SELECT COUNT(*), MIN(mood), AVG(mood), MAX(mood), MIN(energy), AVG(energy), MAX(energy)
+        FROM sub_daily_moods WHERE date(logged_at) = date(NEW.logged_at)
+    )
+    WHERE date = date(NEW.logged_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sub_daily_moods_rollup_update
+AFTER UPDATE OF mood, energy, logged_at ON sub_daily_moods
+BEGIN
+    UPDATE daily_rollup
+    SET (mood_entries, mood_min, mood_avg, mood_max, energy_min, energy_avg, energy_max) = (
+        SELECT COUNT(*), MIN(mood), AVG(mood), MAX(mood), MIN(energy), AVG(energy), MAX(energy)
+        FROM sub_daily_moods WHERE date(logged_at) = date(OLD.logged_at)
+    )
+    WHERE date = date(OLD.logged_at);
+    INSERT INTO daily_rollup (date)
+    SELECT date(NEW.logged_at) WHERE date(NEW.logged_at) IS NOT NULL
+    ON CONFLICT (date) DO NOTHING;
+    UPDATE daily_rollup
+    SET (mood_entries, mood_min, mood_avg, mood_max, energy_min, energy_avg, energy_max) = (
+        SELECT COUNT(*), MIN(mood), AVG(mood), MAX(mood), MIN(energy), AVG(energy), MAX(energy)
+        FROM sub_daily_moods WHERE date(logged_at) = date(NEW.logged_at)
+    )
+    WHERE date = date(NEW.logged_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sub_daily_moods_rollup_delete
+AFTER DELETE ON sub_daily_moods
+BEGIN
+    UPDATE daily_rollup
+    SET (mood_entries, mood_min, mood_avg, mood_max, energy_min, energy_avg, energy_max) = (
+        SELECT COUNT(*), MIN(mood), AVG(mood), MAX(mood), MIN(energy), AVG(energy), MAX(energy)
+        FROM sub_daily_moods WHERE date(logged_at) = date(OLD.logged_at)
+    )
+    WHERE date = date(OLD.logged_at);
+END;
+
+-- Existing data is backfilled by pkm.rollup.REBUILD_SQL, which
+-- pkm.migrations runs once the pending migrations are applied (BACKFILLS),
+-- so the backfill and `rebuild-rollup` share one copy of the SQL
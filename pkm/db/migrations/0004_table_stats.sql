@@ -0,0 +1,169 @@
+-- 0004: Running statistics for the database summary
+-- table_stats keeps, per tracked table, a row count plus a non-null count
+-- and sum for each summarized column. Triggers adjust them on every write,
+-- so the all-time summary is a handful of primary-key lookups. The '*' row
+-- of each table holds the row count and a change counter that readers use
+-- to validate cached summaries.
+
+CREATE TABLE IF NOT EXISTS table_stats (
+    table_name TEXT NOT NULL,
+    column_name TEXT NOT NULL, -- '*' for the row count
+    value_count INTEGER NOT NULL DEFAULT 0,
+    value_sum FLOAT NOT NULL DEFAULT 0,
+    changes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (table_name, column_name)
+) WITHOUT ROWID;
+
+-- Daily metrics: rows, mood, energy, sleep
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_stats_insert
+AFTER INSERT ON daily_metrics
+BEGIN
+    UPDATE table_stats SET
+        value_count = value_count + CASE column_name
+            WHEN '*' THEN 1
+            WHEN 'mood_rating' THEN NEW.mood_rating IS NOT NULL
+            WHEN 'energy_level' THEN NEW.energy_level IS NOT NULL
+            WHEN 'sleep_hours' THEN NEW.sleep_hours IS NOT NULL
+        END,
+        value_sum = value_sum + CASE column_name
+            WHEN 'mood_rating' THEN COALESCE(NEW.mood_rating, 0)
+            WHEN 'energy_level' THEN COALESCE(NEW.energy_level, 0)
+            WHEN 'sleep_hours' THEN COALESCE(NEW.sleep_hours, 0)
+            ELSE 0
+        END,
+        changes = changes + 1
+    WHERE table_name = 'daily_metrics';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_stats_update
+AFTER UPDATE OF mood_rating, energy_level, sleep_hours ON daily_metrics
+BEGIN
+    UPDATE table_stats SET
+        value_count = value_count + CASE column_name
+            WHEN 'mood_rating' THEN (NEW.mood_rating IS NOT NULL) - (OLD.mood_rating IS NOT NULL)
+            WHEN 'energy_level' THEN (NEW.energy_level IS NOT NULL) - (OLD.energy_level IS NOT NULL)
+            WHEN 'sleep_hours' THEN (NEW.sleep_hours IS NOT NULL) - (OLD.sleep_hours IS NOT NULL)
+            ELSE 0
+        END,
+        value_sum = value_sum + CASE column_name
+            WHEN 'mood_rating' THEN COALESCE(NEW.mood_rating, 0) - COALESCE(OLD.mood_rating, 0)
+            WHEN 'energy_level' THEN COALESCE(NEW.energy_level, 0) - COALESCE(OLD.energy_level, 0)
+            WHEN 'sleep_hours' THEN COALESCE(NEW.sleep_hours, 0) - COALESCE(OLD.sleep_hours, 0)
+            ELSE 0
+        END,
+        changes = changes + 1
+    WHERE table_name = 'daily_metrics';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_stats_delete
+AFTER DELETE ON daily_metrics
+BEGIN
+    UPDATE table_stats SET
+        value_count = value_count - CASE column_name
+            WHEN '*' THEN 1
+            WHEN 'mood_rating' THEN OLD.mood_rating IS NOT NULL
+            WHEN 'energy_level' THEN OLD.energy_level IS NOT NULL
+            WHEN 'sleep_hours' THEN OLD.sleep_hours IS NOT NULL
+        END,
+        value_sum = value_sum - CASE column_name
+            WHEN 'mood_rating' THEN COALESCE(OLD.mood_rating, 0)
+            WHEN 'energy_level' THEN COALESCE(OLD.energy_level, 0)
+            WHEN 'sleep_hours' THEN COALESCE(OLD.sleep_hours, 0)
+            ELSE 0
+        END,
+        changes = changes + 1
+    WHERE table_name = 'daily_metrics';
+END;
+
+-- Habit logs: rows only
+CREATE TRIGGER IF NOT EXISTS trg_habit_logs_stats_insert
+AFTER INSERT ON habit_logs
+BEGIN
+    UPDATE table_stats SET value_count = value_count + 1, changes = changes + 1
+    WHERE table_name = 'habit_logs' AND column_name = '*';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_habit_logs_stats_delete
+AFTER DELETE ON habit_logs
+BEGIN
+    UPDATE table_stats SET value_count = value_count - 1, changes = changes + 1
+    WHERE table_name = 'habit_logs' AND column_name = '*';
+END;
+
+-- Work logs: rows, total_hours
+CREATE TRIGGER IF NOT EXISTS trg_work_logs_stats_insert
+AFTER INSERT ON work_logs
+BEGIN
+    UPDATE table_stats SET
+        value_count = value_count + CASE column_name WHEN '*' THEN 1 ELSE NEW.total_hours IS NOT NULL END,
+        value_sum = value_sum + CASE column_name WHEN '*' THEN 0 ELSE COALESCE(NEW.total_hours, 0) END,
+        changes = changes + 1
+    WHERE table_name = 'work_logs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_work_logs_stats_update
+AFTER UPDATE OF total_hours ON work_logs
+BEGIN
+    UPDATE table_stats SET
+        value_count = value_count + CASE column_name WHEN '*' THEN 0
+            ELSE (NEW.total_hours IS NOT NULL) - (OLD.total_hours IS NOT NULL) END,
+        value_sum = value_sum + CASE column_name WHEN '*' THEN 0
+            ELSE COALESCE(NEW.total_hours, 0) - COALESCE(OLD.total_hours, 0) END,
+        changes = changes + 1
+    WHERE table_name = 'work_logs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_work_logs_stats_delete
+AFTER DELETE ON work_logs
+BEGIN
+    UPDATE table_stats SET
+        value_count = value_count - CASE column_name WHEN '*' THEN 1 ELSE OLD.total_hours IS NOT NULL END,
+        value_sum = value_sum - CASE column_name WHEN '*' THEN 0 ELSE COALESCE(OLD.total_hours, 0) END,
+        changes = changes + 1
+    WHERE table_name = 'work_logs';
+END;
+
+-- Alcohol logs: rows, units
+CREATE TRIGGER IF NOT EXISTS trg_alcohol_logs_stats_insert
+AFTER INSERT ON alcohol_logs
+BEGIN
+    UPDATE table_stats SET
+        value_count = value_count + CASE column_name WHEN '*' THEN 1 ELSE NEW.units IS NOT NULL END,
+        value_sum = value_sum + CASE column_name WHEN '*' THEN 0 ELSE COALESCE(NEW.units, 0) END,
+        changes = changes + 1
+    WHERE table_name = 'alcohol_logs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_alcohol_logs_stats_update
+AFTER UPDATE OF units ON alcohol_logs
+BEGIN
+    UPDATE table_stats SET
+        value_count = value_count + CASE column_name WHEN '*' THEN 0
+            ELSE (NEW.units IS NOT NULL) - (OLD.units IS NOT NULL) END,
+        value_sum = value_sum + CASE column_name WHEN '*' THEN 0
+            ELSE COALESCE(NEW.units, 0) - COALESCE(OLD.units, 0) END,
+        changes = changes + 1
+    WHERE table_name = 'alcohol_logs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_alcohol_logs_stats_delete
+AFTER DELETE ON alcohol_logs
+BEGIN
+    UPDATE table_stats SET
+        value_count = value_count - CASE column_name WHEN '*' THEN 1 ELSE OLD.units IS NOT NULL END,
+        value_sum = value_sum - CASE column_name WHEN '*' THEN 0 ELSE COALESCE(OLD.units, 0) END,
+        changes = changes + 1
+    WHERE table_name = 'alcohol_logs';
+END;
+
+-- Backfill from existing data
+INSERT OR REPLACE INTO table_stats (table_name, column_name, value_count, value_sum)
+SELECT 'daily_metrics', '*', COUNT(*), 0 FROM daily_metrics
+UNION ALL SELECT 'daily_metrics', 'mood_rating', COUNT(mood_rating), COALESCE(SUM(mood_rating), 0) FROM daily_metrics
+UNION ALL SELECT 'daily_metrics', 'energy_level', COUNT(energy_level), COALESCE(SUM(energy_level), 0) FROM daily_metrics
+UNION ALL SELECT 'daily_metrics', 'sleep_hours', COUNT(sleep_hours), COALESCE(SUM(sleep_hours), 0) FROM daily_metrics
+UNION ALL SELECT 'habit_logs', '*', COUNT(*), 0 FROM habit_logs
+UNION ALL SELECT 'work_logs', '*', COUNT(*), 0 FROM work_logs
+UNION ALL SELECT 'work_logs', 'total_hours', COUNT(total_hours), COALESCE(SUM(total_hours), 0) FROM work_logs
+UNION ALL SELECT 'alcohol_logs', '*', COUNT(*), 0 FROM alcohol_logs
+UNION ALL SELECT 'alcohol_logs', 'units', COUNT(units), COALESCE(SUM(units), 0) FROM alcohol_logs;
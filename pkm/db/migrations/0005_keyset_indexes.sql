@@ -0,0 +1,11 @@
+-- 0005: Indexes for keyset pagination on (date, id)
+-- A plain date index is ordered by (date, rowid), so pages ordered by date
+-- then id read straight off the index without sorting each date's rows.
+-- daily_metrics (UNIQUE date), habit_logs and sub_daily_moods are already
+-- covered by the indexes from 0001/0002.
+
+CREATE INDEX IF NOT EXISTS idx_work_logs_date_id
+    ON work_logs (date);
+
+CREATE INDEX IF NOT EXISTS idx_alcohol_logs_date_id
+    ON alcohol_logs (date);
@@ -0,0 +1,98 @@
+-- 0006: Calendar bitmap index
+-- calendar_bitmaps stores one bit per day per source as a 46-byte blob per
+-- calendar year (bit n = day n of the year, least significant bit first).
+-- Sources are 'habit' (key = habits.id), 'daily_metrics', 'work_logs' and
+-- 'markdown' (key 0). Triggers queue every day a write touches in
+-- calendar_pending; pkm.calendar_index recomputes just those bits from the
+-- date indexes before answering a query. Markdown presence comes from the
+-- daily/ directory and is refreshed by pkm.calendar_index itself.
+
+CREATE TABLE IF NOT EXISTS calendar_bitmaps (
+    source TEXT NOT NULL,
+    key INTEGER NOT NULL DEFAULT 0,
+    year INTEGER NOT NULL,
+    bits BLOB NOT NULL,
+    PRIMARY KEY (source, key, year)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS calendar_pending (
+    source TEXT NOT NULL,
+    key INTEGER NOT NULL DEFAULT 0,
+    day DATE NOT NULL,
+    PRIMARY KEY (source, key, day)
+) WITHOUT ROWID;
+
+-- Habit logs: the habit's completion day
+CREATE TRIGGER IF NOT EXISTS trg_habit_logs_calendar_insert
+AFTER INSERT ON habit_logs
+BEGIN
+    INSERT OR IGNORE INTO calendar_pending (source, key, day)
+    SELECT 'habit', NEW.habit_id, date(NEW.completed_at)
+    WHERE NEW.habit_id IS NOT NULL AND date(NEW.completed_at) IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_habit_logs_calendar_update
+AFTER UPDATE OF habit_id, completed_at ON habit_logs
+BEGIN
+    INSERT OR IGNORE INTO calendar_pending (source, key, day)
+    SELECT 'habit', OLD.habit_id, date(OLD.completed_at)
+    WHERE OLD.habit_id IS NOT NULL AND date(OLD.completed_at) IS NOT NULL;
+    INSERT OR IGNORE INTO calendar_pending (source, key, day)
+    SELECT 'habit', NEW.habit_id, date(NEW.completed_at)
+    WHERE NEW.habit_id IS NOT NULL AND date(NEW.completed_at) IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_habit_logs_calendar_delete
+AFTER DELETE ON habit_logs
+BEGIN
+    INSERT OR IGNORE INTO calendar_pending (source, key, day)
+    SELECT 'habit', OLD.habit_id, date(OLD.completed_at)
+    WHERE OLD.habit_id IS NOT NULL AND date(OLD.completed_at) IS NOT NULL;
+END;
+
+-- Daily metrics: presence of the day's row
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_calendar_insert
+AFTER INSERT ON daily_metrics
+BEGIN
+    INSERT OR IGNORE INTO calendar_pending (source, key, day) VALUES ('daily_metrics', 0, NEW.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_calendar_update
+AFTER UPDATE OF date ON daily_metrics
+BEGIN
+    INSERT OR IGNORE INTO calendar_pending (source, key, day) VALUES ('daily_metrics', 0, OLD.date);
+    INSERT OR IGNORE INTO calendar_pending (source, key, day) VALUES ('daily_metrics', 0, NEW.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_calendar_delete
+AFTER DELETE ON daily_metrics
+BEGIN
+    INSERT OR IGNORE INTO calendar_pending (source, key, day) VALUES ('daily_metrics', 0, OLD.date);
+END;
+
+-- Work logs: presence of any entry on the day
+CREATE TRIGGER IF NOT EXISTS trg_work_logs_calendar_insert
+AFTER INSERT ON work_logs
+BEGIN
+    INSERT OR IGNORE INTO calendar_pending (source, key, day) VALUES ('work_logs', 0, NEW.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_work_logs_calendar_update
+AFTER UPDATE OF date ON work_logs
+BEGIN
+    INSERT OR IGNORE INTO calendar_pending (source, key, day) VALUES ('work_logs', 0, OLD.date);
+    INSERT OR IGNORE INTO calendar_pending (source, key, day) VALUES ('work_logs', 0, NEW.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_work_logs_calendar_delete
+AFTER DELETE ON work_logs
+BEGIN
+    INSERT OR IGNORE INTO calendar_pending (source, key, day) VALUES ('work_logs', 0, OLD.date);
+END;
+
+-- Backfill: queue every existing day; the first query builds the bitmaps
+INSERT OR IGNORE INTO calendar_pending (source, key, day)
+SELECT DISTINCT 'habit', habit_id, date(completed_at) FROM habit_logs
+WHERE habit_id IS NOT NULL AND date(completed_at) IS NOT NULL
+UNION SELECT 'daily_metrics', 0, date FROM daily_metrics
+UNION SELECT 'work_logs', 0, date FROM work_logs;
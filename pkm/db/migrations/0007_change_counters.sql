@@ -0,0 +1,38 @@
+-- 0007: Change counters for every table that feeds daily_rollup
+-- Caches built on daily_rollup (analytics, heatmaps, streaks) validate
+-- themselves against the table_stats change counters from 0004. Those
+-- missed edits to habit_logs and any write to sub_daily_moods; this adds a
+-- '*' row for sub_daily_moods and counts habit_logs updates.
+
+CREATE TRIGGER IF NOT EXISTS trg_habit_logs_stats_update
+AFTER UPDATE ON habit_logs
+BEGIN
+    UPDATE table_stats SET changes = changes + 1
+    WHERE table_name = 'habit_logs' AND column_name = '*';
+END;
+
+-- Sub-daily moods: rows only
+CREATE TRIGGER IF NOT EXISTS trg_sub_daily_moods_stats_insert
+AFTER INSERT ON sub_daily_moods
+BEGIN
+    UPDATE table_stats SET value_count = value_count + 1, changes = changes + 1
+    WHERE table_name = 'sub_daily_moods' AND column_name = '*';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sub_daily_moods_stats_update
+AFTER UPDATE ON sub_daily_moods
+BEGIN
+    UPDATE table_stats SET changes = changes + 1
+    WHERE table_name = 'sub_daily_moods' AND column_name = '*';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sub_daily_moods_stats_delete
+AFTER DELETE ON sub_daily_moods
+BEGIN
+    UPDATE table_stats SET value_count = value_count - 1, changes = changes + 1
+    WHERE table_name = 'sub_daily_moods' AND column_name = '*';
+END;
+
+-- Backfill from existing data
+INSERT OR REPLACE INTO table_stats (table_name, column_name, value_count, value_sum)
+SELECT 'sub_daily_moods', '*', COUNT(*), 0 FROM sub_daily_moods;
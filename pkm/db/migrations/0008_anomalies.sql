@@ -0,0 +1,21 @@
+-- 0008: Rolling anomaly detection state
+-- anomaly_state keeps, per detected metric, the trailing window of daily
+-- values (float64 blob, NaN = no data) ending on the last scored day, so
+-- pkm.anomalies only scores days after it. anomalies holds the flagged
+-- days; today's row is provisional and rescored until the day is over.
+
+CREATE TABLE IF NOT EXISTS anomaly_state (
+    metric TEXT PRIMARY KEY NOT NULL,
+    config TEXT NOT NULL,  -- window:min_periods:threshold the state was built with
+    last_day DATE NOT NULL,
+    history BLOB NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS anomalies (
+    date DATE NOT NULL,
+    metric TEXT NOT NULL,
+    value FLOAT NOT NULL,
+    baseline FLOAT NOT NULL,  -- rolling median of the window
+    score FLOAT NOT NULL,     -- robust z-score (MAD), or z-score when MAD is 0
+    PRIMARY KEY (date, metric)
+) WITHOUT ROWID;
@@ -0,0 +1,65 @@
+-- 0009: Forecast model state
+-- forecast_state keeps, per forecast series, the smoothing parameters and
+-- the Holt-Winters state (level, trend, seasonal offsets) after the last
+-- completed period, so pkm.forecast advances it one period at a time and
+-- answers forecasts without refitting. A write on or before last_day marks
+-- the series stale and it is refitted from scratch on the next update.
+
+CREATE TABLE IF NOT EXISTS forecast_state (
+    series TEXT PRIMARY KEY NOT NULL,
+    config TEXT NOT NULL,       -- model config the state was fitted with
+    last_day DATE NOT NULL,     -- last day of the last period applied
+    alpha FLOAT NOT NULL,
+    beta FLOAT NOT NULL,
+    gamma FLOAT NOT NULL,
+    level FLOAT NOT NULL,
+    trend FLOAT NOT NULL,
+    season BLOB NOT NULL,       -- float64 offsets indexed by period % season length
+    sse FLOAT NOT NULL,         -- sum of squared one-step errors
+    errors INTEGER NOT NULL,    -- number of errors in sse
+    stale INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- Daily metrics feed the mood, energy and sleep series
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_forecast_insert
+AFTER INSERT ON daily_metrics
+BEGIN
+    UPDATE forecast_state SET stale = 1
+    WHERE series IN ('mood', 'energy', 'sleep') AND last_day >= NEW.date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_forecast_update
+AFTER UPDATE OF date, mood_rating, energy_level, sleep_hours ON daily_metrics
+BEGIN
+    UPDATE forecast_state SET stale = 1
+    WHERE series IN ('mood', 'energy', 'sleep') AND last_day >= MIN(OLD.date, NEW.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_forecast_delete
+AFTER DELETE ON daily_metrics
+BEGIN
+    UPDATE forecast_state SET stale = 1
+    WHERE series IN ('mood', 'energy', 'sleep') AND last_day >= OLD.date;
+END;
+
+-- Alcohol logs feed the weekly alcohol series
+CREATE TRIGGER IF NOT EXISTS trg_alcohol_logs_forecast_insert
+AFTER INSERT ON alcohol_logs
+BEGIN
+    UPDATE forecast_state SET stale = 1
+    WHERE series = 'alcohol' AND last_day >= NEW.date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_alcohol_logs_forecast_update
+AFTER UPDATE OF date, units ON alcohol_logs
+BEGIN
+    UPDATE forecast_state SET stale = 1
+    WHERE series = 'alcohol' AND last_day >= MIN(OLD.date, NEW.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_alcohol_logs_forecast_delete
+AFTER DELETE ON alcohol_logs
+BEGIN
+    UPDATE forecast_state SET stale = 1
+    WHERE series = 'alcohol' AND last_day >= OLD.date;
+END;
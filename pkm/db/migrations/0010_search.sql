@@ -0,0 +1,180 @@
+-- 0010: Full-text search
+-- search_index is an FTS5 table over every free-text column and the daily
+-- markdown logs. Rowids encode their origin as id * 8 + source code, so
+-- the triggers below replace a row's entry with a rowid lookup:
+--   1 daily_metrics, 2 sub_daily_moods, 3 work_logs, 4 habit_logs,
+--   5 alcohol_logs, 6 daily_entries, 7 markdown (search_files.id)
+-- search_files records the mtime and size each daily/*.md file was indexed
+-- at; pkm.search re-reads only files whose stat changed.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    body,
+    source UNINDEXED,
+    date UNINDEXED,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+
+CREATE TABLE IF NOT EXISTS search_files (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+
+-- Daily metrics notes
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_search_insert
+AFTER INSERT ON daily_metrics
+WHEN NEW.notes IS NOT NULL AND NEW.notes != ''
+BEGIN
+    INSERT INTO search_index (rowid, body, source, date)
+    VALUES (NEW.id * 8 + 1, NEW.notes, 'daily_metrics', NEW.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_search_update
+AFTER UPDATE OF notes, date ON daily_metrics
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 1;
+    INSERT INTO search_index (rowid, body, source, date)
+    SELECT NEW.id * 8 + 1, NEW.notes, 'daily_metrics', NEW.date
+    WHERE NEW.notes IS NOT NULL AND NEW.notes != '';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_search_delete
+AFTER DELETE ON daily_metrics
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 1;
+END;
+
+-- Mood check-in notes
+CREATE TRIGGER IF NOT EXISTS trg_sub_daily_moods_search_insert
+AFTER INSERT ON sub_daily_moods
+WHEN NEW.notes IS NOT NULL AND NEW.notes != ''
+BEGIN
+    INSERT INTO search_index (rowid, body, source, date)
+    VALUES (NEW.id * 8 + 2, NEW.notes, 'sub_daily_moods', date(NEW.logged_at));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sub_daily_moods_search_update
+AFTER UPDATE OF notes, logged_at ON sub_daily_moods
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 2;
+    INSERT INTO search_index (rowid, body, source, date)
+    SELECT NEW.id * 8 + 2, NEW.notes, 'sub_daily_moods', date(NEW.logged_at)
+    WHERE NEW.notes IS NOT NULL AND NEW.notes != '';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sub_daily_moods_search_delete
+AFTER DELETE ON sub_daily_moods
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 2;
+END;
+
+-- Work log descriptions
+CREATE TRIGGER IF NOT EXISTS trg_work_logs_search_insert
+AFTER INSERT ON work_logs
+WHEN NEW.description IS NOT NULL AND NEW.description != ''
+BEGIN
+    INSERT INTO search_index (rowid, body, source, date)
+    VALUES (NEW.id * 8 + 3, NEW.description, 'work_logs', NEW.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_work_logs_search_update
+AFTER UPDATE OF description, date ON work_logs
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 3;
+    INSERT INTO search_index (rowid, body, source, date)
+    SELECT NEW.id * 8 + 3, NEW.description, 'work_logs', NEW.date
+    WHERE NEW.description IS NOT NULL AND NEW.description != '';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_work_logs_search_delete
+AFTER DELETE ON work_logs
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 3;
+END;
+
+-- Habit log notes
+CREATE TRIGGER IF NOT EXISTS trg_habit_logs_search_insert
+AFTER INSERT ON habit_logs
+WHEN NEW.notes IS NOT NULL AND NEW.notes != ''
+BEGIN
+    INSERT INTO search_index (rowid, body, source, date)
+    VALUES (NEW.id * 8 + 4, NEW.notes, 'habit_logs', date(NEW.completed_at));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_habit_logs_search_update
+AFTER UPDATE OF notes, completed_at ON habit_logs
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 4;
+    INSERT INTO search_index (rowid, body, source, date)
+    SELECT NEW.id * 8 + 4, NEW.notes, 'habit_logs', date(NEW.completed_at)
+    WHERE NEW.notes IS NOT NULL AND NEW.notes != '';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_habit_logs_search_delete
+AFTER DELETE ON habit_logs
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 4;
+END;
+
+-- Alcohol log notes
+CREATE TRIGGER IF NOT EXISTS trg_alcohol_logs_search_insert
+AFTER INSERT ON alcohol_logs
+WHEN NEW.notes IS NOT NULL AND NEW.notes != ''
+BEGIN
+    INSERT INTO search_index (rowid, body, source, date)
+    VALUES (NEW.id * 8 + 5, NEW.notes, 'alcohol_logs', NEW.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_alcohol_logs_search_update
+AFTER UPDATE OF notes, date ON alcohol_logs
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 5;
+    INSERT INTO search_index (rowid, body, source, date)
+    SELECT NEW.id * 8 + 5, NEW.notes, 'alcohol_logs', NEW.date
+    WHERE NEW.notes IS NOT NULL AND NEW.notes != '';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_alcohol_logs_search_delete
+AFTER DELETE ON alcohol_logs
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 5;
+END;
+
+-- Daily entries
+CREATE TRIGGER IF NOT EXISTS trg_daily_entries_search_insert
+AFTER INSERT ON daily_entries
+WHEN NEW.content IS NOT NULL AND NEW.content != ''
+BEGIN
+    INSERT INTO search_index (rowid, body, source, date)
+    VALUES (NEW.id * 8 + 6, NEW.content, 'daily_entries', NEW.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_entries_search_update
+AFTER UPDATE OF content, date ON daily_entries
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 6;
+    INSERT INTO search_index (rowid, body, source, date)
+    SELECT NEW.id * 8 + 6, NEW.content, 'daily_entries', NEW.date
+    WHERE NEW.content IS NOT NULL AND NEW.content != '';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_entries_search_delete
+AFTER DELETE ON daily_entries
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 6;
+END;
+
+-- Backfill from existing rows; markdown files are indexed on first search
+INSERT INTO search_index (rowid, body, source, date)
+SELECT id * 8 + 1, notes, 'daily_metrics', date FROM daily_metrics WHERE notes IS NOT NULL AND notes != '';
+INSERT INTO search_index (rowid, body, source, date)
+SELECT id * 8 + 2, notes, 'sub_daily_moods', date(logged_at) FROM sub_daily_moods WHERE notes IS NOT NULL AND notes != '';
+INSERT INTO search_index (rowid, body, source, date)
+SELECT id * 8 + 3, description, 'work_logs', date FROM work_logs WHERE description IS NOT NULL AND description != '';
+INSERT INTO search_index (rowid, body, source, date)
+SELECT id * 8 + 4, notes, 'habit_logs', date(completed_at) FROM habit_logs WHERE notes IS NOT NULL AND notes != '';
+INSERT INTO search_index (rowid, body, source, date)
+SELECT id * 8 + 5, notes, 'alcohol_logs', date FROM alcohol_logs WHERE notes IS NOT NULL AND notes != '';
+INSERT INTO search_index (rowid, body, source, date)
+SELECT id * 8 + 6, content, 'daily_entries', date FROM daily_entries WHERE content IS NOT NULL AND content != '';
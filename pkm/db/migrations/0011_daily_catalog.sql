@@ -0,0 +1,14 @@
+-- 0011: Catalog of the daily/ markdown logs
+-- One row per YYYY-MM-DD.md file with the stat it was cataloged at and
+-- content-derived fields. pkm.daily_catalog re-reads a file only when its
+-- mtime or size changes, and rescans the directory only when the
+-- directory's own mtime does; listings, "recent N" and existence checks are
+-- answered from this catalog instead of os.listdir().
+
+CREATE TABLE IF NOT EXISTS daily_files (
+    date DATE PRIMARY KEY NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha1 TEXT NOT NULL,
+    words INTEGER NOT NULL
+) WITHOUT ROWID;
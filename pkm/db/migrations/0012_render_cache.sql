@@ -0,0 +1,13 @@
+-- 0012: Rendered markdown cache
+-- Second tier of pkm.render_cache: the HTML of the latest render of each
+-- markdown file, with the SHA-1 of the source text and the renderer
+-- (markdown version and extensions) it was produced with. A row is only
+-- reused when both match, so stale rows are never served; writing a log
+-- deletes its row, and the next render replaces it.
+
+CREATE TABLE IF NOT EXISTS rendered_markdown (
+    path TEXT PRIMARY KEY NOT NULL,  -- relative to the project root
+    sha1 TEXT NOT NULL,
+    renderer TEXT NOT NULL,
+    html TEXT NOT NULL
+);
@@ -0,0 +1,20 @@
+-- 0013: Markdown to database sync
+-- markdown_sync records, per daily log, the SHA-1 of the content last
+-- synced and any values that could not be read, so pkm.markdown_sync only
+-- re-parses logs whose hash changed. markdown_rows lists the habit, alcohol
+-- and work log rows each daily log produced; re-syncing a log deletes
+-- exactly those rows before inserting the new ones, leaving rows logged
+-- through the CLI, TUI or web forms alone.
+
+CREATE TABLE IF NOT EXISTS markdown_sync (
+    date DATE PRIMARY KEY NOT NULL,
+    sha1 TEXT NOT NULL,
+    errors TEXT             -- newline-separated problems, NULL if none
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS markdown_rows (
+    date DATE NOT NULL,
+    source TEXT NOT NULL,   -- habit_logs, alcohol_logs or work_logs
+    row_id INTEGER NOT NULL,
+    PRIMARY KEY (date, source, row_id)
+) WITHOUT ROWID;
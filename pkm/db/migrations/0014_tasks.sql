@@ -0,0 +1,36 @@
+-- 0014: Task index
+-- tasks has one row per distinct task (matched on lower-cased text with
+-- whitespace collapsed) across the "## Tasks" sections of the daily logs,
+-- with its state in the latest log that lists it, when it was first and
+-- last listed and in how many logs (more than one: carried over).
+-- task_days holds each log's entries; pkm.markdown_sync replaces a log's
+-- rows when the log changes and pkm.task_index recomputes the tasks they
+-- touch.
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,         -- as written in the latest log
+    state TEXT NOT NULL,        -- completed, in_progress or planned
+    first_seen DATE NOT NULL,
+    last_seen DATE NOT NULL,
+    days INTEGER NOT NULL,      -- logs listing the task
+    completed_on DATE           -- first log listing it as completed
+);
+
+-- Open or completed tasks, most recently listed first
+CREATE INDEX IF NOT EXISTS idx_tasks_state_last_seen ON tasks (state, last_seen);
+
+CREATE TABLE IF NOT EXISTS task_days (
+    task_id INTEGER NOT NULL,
+    date DATE NOT NULL,
+    state TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (task_id, date)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_task_days_date ON task_days (date);
+
+-- Logs synced before this migration were parsed without their tasks;
+-- forget their hashes so the next markdown sync reads them again
+DELETE FROM markdown_sync;
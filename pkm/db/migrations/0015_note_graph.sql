@@ -0,0 +1,29 @@
+-- 0015: Tag index and link graph
+-- note_tags is the inverted index of #tags and note_links the adjacency
+-- list of [[wiki-links]] and relative links to .md notes, one row per
+-- (note, tag) and (source, target). Notes are keyed by lower-cased name;
+-- a daily log's key is its date. pkm.markdown_sync replaces a log's rows
+-- when it re-parses the log, and pkm.note_graph answers tag, backlink and
+-- neighbourhood queries with indexed lookups and recursive CTEs.
+
+CREATE TABLE IF NOT EXISTS note_tags (
+    tag TEXT NOT NULL,
+    note TEXT NOT NULL,
+    PRIMARY KEY (tag, note)
+) WITHOUT ROWID;
+
+-- Tags of one note
+CREATE INDEX IF NOT EXISTS idx_note_tags_note ON note_tags (note);
+
+CREATE TABLE IF NOT EXISTS note_links (
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    PRIMARY KEY (source, target)
+) WITHOUT ROWID;
+
+-- Backlinks
+CREATE INDEX IF NOT EXISTS idx_note_links_target ON note_links (target, source);
+
+-- Logs synced before this migration were parsed without their tags and
+-- links; forget their hashes so the next markdown sync reads them again
+DELETE FROM markdown_sync;
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Chart Downsampling
+
+Reduces long metric series to a bounded number of chart points with
+Largest-Triangle-Three-Buckets (LTTB), which keeps the peaks and dips a line
+chart needs while dropping points the eye cannot distinguish. Daily metrics
+come from the cached per-day columns in pkm.analytics; intraday check-ins
+are read raw from sub_daily_moods, which holds several samples per day.
+
+Points are returned as epoch milliseconds (x) and values (y), so charts can
+plot daily and intraday series on one linear time axis.
+
+Usage:
+    x, y, total = pkm.chart_series('intraday_mood', start='2020-01-01', points=500)
+    GET /api/chart?metrics=mood,intraday_mood&points=500
+"""
+
+import numpy as np
+
+from .resample import METRICS as DAILY_METRICS
+
+DEFAULT_POINTS = 500
+MAX_POINTS = 5000
+
+# Intraday metric -> sub_daily_moods column
+INTRADAY_COLUMNS = {
+    'intraday_mood': 'mood',
+    'intraday_energy': 'energy',
+}
+
+INTRADAY_SQL = {
+    metric: f'''
+        SELECT logged_at, {column} FROM sub_daily_moods
+        WHERE logged_at >= ? AND logged_at < ? AND {column} IS NOT NULL
+        ORDER BY logged_at
+    '''
+    for metric, column in INTRADAY_COLUMNS.items()
+}
+
+DAY_MS = 86400000
+
+
+def lttb(x, y, threshold):
+    """
+    Pick the indices of the points LTTB keeps.
+
+    The first and last points are always kept; the rest are split into
+    threshold - 2 equal buckets, and each bucket keeps the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average.
+
+    Args:
+        x (np.ndarray): Increasing x values
+        y (np.ndarray): Values (no NaNs)
+        threshold (int): Number of points to keep
+
+    Returns:
+        np.ndarray: Sorted indices into x/y
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket j covers [bounds[j], bounds[j + 1]); the last bucket is the final point
+    bounds = np.append(1 + np.arange(threshold - 1) * (n - 2) // (threshold - 2), n)
+    sum_x = np.concatenate(([0.0], np.cumsum(x, dtype=float)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y, dtype=float)))
+    sizes = bounds[1:] - bounds[:-1]
+    avg_x = (sum_x[bounds[1:]] - sum_x[bounds[:-1]]) / sizes
+    avg_y = (sum_y[bounds[1:]] - sum_y[bounds[:-1]]) / sizes
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        ax, ay = x[a], y[a]
+        cx, cy = avg_x[i + 1], avg_y[i + 1]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def intraday_points(conn, metric, start=None, end=None):
+    """
+    Read raw check-ins for an intraday metric.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        metric (str): intraday_mood or intraday_energy
+        start (str, optional): First date (YYYY-MM-DD)
+        end (str, optional): Last date (YYYY-MM-DD)
+
+    Returns:
+        tuple: (epoch milliseconds, values) arrays
+    """
+    upper = str(np.datetime64(end, 'D') + 1) if end else '9999-12-31'
+    rows = conn.execute(INTRADAY_SQL[metric], (start or '0000-01-01', upper)).fetchall()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    stamps = np.array([row[0].replace(' ', 'T') for row in rows], dtype='datetime64[ms]')
+    return stamps.astype(np.int64), np.array([row[1] for row in rows], dtype=float)
+
+
+def daily_points(columns, first_day, metric):
+    """
+    Days with data for a daily metric, from pkm.analytics columns.
+
+    Returns:
+        tuple: (epoch milliseconds at midnight UTC, values) arrays
+    """
+    column, entries, _ = DAILY_METRICS[metric]
+    values = columns[column]
+    keep = np.flatnonzero((columns[entries] > 0) & ~np.isnan(values))
+    return (keep + first_day) * DAY_MS, values[keep]
+
+
+def check_request(metrics, points):
+    """
+    Validate a chart request.
+
+    Raises:
+        ValueError: For an unknown metric or a point count out of range
+    """
+    known = dict.fromkeys(list(DAILY_METRICS) + list(INTRADAY_COLUMNS))
+    for name in metrics:
+        if name not in known:
+            raise ValueError(f"Unknown metric {name!r}; expected one of {', '.join(known)}")
+    if not 3 <= points <= MAX_POINTS:
+        raise ValueError(f"points must be between 3 and {MAX_POINTS}, got {points}")
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Short-Horizon Forecasting
+
+Forecasts daily mood, energy and sleep with additive Holt-Winters
+exponential smoothing (damped trend, weekly seasonality) and weekly alcohol
+units with damped Holt smoothing. Smoothing parameters are picked by a small
+grid search that runs every candidate side by side as numpy arrays.
+
+The fitted state lives in forecast_state (migration 0009). Each update only
+applies the periods completed since the last one, so forecasts cost a state
+lookup, not a refit. Triggers mark a series stale when a write lands on a
+period it has already applied; stale series are refitted from scratch.
+Today's daily metrics and the current week's drinks are still changing, so
+they are never stored: today's values are applied on the fly when
+forecasting and the current week is forecast like any future week.
+
+Usage:
+    forecaster = Forecaster(pkm)
+    labels, values, rmse = forecaster.forecast('mood', horizon=14)
+    GET /api/forecast?series=mood,alcohol&horizon=8
+"""
+
+import itertools
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from .analytics import LOAD_SQL, load_columns
+from .repository import today
+from .resample import bucket_ids, bucket_labels
+from .streaks import epoch_day
+
+# Series name -> (pkm.analytics column, period, (lowest, highest) forecast)
+SERIES = {
+    'mood': ('mood_rating', 'day', (1, 10)),
+    'energy': ('energy_level', 'day', (1, 10)),
+    'sleep': ('sleep_hours', 'day', (0, 24)),
+    'alcohol': ('alcohol_units', 'week', (0, None)),
+}
+
+SEASON_LENGTH = {'day': 7, 'week': 1}  # Weekly seasonality for daily series only
+FIT_PERIODS = {'day': 730, 'week': 156}  # Most recent periods used by a full fit
+DEFAULT_HORIZON = {'day': 14, 'week': 8}
+MAX_HORIZON = {'day': 90, 'week': 26}
+DAMPING = 0.98  # Trend damping; keeps long horizons from running away
+
+# Candidate smoothing parameters for the grid search
+ALPHAS = (0.05, 0.1, 0.2, 0.3, 0.5)
+BETAS = (0.0, 0.01, 0.05)
+GAMMAS = (0.0, 0.05, 0.1, 0.2)
+
+CONFIG = f"hw1:{DAMPING:g}:{len(ALPHAS)}x{len(BETAS)}x{len(GAMMAS)}"
+
+STATE_SQL = '''
+    SELECT series, config, last_day, alpha, beta, gamma, level, trend, season, sse, errors, stale
+    FROM forecast_state
+'''
+
+FIRST_DAY_SQL = 'SELECT MIN(date) FROM daily_rollup'
+
+VERSION_SQL = '''
+    SELECT table_name, changes FROM table_stats
+    WHERE table_name IN ('daily_metrics', 'alcohol_logs') AND column_name = '*'
+'''
+
+
+class ModelState(namedtuple('ModelState', 'alpha beta gamma level trend season sse errors')):
+    """Smoothing parameters and the state after the last applied period."""
+    __slots__ = ()
+
+    @property
+    def rmse(self):
+        return float(np.sqrt(self.sse / self.errors)) if self.errors else None
+
+
+def smooth(values, first_period, alpha, beta, gamma, level, trend, season):
+    """
+    Run additive Holt-Winters over values, for one or many parameter sets.
+
+    Parameters and state are arrays with one entry per candidate (season is
+    candidates x season length), so a grid search runs in one pass. Missing
+    values (NaN) advance the level by the trend and leave the seasons alone.
+
+    Args:
+        values (np.ndarray): One observation per period
+        first_period (int): Period number of values[0]; picks the season slot
+        alpha, beta, gamma (np.ndarray): Level, trend and season smoothing
+        level, trend (np.ndarray): State before values[0]
+        season (np.ndarray): Seasonal offsets indexed by period % season length
+
+    Returns:
+        tuple: (level, trend, season, sum of squared one-step errors, error count)
+    """
+    level, trend, season = level.copy(), trend.copy(), season.copy()
+    sse = np.zeros_like(level)
+    errors = 0
+    length = season.shape[1]
+    for offset, y in enumerate(values):
+        slot = (first_period + offset) % length
+        damped = DAMPING * trend
+        if np.isnan(y):
+            level = level + damped
+            trend = damped
+            continue
+        offsets = season[:, slot]
+        error = y - (level + damped + offsets)
+        sse += error * error
+        errors += 1
+        new_level = alpha * (y - offsets) + (1 - alpha) * (level + damped)
+        trend = beta * (new_level - level) + (1 - beta) * damped
+        season[:, slot] = gamma * (y - new_level) + (1 - gamma) * offsets
+        level = new_level
+    return level, trend, season, sse, errors
+
+
+def fit(values, first_period, season_length):
+    """
+    Pick smoothing parameters by grid search and return the fitted state.
+
+    Args:
+        values (np.ndarray): One observation per period (NaN = missing)
+        first_period (int): Period number of values[0]
+        season_length (int): Periods per season (1 = no seasonality)
+
+    Returns:
+        ModelState: The state after the last value, or None without data
+    """
+    observed = np.flatnonzero(~np.isnan(values))
+    if not len(observed):
+        return None
+
+    # Start from the mean of the first few seasons and each slot's offset from it
+    head = observed[:4 * season_length]
+    start_level = values[head].mean()
+    start_season = np.zeros(season_length)
+    slots = (first_period + head) % season_length
+    for slot in np.unique(slots):
+        start_season[slot] = values[head[slots == slot]].mean() - start_level
+    start_season -= start_season.mean()
+
+    gammas = GAMMAS if season_length > 1 else (0.0,)
+    alpha, beta, gamma = (np.array(column) for column in zip(*itertools.product(ALPHAS, BETAS, gammas)))
+    candidates = len(alpha)
+    level, trend, season, sse, errors = smooth(
+        values, first_period, alpha, beta, gamma,
+        np.full(candidates, start_level), np.zeros(candidates), np.tile(start_season, (candidates, 1)))
+
+    best = int(np.argmin(sse))
+    return ModelState(float(alpha[best]), float(beta[best]), float(gamma[best]), float(level[best]),
+                      float(trend[best]), season[best].copy(), float(sse[best]), errors)
+
+
+def advance(state, values, first_period):
+    """Apply further periods to a fitted state with its own parameters."""
+    level, trend, season, sse, errors = smooth(
+        values, first_period, np.array([state.alpha]), np.array([state.beta]), np.array([state.gamma]),
+        np.array([state.level]), np.array([state.trend]), state.season[None, :])
+    return state._replace(level=float(level[0]), trend=float(trend[0]), season=season[0],
+                          sse=state.sse + float(sse[0]), errors=state.errors + errors)
+
+
+def project(state, last_period, horizon, bounds=(None, None)):
+    """
+    Forecast the `horizon` periods after last_period.
+
+    Returns:
+        np.ndarray: Forecasts, clipped to bounds
+    """
+    steps = np.arange(1, horizon + 1)
+    damped = DAMPING * (1 - DAMPING ** steps) / (1 - DAMPING)
+    offsets = state.season[(last_period + steps) % len(state.season)]
+    values = state.level + damped * state.trend + offsets
+    low, high = bounds
+    return np.clip(values, low if low is not None else -np.inf, high if high is not None else np.inf)
+
+
+def period_start(period, kind):
+    """First epoch day of a period (weeks start on Monday, as in pkm.resample)."""
+    return period if kind == 'day' else period * 7 - 3
+
+
+def load_periods(conn, column, kind, first, last):
+    """
+    Read one column as a value per period for periods first..last.
+
+    Returns:
+        np.ndarray: Daily values, or weekly sums for week periods
+    """
+    start, end = period_start(first, kind), period_start(last + 1, kind) - 1
+    if end < start:
+        return np.empty(0)
+    rows = conn.execute(LOAD_SQL, (str(np.datetime64(start, 'D')), str(np.datetime64(end, 'D')))).fetchall()
+    values = load_columns(rows, start, end)[column]
+    if kind == 'week':
+        values = values.reshape(-1, 7).sum(axis=1)
+    return values
+
+
+def check_request(series, horizon):
+    """
+    Validate a forecast request.
+
+    Raises:
+        ValueError: For an unknown series or a horizon out of range
+    """
+    if series not in SERIES:
+        raise ValueError(f"Unknown series {series!r}; expected one of {', '.join(SERIES)}")
+    kind = SERIES[series][1]
+    if horizon is not None and not 1 <= horizon <= MAX_HORIZON[kind]:
+        raise ValueError(f"horizon for {series} must be between 1 and {MAX_HORIZON[kind]} {kind}s, got {horizon}")
+
+
+class Forecaster:
+    """
+    Holt-Winters forecasts backed by persisted model state.
+
+    Attributes:
+        pkm (PKMManager): Manager whose pool and writer are used
+    """
+
+    def __init__(self, pkm):
+        self.pkm = pkm
+        self._lock = threading.Lock()
+        self._checked = None  # (change counters, today) of the last update
+        self._states = {}     # series -> (last period, ModelState) as of _checked
+        self._results = {}    # (series, horizon) -> forecast, as of _checked
+
+    def _plan(self, conn, day):
+        """Fit or advance each series; returns (series, expected row, new row) writes."""
+        rows = {row[0]: row for row in conn.execute(STATE_SQL)}
+        first_logged = conn.execute(FIRST_DAY_SQL).fetchone()[0]
+        if first_logged is None:
+            return []
+
+        plans = []
+        for series, (column, kind, _) in SERIES.items():
+            # Only completed periods are stored: up to yesterday, or last week
+            last = int(bucket_ids([epoch_day(day)], kind)[0]) - 1
+            row = rows.get(series)
+            expected = row[1:3] + row[11:] if row else None
+            if row is None or row[11] or row[1] != CONFIG:
+                first = max(int(bucket_ids([epoch_day(first_logged)], kind)[0]), last - FIT_PERIODS[kind] + 1)
+                state = fit(load_periods(conn, column, kind, first, last), first, SEASON_LENGTH[kind])
+            else:
+                applied = int(bucket_ids([epoch_day(row[2])], kind)[0])
+                if applied >= last:
+                    continue
+                state = advance(_row_state(row), load_periods(conn, column, kind, applied + 1, last), applied + 1)
+            if state is not None:
+                last_day = str(np.datetime64(period_start(last + 1, kind) - 1, 'D'))
+                plans.append((series, expected, (series, CONFIG, last_day, state.alpha, state.beta, state.gamma,
+                                                 state.level, state.trend, state.season.tobytes(),
+                                                 state.sse, state.errors)))
+        return plans
+
+    def update(self):
+        """Apply every period completed since the last update (a no-op if nothing changed)."""
+        conn = self.pkm.get_db_connection()
+        try:
+            day = today()
+            checked = (tuple(sorted(conn.execute(VERSION_SQL).fetchall())), day)
+            with self._lock:
+                if checked == self._checked:
+                    return
+            plans = self._plan(conn, day)
+        finally:
+            conn.close()
+
+        def write(cursor):
+            for series, expected, row in plans:
+                # Skip a series another writer changed since it was read
+                current = cursor.execute(
+                    'SELECT config, last_day, stale FROM forecast_state WHERE series = ?', (series,)).fetchone()
+                if current != expected:
+                    continue
+                cursor.execute('''
+                    INSERT INTO forecast_state
+                    (series, config, last_day, alpha, beta, gamma, level, trend, season, sse, errors, stale)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+                    ON CONFLICT (series) DO UPDATE SET
+                        config = excluded.config, last_day = excluded.last_day,
+                        alpha = excluded.alpha, beta = excluded.beta, gamma = excluded.gamma,
+                        level = excluded.level, trend = excluded.trend, season = excluded.season,
+                        sse = excluded.sse, errors = excluded.errors, stale = 0
+                ''', row)
+
+        if plans:
+            self.pkm.run_write(write)
+
+        conn = self.pkm.get_db_connection()
+        try:
+            states = {}
+            for row in conn.execute(STATE_SQL):
+                if row[0] in SERIES:
+                    kind = SERIES[row[0]][1]
+                    states[row[0]] = (int(bucket_ids([epoch_day(row[2])], kind)[0]), _row_state(row))
+        finally:
+            conn.close()
+        with self._lock:
+            self._checked = checked
+            self._states = states
+            self._results = {}
+
+    def forecast(self, series, horizon=None):
+        """
+        Forecast a series from its stored state.
+
+        Args:
+            series (str): mood, energy, sleep (daily) or alcohol (weekly units)
+            horizon (int, optional): Periods to forecast. Defaults to 14 days or 8 weeks.
+
+        Returns:
+            tuple: (period start dates, forecasts, one-step RMSE of the fit);
+                empty lists and None before the series has any data
+
+        Raises:
+            ValueError: For an unknown series or a horizon out of range
+        """
+        check_request(series, horizon)
+        column, kind, bounds = SERIES[series]
+        horizon = horizon or DEFAULT_HORIZON[kind]
+
+        self.update()
+        with self._lock:
+            key = (series, horizon)
+            if key in self._results:
+                return self._results[key]
+            checked, stored = self._checked, self._states.get(series)
+        if stored is None:
+            return [], [], None
+
+        last, state = stored
+        if kind == 'day':
+            # Apply today's values (or their absence) without storing them
+            current = epoch_day(checked[1])
+            conn = self.pkm.get_db_connection()
+            try:
+                state = advance(state, load_periods(conn, column, kind, last + 1, current), last + 1)
+            finally:
+                conn.close()
+            last = current
+        values = project(state, last, horizon, bounds)
+        labels = bucket_labels(np.arange(last + 1, last + 1 + horizon), kind)
+        result = (labels, [round(float(value), 2) for value in values], state.rmse)
+
+        with self._lock:
+            if checked == self._checked:
+                self._results[key] = result
+        return result
+
+    def invalidate(self):
+        """Re-check the database on the next update."""
+        with self._lock:
+            self._checked = None
+            self._results = {}
+
+
+def _row_state(row):
+    # STATE_SQL row -> ModelState
+    return ModelState(row[3], row[4], row[5], row[6], row[7], np.frombuffer(row[8], dtype=np.float64).copy(),
+                      row[9], row[10])
+
+
+def reset(conn):
+    """
+    Drop all forecast state; every series is refitted on the next update.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+    """
+    conn.executescript('BEGIN;\nDELETE FROM forecast_state;\nCOMMIT;')
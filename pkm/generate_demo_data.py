@@ -5,6 +5,8 @@ import sqlite3
 import os
 import sys
 
+from . import migrations
+
 class DemoDataGenerator:
     def __init__(self, months=3):
         # Convert months to float to handle partial months (days)
@@ -448,31 +450,18 @@ class DemoDataGenerator:
 
     def initialize_database(self, conn):
         print("Initializing database schema...")
-        cursor = conn.cursor()
-        
-        # Read and execute the init.sql file
-        with open('db/init.sql', 'r') as sql_file:
-            sql_script = sql_file.read()
-            print("Executing init.sql...")
-            cursor.executescript(sql_script)
-            print("init.sql executed successfully")
-        
-        # Read and execute the update_schema.sql file
-        with open('pkm/web/update_schema.sql', 'r') as sql_file:
-            sql_script = sql_file.read()
-            print("Executing update_schema.sql...")
-            cursor.executescript(sql_script)
-            print("update_schema.sql executed successfully")
+        applied = migrations.migrate(conn)
+        print(f"Applied migrations: {', '.join(applied)}")
         
         # Verify tables were created
+        cursor = conn.cursor()
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
         tables = cursor.fetchall()
         print("Created tables:", [table[0] for table in tables])
         
         conn.commit()
 
-    def import_to_database(self, data):
-        db_path = 'pkm/db/pkm.db'
+    def import_to_database(self, data, db_path='pkm/db/pkm.db'):
         print(f"Using database at: {os.path.abspath(db_path)}")
         
         # Remove existing database if it exists
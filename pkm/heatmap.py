@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Year Heatmaps
+
+Builds GitHub-style calendar heatmaps (one value per day for a whole year)
+for mood, work hours, alcohol units and habit completions. A year is one
+primary-key range read of the trigger-maintained daily_rollup table
+(migration 0003); a single habit's year comes from its calendar bitmap
+(pkm.calendar_index).
+
+Payloads are cached per year and tagged with an ETag derived from the
+table_stats change counters, so an unchanged year is served from memory and
+clients revalidating with If-None-Match get a 304 without a body.
+
+Usage:
+    heatmaps = HeatmapCache(pkm)
+    etag, payload = heatmaps.get(2025)
+    payload['metrics']['mood']  # 365 values, None where nothing was logged
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .stats import VERSION_SQL
+from .streaks import epoch_day
+
+# Metric name -> daily_rollup column
+METRICS = {
+    'mood': 'mood_rating',
+    'work': 'work_hours',
+    'alcohol': 'alcohol_units',
+    'habits': 'habit_completions',
+}
+
+# Column that says whether the day has data for the metric at all
+PRESENCE_COLUMNS = {
+    'mood': 'metrics_logged',
+    'work': 'work_entries',
+    'alcohol': 'alcohol_entries',
+    'habits': 'habit_completions',
+}
+
+YEAR_SQL = f'''
+    SELECT date, {', '.join(METRICS.values())}, {', '.join(dict.fromkeys(PRESENCE_COLUMNS.values()))}
+    FROM daily_rollup
+    WHERE date >= ? AND date < ?
+'''
+
+MAX_CACHED = 16  # Payloads kept in memory (years x habit filters)
+
+# Shades for the text view, from no data to the year's maximum
+SHADES = ' ░▒▓█'
+WEEKDAYS = ['Mon', '', 'Wed', '', 'Fri', '', 'Sun']
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def year_bounds(year):
+    """First and last epoch day of a year."""
+    return epoch_day(f'{year:04d}-01-01'), epoch_day(f'{year + 1:04d}-01-01') - 1
+
+
+def build_metrics(rows, year):
+    """
+    Spread daily_rollup rows over per-day arrays for a year.
+
+    Args:
+        rows (list): Rows from YEAR_SQL
+        year (int): Calendar year
+
+    Returns:
+        dict: Metric name -> list with one value per day (None for no data)
+    """
+    first, last = year_bounds(year)
+    presence_names = list(dict.fromkeys(PRESENCE_COLUMNS.values()))
+    values = {name: np.full(last - first + 1, np.nan) for name in METRICS}
+    for row in rows:
+        index = epoch_day(row[0]) - first
+        present = dict(zip(presence_names, row[1 + len(METRICS):]))
+        for position, name in enumerate(METRICS):
+            if present[PRESENCE_COLUMNS[name]]:
+                values[name][index] = row[1 + position]
+
+    return {name: [None if np.isnan(v) else round(float(v), 2) for v in array]
+            for name, array in values.items()}
+
+
+def grid_lines(values, year, label):
+    """
+    Render one metric's year as a 7-row weekday x week text grid.
+
+    Args:
+        values (list): One value per day (None for no data)
+        year (int): Calendar year
+        label (str): Heading for the grid
+
+    Yields:
+        str: Lines ending in a newline
+    """
+    first, _ = year_bounds(year)
+    offset = (first + 3) % 7  # Weekday of Jan 1, Monday = 0
+    weeks = (offset + len(values) + 6) // 7
+    peak = max((v for v in values if v is not None), default=0)
+
+    cells = [[' '] * weeks for _ in range(7)]
+    for day, value in enumerate(values):
+        if value is None or peak <= 0:
+            continue
+        level = min(len(SHADES) - 1, 1 + int(value / peak * (len(SHADES) - 2)))
+        cells[(offset + day) % 7][(offset + day) // 7] = SHADES[level] if value > 0 else '·'
+
+    # Month labels above the week where each month starts
+    header = [' '] * weeks
+    for month in range(12):
+        column = (offset + epoch_day(f'{year:04d}-{month + 1:02d}-01') - first) // 7
+        header[column:column + 3] = MONTHS[month]
+
+    yield f"{label} ({year}, max {peak:g})\n"
+    yield "    " + "".join(header[:weeks]) + "\n"
+    for weekday in range(7):
+        yield f"{WEEKDAYS[weekday]:<4}" + "".join(cells[weekday]) + "\n"
+
+
+class HeatmapCache:
+    """
+    Year heatmap payloads cached against the table_stats change counters.
+
+    Attributes:
+        pkm (PKMManager): Manager whose pool and calendar index are used
+        hits (int): Payloads served from memory
+        misses (int): Payloads rebuilt from daily_rollup
+    """
+
+    def __init__(self, pkm):
+        self.pkm = pkm
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # (year, habit_id) -> (etag, payload)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, year, habit_id=None):
+        """
+        Get a year's heatmap payload and its ETag.
+
+        Args:
+            year (int): Calendar year
+            habit_id (int, optional): Also include this habit's completion bits
+
+        Returns:
+            tuple: (etag, payload) where payload has year, start, days and
+                metrics (name -> per-day list)
+        """
+        conn = self.pkm.get_db_connection()
+        try:
+            version = tuple(sorted(conn.execute(VERSION_SQL).fetchall()))
+            etag = hashlib.sha1(repr((year, habit_id, version)).encode()).hexdigest()[:20]
+            key = (year, habit_id)
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is not None and cached[0] == etag:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return cached
+
+            rows = conn.execute(YEAR_SQL, (f'{year:04d}-01-01', f'{year + 1:04d}-01-01')).fetchall()
+        finally:
+            conn.close()
+
+        metrics = build_metrics(rows, year)
+        if habit_id is not None:
+            start, end = f'{year:04d}-01-01', f'{year:04d}-12-31'
+            _, bits = self.pkm.calendar.bitmap('habit', habit_id, start, end)
+            metrics['habit'] = bits.astype(int).tolist()
+
+        payload = {
+            'year': year,
+            'start': f'{year:04d}-01-01',
+            'days': len(metrics['mood']),
+            'metrics': metrics,
+        }
+        with self._lock:
+            self._cache[key] = (etag, payload)
+            self._cache.move_to_end(key)
+            while len(self._cache) > MAX_CACHED:
+                self._cache.popitem(last=False)
+            self.misses += 1
+        return etag, payload
+
+    def invalidate(self):
+        """Forget every cached payload."""
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+PKM Management Commands
+
+Command-line entry point for database maintenance tasks that pkm.sh and
+install.sh run outside the interactive interfaces.
+
+Usage:
+    python3 -m pkm.manage status [--db PATH]   # Show applied/pending migrations
+    python3 -m pkm.manage migrate [--db PATH]  # Apply pending migrations
+    python3 -m pkm.manage rebuild-rollup [--db PATH]  # Recompute daily/project rollups
+    python3 -m pkm.manage rebuild-stats [--db PATH]   # Recompute summary statistics
+    python3 -m pkm.manage rebuild-calendar [--db PATH] # Recompute calendar bitmaps
+    python3 -m pkm.manage rescan-anomalies [--db PATH] # Rescore all days for anomalies
+    python3 -m pkm.manage refit-forecasts [--db PATH]  # Refit forecast models
+    python3 -m pkm.manage rebuild-search [--db PATH]   # Re-index notes and daily logs for search
+    python3 -m pkm.manage rebuild-catalog [--db PATH]  # Re-read every daily log into the catalog
+    python3 -m pkm.manage sync-markdown [--db PATH] [--full] [--workers N]  # Sync daily log sections into the database
+"""
+
+import argparse
+import os
+import sqlite3
+
+from . import anomalies, calendar_index, daily_catalog, forecast, markdown_sync, migrations, rollup, search, stats
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'pkm.db')
+DEFAULT_DAILY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'daily')
+
+
+def cmd_status(conn, args):
+    version = migrations.current_version(conn)
+    for number, name, _ in migrations.discover_migrations():
+        state = 'applied' if number <= version else 'pending'
+        print(f"{number:04d}_{name}: {state}")
+
+
+def cmd_migrate(conn, args):
+    applied = migrations.migrate(conn)
+    migrations.validate(conn)
+    if applied:
+        print(f"Applied {len(applied)} migration(s); schema is at version {migrations.current_version(conn)}")
+    else:
+        print(f"Schema is up to date (version {migrations.current_version(conn)})")
+
+
+def cmd_rebuild_rollup(conn, args):
+    migrations.migrate(conn)
+    days = rollup.rebuild(conn)
+    print(f"Rebuilt daily rollup: {days} day(s)")
+
+
+def cmd_rebuild_stats(conn, args):
+    migrations.migrate(conn)
+    stats.rebuild(conn)
+    summary = stats.build_summary(conn.execute(stats.STATS_SQL).fetchall())
+    print(f"Rebuilt statistics: {summary['work_entries']} work, {summary['alcohol_entries']} alcohol, "
+          f"{summary['habits_completed']} habit and {summary['metrics_entries']} metrics entries")
+
+
+def cmd_rebuild_calendar(conn, args):
+    migrations.migrate(conn)
+    rows = calendar_index.rebuild(conn, DEFAULT_DAILY_DIR)
+    print(f"Rebuilt calendar index: {rows} bitmap(s)")
+
+
+def cmd_rescan_anomalies(conn, args):
+    migrations.migrate(conn)
+    anomalies.reset(conn)
+    print("Cleared anomaly state; all days are rescored on next use")
+
+
+def cmd_refit_forecasts(conn, args):
+    migrations.migrate(conn)
+    forecast.reset(conn)
+    print("Cleared forecast state; every series is refitted on next use")
+
+
+def cmd_rebuild_search(conn, args):
+    migrations.migrate(conn)
+    documents = search.rebuild(conn, DEFAULT_DAILY_DIR)
+    print(f"Rebuilt search index: {documents} document(s)")
+
+
+def cmd_rebuild_catalog(conn, args):
+    migrations.migrate(conn)
+    logs = daily_catalog.rebuild(conn, DEFAULT_DAILY_DIR)
+    print(f"Rebuilt daily log catalog: {logs} log(s)")
+
+
+def cmd_sync_markdown(conn, args):
+    migrations.migrate(conn)
+    result = markdown_sync.sync(conn, DEFAULT_DAILY_DIR, args.full, args.workers)
+    print(f"Synced {result['synced']} daily log(s), removed {result['removed']}")
+    for date, messages in sorted(result['errors'].items()):
+        for message in messages:
+            print(f"  {date}: {message}")
+
+
+COMMANDS = {
+    'status': cmd_status,
+    'migrate': cmd_migrate,
+    'rebuild-rollup': cmd_rebuild_rollup,
+    'rebuild-stats': cmd_rebuild_stats,
+    'rebuild-calendar': cmd_rebuild_calendar,
+    'rescan-anomalies': cmd_rescan_anomalies,
+    'refit-forecasts': cmd_refit_forecasts,
+    'rebuild-search': cmd_rebuild_search,
+    'rebuild-catalog': cmd_rebuild_catalog,
+    'sync-markdown': cmd_sync_markdown,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PKM management commands')
+    parser.add_argument('command', choices=list(COMMANDS))
+    parser.add_argument('--db', default=DEFAULT_DB, help='Path to SQLite database')
+    parser.add_argument('--full', action='store_true', help='sync-markdown: re-sync unchanged logs too')
+    parser.add_argument('--workers', type=int, help='sync-markdown: parser processes (default: one per CPU)')
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    conn = sqlite3.connect(args.db)
+    try:
+        COMMANDS[args.command](conn, args)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
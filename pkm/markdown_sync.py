@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Markdown to Database Sync
+
+Reads the structured sections of the daily/ markdown logs (see
+templates/daily_template.md) into the database:
+
+    ## Metrics              -> daily_metrics (mood, energy, sleep) and one
+                               work_logs row (Work Hours, or Start/End Time)
+    ## Habits               -> habit_logs for every checked "- [x] Name"
+    ## Alcohol Consumption  -> alcohol_logs, one row per Drink Type
+    ## Tasks                -> the task index (see pkm.task_index)
+    #tags and [[links]]     -> the tag index and link graph (see
+                               pkm.note_graph), from anywhere in the log
+
+Only logs whose SHA-1 differs from the one recorded in markdown_sync
+(migration 0013) are re-parsed. The habit, alcohol and work rows a log
+produced are listed in markdown_rows and replaced as a whole when the log
+changes or is deleted; daily_metrics is upserted, and values missing from
+the markdown keep whatever was logged another way. Values that cannot be
+read are skipped and recorded as errors instead of failing the sync.
+
+Parsing is CPU-bound, so syncing many logs (a full-history resync) spreads
+it over a process pool; the writes stay in the calling process.
+
+Usage:
+    python3 -m pkm.manage sync-markdown [--full] [--workers N]
+
+    sync = MarkdownSync(pkm)
+    result = sync.sync()   # {'synced': 3, 'removed': 0, 'errors': {...}}
+    sync.sync_file('2024-11-04')
+    sync.catch_up()        # Before reading derived tables; cheap when nothing changed
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from . import daily_catalog, note_graph, task_index
+
+POOL_THRESHOLD = 256  # Fewer logs than this are parsed in-process
+POOL_CHUNK_SIZE = 64
+WRITE_CHUNK = 500     # Logs written per transaction
+
+STATE_SQL = 'SELECT date, sha1 FROM markdown_sync'
+SHA_SQL = 'SELECT sha1 FROM markdown_sync WHERE date = ?'
+
+# Delete the rows a log produced (see migration 0013)
+DELETE_SQL = {
+    'habit_logs': ("DELETE FROM habit_logs WHERE id IN "
+                   "(SELECT row_id FROM markdown_rows WHERE date = ? AND source = 'habit_logs')"),
+    'alcohol_logs': ("DELETE FROM alcohol_logs WHERE id IN "
+                     "(SELECT row_id FROM markdown_rows WHERE date = ? AND source = 'alcohol_logs')"),
+    'work_logs': ("DELETE FROM work_logs WHERE id IN "
+                  "(SELECT row_id FROM markdown_rows WHERE date = ? AND source = 'work_logs')"),
+}
+
+TASK_STATES = {'completed': 'completed', 'in progress': 'in_progress', 'planned': 'planned'}
+
+COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.S)
+HEADING_PATTERN = re.compile(r'^(#{2,3})\s+(.*?)\s*#*\s*$')
+CHECKBOX_PATTERN = re.compile(r'^\s*[-*+]\s+\[([ xX])\]\s*(.*?)\s*$')
+FIELD_PATTERN = re.compile(r'^\s*[-*+]\s+(?:\*\*)?([^:*]+?)(?:\*\*)?\s*:(?:\*\*)?\s*(.*?)\s*$')
+ITEM_PATTERN = re.compile(r'^\s*[-*+]\s+(.*?)\s*$')
+
+
+class ParsedLog(namedtuple('ParsedLog', 'metrics work habits alcohol tasks tags links errors')):
+    """
+    Values read from one daily log.
+
+    metrics is (mood, energy, sleep_hours) with None for blanks; work is a
+    list of (start_time, end_time, project, description, total_hours);
+    habits a list of checked habit names; alcohol a list of (drink_type,
+    units, notes); tasks a list of (state, text); tags and links sorted
+    lists from pkm.note_graph.extract(); errors a list of messages.
+    """
+    __slots__ = ()
+
+
+def _label(text):
+    # "Mood Rating (1-10)" -> "mood rating"
+    return re.sub(r'\(.*?\)', '', text).strip().lower()
+
+
+def _number(fields, label, errors, minimum, maximum, integer=False):
+    value = fields.get(label)
+    if not value:
+        return None
+    try:
+        number = int(value) if integer else float(value)
+    except ValueError:
+        number = None
+    if number is None or not minimum <= number <= maximum:
+        kind = 'a whole number' if integer else 'a number'
+        errors.append(f"{label.title()}: expected {kind} from {minimum} to {maximum}, got {value!r}")
+        return None
+    return number
+
+
+def _time(fields, label, errors):
+    value = fields.get(label)
+    if not value:
+        return None
+    for fmt in ('%H:%M', '%H:%M:%S'):
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            pass
+    errors.append(f"{label.title()}: expected HH:MM, got {value!r}")
+    return None
+
+
+def _work(date, fields, errors):
+    start = _time(fields, 'start time', errors)
+    end = _time(fields, 'end time', errors)
+    hours = _number(fields, 'work hours', errors, 0, 24)
+    project = fields.get('project') or None
+    description = fields.get('description') or None
+
+    day = datetime.strptime(date, '%Y-%m-%d')
+    if start is not None and end is not None:
+        started = datetime.combine(day, start)
+        ended = datetime.combine(day, end)
+        if ended <= started:
+            ended += timedelta(days=1)  # Worked past midnight
+        return [(started.strftime('%Y-%m-%d %H:%M:%S'), ended.strftime('%Y-%m-%d %H:%M:%S'),
+                 project, description, (ended - started).total_seconds() / 3600)]
+    if hours:
+        midnight = day.strftime('%Y-%m-%d %H:%M:%S')
+        return [(midnight, midnight, project, description, hours)]
+    if start or end or project or description:
+        errors.append("Work Hours: give the hours, or both Start Time and End Time")
+    return []
+
+
+def _alcohol(fields, errors):
+    # A new drink starts at each Drink Type; Units and Notes belong to the last one
+    drinks = []
+    for label, value in fields:
+        if label == 'drink type' or not drinks:
+            drinks.append({})
+        if label in ('drink type', 'units', 'notes'):
+            drinks[-1][label] = value
+
+    rows = []
+    for drink in drinks:
+        if not drink.get('drink type') and not drink.get('units'):
+            continue  # Blank template block
+        units = _number(drink, 'units', errors, 0, 100)
+        if not drink.get('drink type'):
+            errors.append("Alcohol: Units given without a Drink Type")
+        elif not units:
+            errors.append(f"Alcohol: {drink['drink type']!r} needs Units greater than 0")
+        else:
+            rows.append((drink['drink type'], units, drink.get('notes') or None))
+    return rows
+
+
+def parse(text, date):
+    """
+    Read the structured sections of a daily log.
+
+    Args:
+        text (str): Markdown content
+        date (str): Date of the log (YYYY-MM-DD)
+
+    Returns:
+        ParsedLog: Values found, with messages for those that could not be read
+    """
+    section = subsection = None
+    metric_fields = {}
+    alcohol_fields = []
+    habits, tasks, errors = [], [], []
+
+    for line in COMMENT_PATTERN.sub('', text).splitlines():
+        heading = HEADING_PATTERN.match(line)
+        if heading:
+            if len(heading.group(1)) == 2:
+                section, subsection = heading.group(2).lower(), None
+            else:
+                subsection = heading.group(2).lower()
+            continue
+
+        if section == 'metrics':
+            field = FIELD_PATTERN.match(line)
+            if field:
+                metric_fields[_label(field.group(1))] = field.group(2)
+        elif section == 'alcohol consumption':
+            field = FIELD_PATTERN.match(line)
+            if field:
+                alcohol_fields.append((_label(field.group(1)), field.group(2)))
+        elif section == 'habits':
+            box = CHECKBOX_PATTERN.match(line)
+            if box and box.group(1) != ' ' and box.group(2) and box.group(2) not in habits:
+                habits.append(box.group(2))
+        elif section == 'tasks' and subsection in TASK_STATES:
+            box = CHECKBOX_PATTERN.match(line)
+            item = ITEM_PATTERN.match(line)
+            if box and box.group(2):
+                tasks.append(('completed' if box.group(1) != ' ' else TASK_STATES[subsection], box.group(2)))
+            elif not box and item and item.group(1):
+                tasks.append((TASK_STATES[subsection], item.group(1)))
+
+    metrics = (_number(metric_fields, 'mood rating', errors, 1, 10, integer=True),
+               _number(metric_fields, 'energy level', errors, 1, 10, integer=True),
+               _number(metric_fields, 'sleep hours', errors, 0, 24))
+    tags, links = note_graph.extract(text)
+    return ParsedLog(metrics, _work(date, metric_fields, errors), habits,
+                     _alcohol(alcohol_fields, errors), tasks, tags, links, errors)
+
+
+def read_file(item):
+    """
+    Read and parse one log (runs in pool workers).
+
+    Args:
+        item (tuple): (date, path)
+
+    Returns:
+        tuple: (date, sha1, ParsedLog), or (date, None, None) if the file is gone
+    """
+    date, path = item
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return date, None, None
+    return date, hashlib.sha1(data).hexdigest(), parse(data.decode('utf-8', errors='replace'), date)
+
+
+def parse_files(items, workers=None):
+    """
+    Read and parse many logs, in a process pool when there are enough.
+
+    Args:
+        items (list): (date, path) pairs
+        workers (int, optional): Pool size; 1 parses in-process. Defaults to
+            one per CPU.
+
+    Returns:
+        list: read_file() results, in order
+    """
+    if workers == 1 or len(items) < POOL_THRESHOLD:
+        return [read_file(item) for item in items]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(read_file, items, chunksize=POOL_CHUNK_SIZE))
+
+
+def lookup_habit(cursor, name):
+    """Get a habit's id, creating the habit if needed."""
+    row = cursor.execute('SELECT id FROM habits WHERE name = ? ORDER BY id LIMIT 1', (name,)).fetchone()
+    if row:
+        return row[0]
+    cursor.execute("INSERT INTO habits (name, frequency) VALUES (?, 'daily')", (name,))
+    return cursor.lastrowid
+
+
+def remove(cursor, date):
+    """Delete the rows a log produced inside the caller's transaction."""
+    for sql in DELETE_SQL.values():
+        cursor.execute(sql, (date,))
+    cursor.execute('DELETE FROM markdown_rows WHERE date = ?', (date,))
+
+
+def apply(cursor, date, sha1, parsed):
+    """Replace a log's rows with freshly parsed ones inside the caller's transaction."""
+    remove(cursor, date)
+
+    if any(value is not None for value in parsed.metrics):
+        cursor.execute('''
+            INSERT INTO daily_metrics (date, mood_rating, energy_level, sleep_hours) VALUES (?, ?, ?, ?)
+            ON CONFLICT (date) DO UPDATE SET
+                mood_rating = COALESCE(excluded.mood_rating, mood_rating),
+                energy_level = COALESCE(excluded.energy_level, energy_level),
+                sleep_hours = COALESCE(excluded.sleep_hours, sleep_hours),
+                logged_at = CURRENT_TIMESTAMP
+            WHERE mood_rating IS NOT COALESCE(excluded.mood_rating, mood_rating)
+                OR energy_level IS NOT COALESCE(excluded.energy_level, energy_level)
+                OR sleep_hours IS NOT COALESCE(excluded.sleep_hours, sleep_hours)
+        ''', (date, *parsed.metrics))
+
+    rows = []
+    for name in parsed.habits:
+        cursor.execute('INSERT INTO habit_logs (habit_id, completed_at) VALUES (?, ?)',
+                       (lookup_habit(cursor, name), f'{date} 00:00:00'))
+        rows.append(('habit_logs', cursor.lastrowid))
+    for drink_type, units, notes in parsed.alcohol:
+        cursor.execute('INSERT INTO alcohol_logs (date, drink_type, units, notes) VALUES (?, ?, ?, ?)',
+                       (date, drink_type, units, notes))
+        rows.append(('alcohol_logs', cursor.lastrowid))
+    for start_time, end_time, project, description, total_hours in parsed.work:
+        cursor.execute('''
+            INSERT INTO work_logs (date, start_time, end_time, project, description, total_hours)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (date, start_time, end_time, project, description, total_hours))
+        rows.append(('work_logs', cursor.lastrowid))
+    cursor.executemany('INSERT INTO markdown_rows (date, source, row_id) VALUES (?, ?, ?)',
+                       [(date, source, row_id) for source, row_id in rows])
+
+    cursor.execute('''
+        INSERT INTO markdown_sync (date, sha1, errors) VALUES (?, ?, ?)
+        ON CONFLICT (date) DO UPDATE SET sha1 = excluded.sha1, errors = excluded.errors
+    ''', (date, sha1, '\n'.join(parsed.errors) or None))
+    task_index.replace_day(cursor, date, parsed.tasks)
+    note_graph.replace_note(cursor, date, parsed.tags, parsed.links)
+
+
+def write(cursor, results, removed):
+    """
+    Store parse results and drop deleted logs inside the caller's transaction.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the caller's write transaction
+        results (list): read_file() results
+        removed (list): Dates whose logs no longer exist
+    """
+    for date, sha1, parsed in results:
+        if sha1 is None:
+            removed = [*removed, date]  # Deleted since it was listed
+        else:
+            apply(cursor, date, sha1, parsed)
+    for date in removed:
+        remove(cursor, date)
+        task_index.replace_day(cursor, date, [])
+        note_graph.replace_note(cursor, date, [], [])
+        cursor.execute('DELETE FROM markdown_sync WHERE date = ?', (date,))
+
+
+def summarize(results, removed):
+    """Count a sync's results as {'synced', 'removed', 'errors': {date: [messages]}}."""
+    return {
+        'synced': sum(1 for _, sha1, _ in results if sha1 is not None),
+        'removed': len(removed) + sum(1 for _, sha1, _ in results if sha1 is None),
+        'errors': {date: parsed.errors for date, sha1, parsed in results if sha1 is not None and parsed.errors},
+    }
+
+
+def sync(conn, daily_dir, full=False, workers=None):
+    """
+    Sync daily_dir into the database on a plain connection.
+
+    Every log is read to compare its hash; only changed logs (every log if
+    full) are written, all in one transaction.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        daily_dir (str): Directory of YYYY-MM-DD.md files
+        full (bool, optional): Re-sync unchanged logs too. Defaults to False.
+        workers (int, optional): See parse_files()
+
+    Returns:
+        dict: See summarize()
+    """
+    files = daily_catalog.scan(daily_dir)
+    stored = dict(conn.execute(STATE_SQL).fetchall())
+    results = parse_files([(date, os.path.join(daily_dir, f'{date}.md')) for date in sorted(files)], workers)
+    if not full:
+        results = [result for result in results if result[1] != stored.get(result[0])]
+    removed = [date for date in stored if date not in files]
+
+    cursor = conn.cursor()
+    cursor.execute('BEGIN')
+    try:
+        write(cursor, results, removed)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return summarize(results, removed)
+
+
+class MarkdownSync:
+    """
+    Incremental sync of a PKMManager's daily logs into its database.
+
+    Attributes:
+        pkm (PKMManager): Manager whose catalog, pool and writer are used
+        workers (int): Pool size for large syncs (None: one per CPU)
+    """
+
+    def __init__(self, pkm, workers=None):
+        self.pkm = pkm
+        self.workers = workers
+        self._lock = threading.Lock()  # One sync at a time
+        self._synced_version = None  # Catalog version the last full sync saw
+
+    def _stored(self, date=None):
+        # Get date -> synced sha1, or one date's sha1
+        conn = self.pkm.get_db_connection()
+        try:
+            if date is not None:
+                row = conn.execute(SHA_SQL, (date,)).fetchone()
+                return row[0] if row else None
+            return dict(conn.execute(STATE_SQL).fetchall())
+        finally:
+            conn.close()
+
+    def sync(self, full=False):
+        """
+        Sync every log whose content hash changed since it was last synced.
+
+        Args:
+            full (bool, optional): Re-sync unchanged logs too. Defaults to False.
+
+        Returns:
+            dict: See summarize()
+        """
+        with self._lock:
+            version = self.pkm.daily_catalog.version
+            return self._sync(version, self.pkm.daily_catalog.entries(check_files=True), full)
+
+    def _sync(self, version, entries, full=False):
+        # Caller holds self._lock. version is read before entries, so a change
+        # cataloged in between is synced by the next catch_up() rather than missed
+        stored = self._stored()
+        items = [(date, entry.path) for date, entry in sorted(entries.items())
+                 if full or stored.get(date) != entry.sha1]
+        removed = [date for date in stored if date not in entries]
+
+        results = parse_files(items, self.workers)
+        for start in range(0, len(results), WRITE_CHUNK):
+            chunk = results[start:start + WRITE_CHUNK]
+            self.pkm.run_write(lambda cursor: write(cursor, chunk, []))
+        if removed:
+            self.pkm.run_write(lambda cursor: write(cursor, [], removed))
+        self._synced_version = version
+        return summarize(results, removed)
+
+    def catch_up(self):
+        """
+        Sync the logs the catalog has seen change since the last sync.
+
+        Unlike sync(), files are not stat'ed one by one: the catalog is only
+        refreshed when the directory mtime changed (see DailyCatalog.refresh()),
+        and nothing is synced while its version is unchanged. That makes this
+        cheap enough for readers of the derived tables. Logs created, renamed
+        or deleted behind the app's back are picked up; in-place edits are
+        left to the watcher, daily_log_written() and `manage sync-markdown`.
+        """
+        catalog = self.pkm.daily_catalog
+        catalog.refresh()
+        if catalog.version == self._synced_version:
+            return
+        with self._lock:
+            self._sync(catalog.version, catalog.entries())
+
+    def sync_file(self, date):
+        """
+        Sync one day's log after writing (or deleting) it.
+
+        Returns:
+            list: Messages for values that could not be read
+        """
+        entry = self.pkm.daily_catalog.get(date)
+        with self._lock:
+            stored = self._stored(date)
+            if entry is None:
+                if stored is not None:
+                    self.pkm.run_write(lambda cursor: write(cursor, [], [date]))
+                return []
+            if stored == entry.sha1:
+                return []
+            result = read_file((date, entry.path))
+            self.pkm.run_write(lambda cursor: write(cursor, [result], []))
+        return result[2].errors if result[1] is not None else []
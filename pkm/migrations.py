@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Schema Migration Module
+
+This module owns the PKM database schema. Numbered SQL files in
+pkm/db/migrations (NNNN_description.sql) are applied in order, each in its
+own transaction, and recorded in the schema_version table.
+
+A migration can also name a data backfill kept in Python (BACKFILLS), so
+SQL that code runs again later, such as the rollup rebuild, has a single
+source. Backfills run in their own transaction once every pending migration
+is applied, so they always see the current schema.
+
+The schema is validated once per process per database: after the first
+successful check, ensure_schema() is a set lookup, so the hot logging paths
+in PKMManager never touch sqlite_master.
+
+Usage:
+    python3 -m pkm.manage status            # Show applied/pending migrations
+    python3 -m pkm.manage migrate           # Apply pending migrations
+    python3 -m pkm.manage migrate --db PATH # Use a different database
+"""
+
+import os
+import re
+import sqlite3
+import threading
+
+from . import rollup
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'migrations')
+MIGRATION_PATTERN = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+# Migration version -> backfill SQL, run after the last pending migration
+BACKFILLS = {
+    3: rollup.REBUILD_SQL,
+}
+
+# Tables the application cannot run without
+REQUIRED_TABLES = [
+    'daily_metrics',
+    'sub_daily_moods',
+    'habits',
+    'habit_logs',
+    'alcohol_logs',
+    'work_logs',
+    'goals',
+    'daily_entries'
+]
+
+_validated = set()
+_validated_lock = threading.Lock()
+
+
+def discover_migrations(migrations_dir=MIGRATIONS_DIR):
+    """
+    List the migration files on disk.
+
+    Returns:
+        list: (version, name, path) tuples sorted by version
+    """
+    migrations = []
+    for filename in os.listdir(migrations_dir):
+        match = MIGRATION_PATTERN.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(migrations_dir, filename)))
+    return sorted(migrations)
+
+
+def latest_version():
+    """Return the highest migration version shipped with the code."""
+    migrations = discover_migrations()
+    return migrations[-1][0] if migrations else 0
+
+
+def current_version(conn):
+    """
+    Return the schema version recorded in the database.
+
+    Returns:
+        int: Highest applied migration version, 0 for an unversioned database
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='schema_version'")
+    if cursor.fetchone() is None:
+        return 0
+    cursor.execute('SELECT MAX(version) FROM schema_version')
+    return cursor.fetchone()[0] or 0
+
+
+def migrate(conn, log=print):
+    """
+    Apply all pending migrations.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        log (callable, optional): Progress logger. Defaults to print.
+
+    Returns:
+        list: Names of the migrations applied (empty if already current)
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+    version = current_version(conn)
+    applied = []
+    backfills = []
+
+    for number, name, path in discover_migrations():
+        if number <= version:
+            continue
+
+        with open(path, 'r') as sql_file:
+            script = sql_file.read()
+
+        log(f"Applying migration {number:04d}_{name}...")
+        try:
+            conn.executescript(
+                "BEGIN;\n"
+                f"{script}\n"
+                f"INSERT INTO schema_version (version, name) VALUES ({number}, '{name}');\n"
+                "COMMIT;"
+            )
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        applied.append(f"{number:04d}_{name}")
+        if number in BACKFILLS:
+            backfills.append((number, name))
+
+    for number, name in backfills:
+        log(f"Backfilling {number:04d}_{name}...")
+        try:
+            conn.executescript(f"BEGIN;\n{BACKFILLS[number]}\nCOMMIT;")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+    return applied
+
+
+def validate(conn):
+    """
+    Check that every required table exists.
+
+    Raises:
+        Exception: If any required table is missing
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    existing_tables = {row[0] for row in cursor.fetchall()}
+
+    missing_tables = [table for table in REQUIRED_TABLES if table not in existing_tables]
+    if missing_tables:
+        raise Exception(
+            f"Missing required tables: {', '.join(missing_tables)}. "
+            "Please run './pkm.sh init-db' to initialize the database."
+        )
+
+
+def is_validated(db_path):
+    """Return True if ensure_schema() already succeeded for db_path in this process."""
+    return os.path.abspath(db_path) in _validated
+
+
+def ensure_schema(conn, db_path, log=print):
+    """
+    Bring the database up to date and validate it, once per process.
+
+    Subsequent calls for the same database return immediately.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        db_path (str): Path of the database (cache key)
+        log (callable, optional): Progress logger for applied migrations
+    """
+    key = os.path.abspath(db_path)
+    if key in _validated:
+        return
+
+    with _validated_lock:
+        if key in _validated:
+            return
+        if current_version(conn) < latest_version():
+            migrate(conn, log)
+        validate(conn)
+        _validated.add(key)
+
+
+def invalidate(db_path=None):
+    """Forget cached validation (for one database, or all if db_path is None)."""
+    with _validated_lock:
+        if db_path is None:
+            _validated.clear()
+        else:
+            _validated.discard(os.path.abspath(db_path))
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tag and Link Graph
+
+Indexes the #tags and links of the daily logs in the note_tags and
+note_links tables (migration 0015): an inverted index from tag to notes
+and an adjacency list from note to note, with an index on the target for
+backlinks.
+
+Links are [[wiki-links]] (an optional #heading or |alias is ignored) and
+markdown links to relative .md files; web URLs are not part of the graph.
+Notes are keyed by lower-cased name without .md, so a daily log is its
+date and [[2024-11-04]], [[2024-11-04.md]] and [x](../daily/2024-11-04.md)
+all point at it. Linked notes that have no file yet are nodes too. Tags and
+links inside code blocks and inline code are skipped.
+
+pkm.markdown_sync calls replace_note() when it re-parses a log, so the
+graph is updated per changed log and reads are plain indexed lookups.
+Neighbourhoods follow links in both
+directions with a recursive CTE.
+
+Usage:
+    graph = NoteGraph(pkm)
+    graph.refresh()
+    graph.notes_with_tag('running')
+    graph.backlinks('2024-11-04')
+    nodes, edges = graph.neighbourhood('2024-11-04', depth=2)
+"""
+
+import json
+import os
+import re
+from urllib.parse import unquote
+
+MAX_DEPTH = 4
+
+TAG_NOTES_SQL = 'SELECT note FROM note_tags WHERE tag = ? ORDER BY note DESC LIMIT ?'
+
+TAG_COUNTS_SQL = 'SELECT tag, COUNT(*) FROM note_tags GROUP BY tag ORDER BY COUNT(*) DESC, tag LIMIT ?'
+
+NOTE_TAGS_SQL = 'SELECT tag FROM note_tags WHERE note = ? ORDER BY tag'
+
+LINKS_SQL = 'SELECT target FROM note_links WHERE source = ? ORDER BY target'
+
+BACKLINKS_SQL = 'SELECT source FROM note_links WHERE target = ? ORDER BY source DESC'
+
+# Notes within `depth` links of a note, following links either way
+NEIGHBOURHOOD_SQL = '''
+    WITH RECURSIVE hood (note, depth) AS (
+        SELECT ?, 0
+        UNION
+        SELECT l.target, hood.depth + 1 FROM hood JOIN note_links l ON l.source = hood.note
+        WHERE hood.depth < ?
+        UNION
+        SELECT l.source, hood.depth + 1 FROM hood JOIN note_links l ON l.target = hood.note
+        WHERE hood.depth < ?
+    )
+    SELECT note, MIN(depth) FROM hood GROUP BY note ORDER BY MIN(depth), note
+'''
+
+# Links between the notes of a JSON array
+EDGES_SQL = '''
+    SELECT l.source, l.target FROM json_each(?) AS j
+    JOIN note_links l ON l.source = j.value
+    WHERE l.target IN (SELECT value FROM json_each(?))
+'''
+
+FENCE_PATTERN = re.compile(r'^(```|~~~).*?(?:^\1|\Z)', re.S | re.M)
+INLINE_CODE_PATTERN = re.compile(r'`[^`\n]*`')
+COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.S)
+TAG_PATTERN = re.compile(r'(?<![\w#&/])#(?=[\w/-]*[A-Za-z])([A-Za-z0-9][\w/-]*)')  # Not #1 or ##
+WIKI_LINK_PATTERN = re.compile(r'\[\[([^\]|#]+)(?:#[^\]|]*)?(?:\|[^\]]*)?\]\]')
+MARKDOWN_LINK_PATTERN = re.compile(r'\[[^\]]*\]\(<?([^)\s>]+\.md)>?(?:\s+"[^"]*")?\)')
+
+
+def note_key(name):
+    """Key of a note: its lower-cased file name without directory or .md."""
+    name = os.path.basename(name.strip().replace('\\', '/'))
+    if name.lower().endswith('.md'):
+        name = name[:-3]
+    return ' '.join(name.lower().split())
+
+
+def extract(text):
+    """
+    Find the tags and links of a note.
+
+    Args:
+        text (str): Markdown content
+
+    Returns:
+        tuple: (sorted tags, sorted link target keys)
+    """
+    text = INLINE_CODE_PATTERN.sub('', FENCE_PATTERN.sub('', COMMENT_PATTERN.sub('', text)))
+    tags = {tag.lower().rstrip('/-') for tag in TAG_PATTERN.findall(text)}
+    links = {note_key(name) for name in WIKI_LINK_PATTERN.findall(text)}
+    links.update(note_key(unquote(path)) for path in MARKDOWN_LINK_PATTERN.findall(text)
+                 if '://' not in path and not path.startswith('mailto:'))
+    return sorted(tag for tag in tags if tag), sorted(link for link in links if link)
+
+
+def replace_note(cursor, note, tags, links):
+    """
+    Replace one note's tags and outgoing links inside the caller's transaction.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the caller's write transaction
+        note (str): Key of the note
+        tags (list): Tags, as from extract(); empty when the note was deleted
+        links (list): Link target keys, as from extract()
+    """
+    cursor.execute('DELETE FROM note_tags WHERE note = ?', (note,))
+    cursor.execute('DELETE FROM note_links WHERE source = ?', (note,))
+    cursor.executemany('INSERT INTO note_tags (tag, note) VALUES (?, ?)', [(tag, note) for tag in tags])
+    cursor.executemany('INSERT INTO note_links (source, target) VALUES (?, ?)',
+                       [(note, target) for target in links if target != note])
+
+
+def check_depth(depth):
+    """
+    Validate a neighbourhood depth.
+
+    Raises:
+        ValueError: If depth is not between 1 and MAX_DEPTH
+    """
+    if not 1 <= depth <= MAX_DEPTH:
+        raise ValueError(f"depth must be between 1 and {MAX_DEPTH}, got {depth}")
+
+
+class NoteGraph:
+    """
+    Tag and link queries over a PKMManager's daily logs.
+
+    Attributes:
+        pkm (PKMManager): Manager whose pool and markdown sync are used
+    """
+
+    def __init__(self, pkm):
+        self.pkm = pkm
+
+    def refresh(self):
+        """Sync logs added or removed since the last markdown sync (see MarkdownSync.catch_up())."""
+        self.pkm.markdown_sync.catch_up()
+
+    def _rows(self, sql, params):
+        conn = self.pkm.get_db_connection()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def notes_with_tag(self, tag, limit=500):
+        """Notes carrying a tag (with or without its #), newest first."""
+        return [note for note, in self._rows(TAG_NOTES_SQL, (tag.lstrip('#').lower(), limit))]
+
+    def tag_counts(self, limit=100):
+        """(tag, number of notes) pairs, most used first."""
+        return self._rows(TAG_COUNTS_SQL, (limit,))
+
+    def tags(self, note):
+        """A note's tags."""
+        return [tag for tag, in self._rows(NOTE_TAGS_SQL, (note_key(note),))]
+
+    def links(self, note):
+        """Notes a note links to."""
+        return [target for target, in self._rows(LINKS_SQL, (note_key(note),))]
+
+    def backlinks(self, note):
+        """Notes linking to a note, newest first."""
+        return [source for source, in self._rows(BACKLINKS_SQL, (note_key(note),))]
+
+    def neighbourhood(self, note, depth=2):
+        """
+        Get the notes within `depth` links of a note, following links either way.
+
+        Args:
+            note (str): Note name or key
+            depth (int, optional): Maximum number of links (1-4). Defaults to 2.
+
+        Returns:
+            tuple: (list of (note, distance) nearest first, starting with the
+                note itself; list of (source, target) links between them)
+
+        Raises:
+            ValueError: For a depth out of range
+        """
+        check_depth(depth)
+        key = note_key(note)
+        nodes = self._rows(NEIGHBOURHOOD_SQL, (key, depth, depth))
+        names = json.dumps([name for name, _ in nodes])
+        return nodes, self._rows(EDGES_SQL, (names, names))
+
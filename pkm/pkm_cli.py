@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 from textual.app import App
-from textual.widgets import Button, Header, Footer, Static
+from textual.widgets import Button, Header, Footer, Static, Log, Input
+from textual.worker import get_current_worker
 from textual.containers import Container, ScrollableContainer
 from textual.screen import Screen
 from textual.binding import Binding
@@ -14,22 +15,89 @@ EMOJI_HABITS = "✅"
 EMOJI_ALCOHOL = "🍷"
 EMOJI_LOGS = "📚"
 EMOJI_QUERY = "🔍"
+EMOJI_HEATMAP = "📅"
+EMOJI_SEARCH = "🔎"
+EMOJI_TASKS = "📝"
 EMOJI_EXIT = "🚪"
 
+# Streamed reports: lines kept on screen and lines sent per UI update
+MAX_SCREEN_LINES = 5000
+STREAM_BATCH_LINES = 50
+
 class ActionScreen(Screen):
-    def __init__(self, title: str, content: str):
+    """
+    Shows a report. `content` is either a string or an iterator of lines
+    (one of PKMManager's render_* generators); iterators are consumed on a
+    worker thread and appended as they arrive, so large reports start
+    displaying immediately.
+    """
+
+    def __init__(self, title: str, content):
         super().__init__()
         self.title = title
         self.content = content
 
     def compose(self):
         yield Header(self.title)
-        yield ScrollableContainer(
-            Static(self.content),
-            classes="content-container"
-        )
+        if isinstance(self.content, str):
+            yield ScrollableContainer(
+                Static(self.content),
+                classes="content-container"
+            )
+        else:
+            yield Log(max_lines=MAX_SCREEN_LINES, classes="content-container")
+        yield Footer()
+
+    def on_mount(self):
+        if not isinstance(self.content, str):
+            self.run_worker(self.stream_content, thread=True, exclusive=True)
+
+    def stream_content(self):
+        """Append report lines in batches until done or the screen is closed"""
+        content = self.content
+        log = self.query_one(Log)
+        worker = get_current_worker()
+        batch = []
+        try:
+            for line in content:
+                if worker.is_cancelled:
+                    return
+                batch.append(line)
+                if len(batch) >= STREAM_BATCH_LINES:
+                    self.app.call_from_thread(log.write, "".join(batch))
+                    batch = []
+            if batch:
+                self.app.call_from_thread(log.write, "".join(batch))
+        finally:
+            # Release the cursor/file and this thread's pooled connection
+            content.close()
+            self.app.pkm.pool.release_thread()
+
+class SearchScreen(ActionScreen):
+    """
+    Full-text search: results for each submitted query stream into the log
+    below the input, replacing the previous results.
+    """
+
+    def __init__(self):
+        super().__init__("Search", iter(()))
+
+    def compose(self):
+        yield Header(self.title)
+        yield Input(placeholder='Words, "a phrase", prefix* - Enter to search')
+        yield Log(max_lines=MAX_SCREEN_LINES, classes="content-container")
         yield Footer()
 
+    def on_mount(self):
+        self.query_one(Input).focus()
+
+    def on_input_submitted(self, event: Input.Submitted):
+        if not event.value.strip():
+            return
+        self.query_one(Log).clear()
+        self.content = self.app.pkm.render_search(event.value)
+        self.run_worker(self.stream_content, thread=True, exclusive=True)
+
 class PKMApp(App):
     CSS = """
     Screen {
@@ -77,6 +145,9 @@ class PKMApp(App):
             Button(f"{EMOJI_HABITS} Track Habits", id="habits"),
             Button(f"{EMOJI_ALCOHOL} Log Alcohol", id="alcohol"),
             Button(f"{EMOJI_LOGS} View Logs", id="logs"),
+            Button(f"{EMOJI_HEATMAP} Year Heatmap", id="heatmap"),
+            Button(f"{EMOJI_SEARCH} Search", id="search"),
+            Button(f"{EMOJI_TASKS} Open Tasks", id="tasks"),
             Button(f"{EMOJI_QUERY} Query DB", id="query"),
             Button(f"{EMOJI_EXIT} Exit", id="exit"),
             classes="menu-container"
@@ -87,7 +158,7 @@ class PKMApp(App):
         """Go back to the main menu"""
         self.pop_screen()
 
-    def show_action_screen(self, title: str, content: str):
+    def show_action_screen(self, title: str, content):
         """Show a screen for a specific action"""
         self.push_screen(ActionScreen(title, content))
 
@@ -100,20 +171,28 @@ class PKMApp(App):
             content = self.pkm.get_daily_journal()
             self.show_action_screen("Daily Journal", content)
         elif button_id == "metrics":
-            content = self.pkm.get_metrics()
+            content = self.pkm.render_metrics()
             self.show_action_screen("Daily Metrics", content)
         elif button_id == "work":
-            content = self.pkm.get_work_log()
+            content = self.pkm.render_work_log()
             self.show_action_screen("Work Log", content)
         elif button_id == "habits":
-            content = self.pkm.get_habits()
+            content = self.pkm.render_habits()
             self.show_action_screen("Habits", content)
         elif button_id == "alcohol":
-            content = self.pkm.get_alcohol_log()
+            content = self.pkm.render_alcohol_log()
             self.show_action_screen("Alcohol Log", content)
         elif button_id == "logs":
-            content = self.pkm.get_recent_logs()
+            content = self.pkm.render_recent_logs()
             self.show_action_screen("Recent Logs", content)
+        elif button_id == "heatmap":
+            content = self.pkm.render_heatmap()
+            self.show_action_screen("Year Heatmap", content)
+        elif button_id == "search":
+            self.push_screen(SearchScreen())
+        elif button_id == "tasks":
+            content = self.pkm.render_tasks()
+            self.show_action_screen("Open Tasks", content)
         elif button_id == "query":
             content = self.pkm.query_database()
             self.show_action_screen("Database Query", content)
@@ -33,6 +33,92 @@ import sqlite3
 import os
 from datetime import datetime
 import shutil
+import itertools
+
+from . import migrations
+from .analytics import Analytics
+from .anomalies import AnomalyDetector
+from .calendar_index import PRESENCE_SOURCES, CalendarIndex
+from .daily_catalog import DailyCatalog
+from .database import ConnectionPool
+from . import downsample
+from .forecast import SERIES as FORECAST_SERIES, Forecaster
+from . import resample as resampling
+from .heatmap import METRICS as HEATMAP_METRICS, HeatmapCache, grid_lines
+from .markdown_sync import MarkdownSync
+from .note_graph import NoteGraph, check_depth as check_graph_depth, note_key
+from .render_cache import RenderCache
+from .repository import AlcoholLog, DailyMetric, Repository, WorkLog, days_ago, today
+from .search import SearchIndex
+from .stats import StatsCache
+from .streaks import StreakEngine
+from .task_index import STATES as TASK_STATES, TaskIndex, check_state as check_task_state
+from .writer import WRITE_TIMEOUT
+
+
+def _check_date(value, field='date'):
+    """Validate a YYYY-MM-DD string (None passes through)."""
+    if value is None:
+        return None
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be in YYYY-MM-DD format")
+    return value
+
+
+def _check_timestamp(value, field):
+    """Validate a YYYY-MM-DD HH:MM:SS string (None passes through)."""
+    if value is None:
+        return None
+    try:
+        datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be in YYYY-MM-DD HH:MM:SS format")
+    return value
+
+
+def _check_rating(value, field):
+    """Validate a 1-10 rating and return it as int."""
+    rating = int(value)
+    if not 1 <= rating <= 10:
+        raise ValueError(f"{field} must be between 1 and 10")
+    return rating
+
+
+def _check_positive(value, field, maximum=None):
+    """Validate a positive number and return it as float."""
+    number = float(value)
+    if number <= 0:
+        raise ValueError(f"{field} must be greater than 0")
+    if maximum is not None and number > maximum:
+        raise ValueError(f"{field} must be at most {maximum}")
+    return number
+
+
+def _limit_lines(lines, max_lines=None):
+    """
+    Pass lines through, stopping after max_lines with a truncation marker.
+    
+    The source generator is closed when the limit is hit, so any cursor or
+    file it holds is released immediately.
+    """
+    try:
+        for count, line in enumerate(lines):
+            if max_lines is not None and count >= max_lines:
+                yield "... (output truncated)\n"
+                return
+            yield line
+    finally:
+        lines.close()
+
+
+def _require(record, field):
+    """Return a required, non-empty field from a batch record."""
+    value = record.get(field)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        raise ValueError(f"{field} is required")
+    return value
 
 class PKMManager:
     """
@@ -48,77 +134,146 @@ class PKMManager:
         db_path (str): Path to SQLite database
         templates_dir (str): Path to template files
         daily_dir (str): Path to daily log files
+        pool (ConnectionPool): Per-thread pool of configured connections
+        writer (WriteQueue): Optional single-writer queue all writes go through
+        repo (Repository): Typed range queries over the log tables
+        daily_catalog (DailyCatalog): Incrementally refreshed catalog of daily_dir
+        calendar (CalendarIndex): Per-day bitmaps of habits and logged days
+        heatmaps (HeatmapCache): Cached year heatmaps built from daily_rollup
+        analytics (Analytics): Cached correlations over aligned per-day columns
+        anomalies (AnomalyDetector): Incremental rolling anomaly detection
+        forecasts (Forecaster): Holt-Winters forecasts from persisted model state
+        search_index (SearchIndex): FTS5 search over notes and daily markdown logs
+        render_cache (RenderCache): Memory and database cache of rendered daily logs
+        markdown_sync (MarkdownSync): Sync of daily log sections into the log tables
+        task_index (TaskIndex): Tasks from the daily logs' Tasks sections
+        note_graph (NoteGraph): Tag index and link graph of the daily logs
+        watcher (DailyWatcher): Watcher keeping the above in step with daily_dir, once started
     """
     
-    def __init__(self):
+    def __init__(self, db_path=None, profile=None):
+        """
+        Args:
+            db_path (str, optional): Path to SQLite database. Defaults to pkm/db/pkm.db.
+            profile (str, optional): Connection pragma profile (see pkm.database.PROFILES).
+                Defaults to $PKM_DB_PROFILE or 'balanced'.
+        """
         # Get the project root directory (one level up from pkm directory)
         self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         # Update the db_path to use the correct location
-        self.db_path = os.path.join(self.base_dir, 'pkm', 'db', 'pkm.db')
+        self.db_path = db_path or os.path.join(self.base_dir, 'pkm', 'db', 'pkm.db')
         self.templates_dir = os.path.join(self.base_dir, 'pkm', 'templates')
         self.daily_dir = os.path.join(self.base_dir, 'daily')
+        self.pool = ConnectionPool(self.db_path, profile)
+        # Cached habit name -> id map, filled after writes that resolved them commit
+        self._habit_ids = {}
+        # Optional single-writer queue (see attach_writer)
+        self.writer = None
+        self.repo = Repository(self)
+        self.stats = StatsCache()
+        self.streaks = StreakEngine(self)
+        self.daily_catalog = DailyCatalog(self)
+        self.calendar = CalendarIndex(self)
+        self.heatmaps = HeatmapCache(self)
+        self.analytics = Analytics(self)
+        self.anomalies = AnomalyDetector(self)
+        self.forecasts = Forecaster(self)
+        self.search_index = SearchIndex(self)
+        self.render_cache = RenderCache(self)
+        self.markdown_sync = MarkdownSync(self)
+        self.task_index = TaskIndex(self)
+        self.note_graph = NoteGraph(self)
+        self.watcher = None
         
     def get_db_connection(self):
         """
-        Create and return a database connection.
+        Lease a pooled database connection for the current thread.
         
         Returns:
-            sqlite3.Connection: Connection to the SQLite database
+            PooledConnection: Connection to the SQLite database
             
         Note:
-            Caller is responsible for closing the connection
+            Caller is responsible for closing the connection. Closing returns
+            it to the pool and rolls back anything left uncommitted.
         """
-        return sqlite3.connect(self.db_path)
+        return self.pool.get()
 
     def check_database(self):
         """
-        Verify database exists and has all required tables.
+        Verify database exists and its schema is current.
         
         Raises:
             Exception: If database is missing or incomplete
             
-        Required Tables:
-            - daily_metrics: Daily mood, energy, and sleep tracking
-            - sub_daily_moods: Mood tracking throughout the day
-            - habits: Habit definitions
-            - habit_logs: Habit completion tracking
-            - alcohol_logs: Alcohol consumption tracking
-            - work_logs: Work hours and project tracking
-            - goals: Goal tracking and management
-        """
-        required_tables = [
-            'daily_metrics',
-            'sub_daily_moods',
-            'habits',
-            'habit_logs',
-            'alcohol_logs',
-            'work_logs',
-            'goals'
-        ]
-        
+        Note:
+            Pending migrations are applied and required tables validated on
+            the first call only (see pkm.migrations.ensure_schema); after that
+            this is a cached lookup with no database round trip.
+        """
+        if migrations.is_validated(self.db_path):
+            return
+            
         if not os.path.exists(self.db_path):
             raise Exception("Database not found. Please run './pkm.sh init-db' to initialize the database.")
             
+        conn = self.get_db_connection()
         try:
-            conn = self.get_db_connection()
-            cursor = conn.cursor()
-            
-            # Get list of existing tables
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            existing_tables = {row[0] for row in cursor.fetchall()}
-            
-            # Check for missing tables
-            missing_tables = [table for table in required_tables if table not in existing_tables]
-            
-            if missing_tables:
-                raise Exception(
-                    f"Missing required tables: {', '.join(missing_tables)}. "
-                    "Please run './pkm.sh init-db' to initialize the database."
-                )
-                
-            conn.close()
+            migrations.ensure_schema(conn, self.db_path)
         except sqlite3.Error as e:
             raise Exception(f"Database error: {str(e)}. Please run './pkm.sh init-db' to initialize the database.")
+        finally:
+            conn.close()
+
+    def _get_habit_id(self, cursor, habit_name, resolved):
+        """
+        Resolve a habit name to its id, creating the habit if needed.
+        
+        Args:
+            cursor (sqlite3.Cursor): Cursor inside the caller's transaction
+            habit_name (str): Name of the habit
+            resolved (dict): Receives name -> id for names not cached yet. The
+                caller adds them to the cache with _remember_habits() only once
+                its write has committed, since a group commit can still roll
+                back a habit created here.
+                
+        Returns:
+            int: Habit id
+        """
+        habit_id = self._habit_ids.get(habit_name) or resolved.get(habit_name)
+        if habit_id is not None:
+            return habit_id
+            
+        cursor.execute('SELECT id FROM habits WHERE name = ? ORDER BY id LIMIT 1', (habit_name,))
+        row = cursor.fetchone()
+        if row:
+            habit_id = row[0]
+        else:
+            cursor.execute('''
+                INSERT INTO habits (name, frequency)
+                VALUES (?, 'daily')
+            ''', (habit_name,))
+            habit_id = cursor.lastrowid
+                
+        resolved[habit_name] = habit_id
+        return habit_id
+
+    def _remember_habits(self, resolved):
+        """Cache habit ids resolved by a write that has committed."""
+        self._habit_ids.update(resolved)
+
+    def _forget_habits(self, habit_names):
+        """Drop habits from the name -> id cache (after a rename or delete)."""
+        for name in habit_names:
+            self._habit_ids.pop(name, None)
+
+    def forget_habit(self, habit_name):
+        """
+        Invalidate the cached id for a habit.
+        
+        Args:
+            habit_name (str): Name of the habit that was renamed or deleted
+        """
+        self._forget_habits([habit_name])
 
     def create_daily_log(self, date=None):
         """
@@ -136,9 +291,9 @@ class PKMManager:
             date = datetime.now().strftime('%Y-%m-%d')
             
         template_path = os.path.join(self.templates_dir, 'daily_template.md')
-        daily_path = os.path.join(self.daily_dir, f'{date}.md')
+        daily_path = self.daily_catalog.path(date)
         
-        if os.path.exists(daily_path):
+        if self.daily_catalog.exists(date):
             print(f"Daily log for {date} already exists!")
             return
             
@@ -150,6 +305,7 @@ class PKMManager:
         
         with open(daily_path, 'w') as daily_file:
             daily_file.write(content)
+        self.daily_log_written(date)
             
         print(f"Created daily log for {date}")
 
@@ -164,20 +320,84 @@ class PKMManager:
             Automatically creates new journal if none exists for today
         """
         date = datetime.now().strftime('%Y-%m-%d')
-        daily_path = os.path.join(self.daily_dir, f'{date}.md')
         
-        if not os.path.exists(daily_path):
+        if not self.daily_catalog.exists(date):
             self.create_daily_log(date)
         
-        with open(daily_path, 'r') as f:
+        with open(self.daily_catalog.path(date), 'r') as f:
             return f.read()
 
-    def get_metrics(self):
+    def daily_log_written(self, date):
         """
-        Get recent daily metrics.
+        Update the catalog, cached HTML and synced rows after writing a daily log.
         
+        Args:
+            date (str): Date of the log in YYYY-MM-DD format
+            
         Returns:
-            str: Formatted string of recent metrics (last 7 days)
+            list: Messages for values in the log that could not be synced
+        """
+        cataloged = self.daily_catalog.get(date)
+        self.daily_catalog.refresh_file(date)
+        if self.daily_catalog.get(date) != cataloged:
+            self.render_cache.invalidate(self.daily_catalog.path(date))
+        return self.markdown_sync.sync_file(date)
+
+    def start_watcher(self, debounce=0.5, poll_interval=2.0, polling=False, log=print):
+        """
+        Keep the daily log indexes fresh as files change on disk.
+        
+        Args:
+            debounce (float, optional): Quiet seconds before updating. Defaults to 0.5.
+            poll_interval (float, optional): Seconds between scans when polling. Defaults to 2.0.
+            polling (bool, optional): Poll even where inotify is available. Defaults to False.
+            log (callable, optional): Receives progress and error messages. Defaults to print.
+            
+        Returns:
+            DailyWatcher: The started watcher; call stop() to end it
+        """
+        # Imported here so `python3 -m pkm.watcher` does not import itself via the package
+        from .watcher import DailyWatcher
+        
+        def update_logs(dates):
+            for date in dates:
+                for problem in self.daily_log_written(date):
+                    log(f"{date}: {problem}")
+                    
+        watcher = DailyWatcher(self.daily_dir, debounce, poll_interval, polling, log)
+        watcher.register('daily logs', update_logs)
+        watcher.register('search', lambda dates: self.search_index.refresh())
+        watcher.start()
+        self.watcher = watcher
+        return watcher
+
+    def sync_markdown(self, full=False):
+        """
+        Sync the Metrics, Habits and Alcohol sections of changed daily logs.
+        
+        Args:
+            full (bool, optional): Re-sync unchanged logs too. Defaults to False.
+            
+        Returns:
+            dict: {'synced': int, 'removed': int, 'errors': {date: [message, ...]}}
+        """
+        self.check_database()
+        result = self.markdown_sync.sync(full)
+        print(f"Synced {result['synced']} daily log(s), removed {result['removed']}")
+        for date, messages in sorted(result['errors'].items()):
+            for message in messages:
+                print(f"  {date}: {message}")
+        return result
+
+    def render_metrics(self, max_lines=None):
+        """
+        Stream recent daily metrics as text, one line per chunk.
+        
+        Args:
+            max_lines (int, optional): Stop after this many lines
+            
+        Yields:
+            str: Lines of the report (last 7 days), each ending in a newline
             
         Metrics Include:
             - Date
@@ -187,40 +407,44 @@ class PKMManager:
             - Optional notes
         """
         self.check_database()
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT date, mood_rating, energy_level, sleep_hours, notes
-            FROM daily_metrics
-            ORDER BY date DESC
-            LIMIT 7
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        if not rows:
-            return "No metrics recorded yet."
-        
-        result = "Recent Daily Metrics:\n\n"
-        for row in rows:
-            result += f"Date: {row[0]}\n"
-            result += f"Mood: {row[1]}/10\n"
-            result += f"Energy: {row[2]}/10\n"
-            result += f"Sleep: {row[3]} hours\n"
-            if row[4]:
-                result += f"Notes: {row[4]}\n"
-            result += "-" * 30 + "\n"
+        yield from _limit_lines(self._metrics_lines(), max_lines)
+
+    def _metrics_lines(self):
+        rows = self.repo.stream(DailyMetric, limit=7, descending=True)
+        first = next(rows, None)
+        if first is None:
+            yield "No metrics recorded yet."
+            return
         
-        return result
+        yield "Recent Daily Metrics:\n"
+        yield "\n"
+        for row in itertools.chain([first], rows):
+            yield f"Date: {row.date}\n"
+            yield f"Mood: {row.mood_rating}/10\n"
+            yield f"Energy: {row.energy_level}/10\n"
+            yield f"Sleep: {row.sleep_hours} hours\n"
+            if row.notes:
+                yield f"Notes: {row.notes}\n"
+            yield "-" * 30 + "\n"
 
-    def get_work_log(self):
+    def get_metrics(self):
         """
-        Get recent work logs.
+        Get recent daily metrics.
         
         Returns:
-            str: Formatted string of recent work logs (last 10 entries)
+            str: Formatted string of recent metrics (last 7 days)
+        """
+        return "".join(self.render_metrics())
+
+    def render_work_log(self, max_lines=None):
+        """
+        Stream recent work logs as text, one line per chunk.
+        
+        Args:
+            max_lines (int, optional): Stop after this many lines
+            
+        Yields:
+            str: Lines of the report (last 10 entries, then hours by project)
             
         Log Details:
             - Date
@@ -229,82 +453,118 @@ class PKMManager:
             - Work description (if provided)
         """
         self.check_database()
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT date, project, total_hours, description
-            FROM work_logs
-            ORDER BY date DESC
-            LIMIT 10
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        if not rows:
-            return "No work hours logged yet."
-        
-        result = "Recent Work Logs:\n\n"
-        for row in rows:
-            result += f"Date: {row[0]}\n"
-            if row[1]:
-                result += f"Project: {row[1]}\n"
-            result += f"Hours: {row[2]:.2f}\n"
-            if row[3]:
-                result += f"Description: {row[3]}\n"
-            result += "-" * 30 + "\n"
+        yield from _limit_lines(self._work_log_lines(), max_lines)
+
+    def _work_log_lines(self):
+        rows = self.repo.stream(WorkLog, limit=10, descending=True)
+        first = next(rows, None)
+        if first is None:
+            yield "No work hours logged yet."
+            return
         
-        return result
+        yield "Recent Work Logs:\n"
+        yield "\n"
+        for row in itertools.chain([first], rows):
+            yield f"Date: {row.date}\n"
+            if row.project:
+                yield f"Project: {row.project}\n"
+            yield f"Hours: {row.total_hours:.2f}\n"
+            if row.description:
+                yield f"Description: {row.description}\n"
+            yield "-" * 30 + "\n"
+        
+        project_hours = self.repo.project_hours(start=days_ago(7))
+        if project_hours:
+            yield "\n"
+            yield "Hours by Project (Last 7 Days):\n"
+            yield "\n"
+            for project, hours in project_hours:
+                yield f"{project}: {hours:.2f}\n"
 
-    def get_habits(self):
+    def get_work_log(self):
         """
-        Get habits and recent completions.
+        Get recent work logs.
         
         Returns:
-            str: Formatted string of habits and their completion stats
+            str: Formatted string of recent work logs (last 10 entries)
+        """
+        return "".join(self.render_work_log())
+
+    def render_habits(self, max_lines=None):
+        """
+        Stream habits and their completion stats as text, one line per chunk.
+        
+        Args:
+            max_lines (int, optional): Stop after this many lines
+            
+        Yields:
+            str: Lines of the report
             
         Stats Include:
-            - Habit name
+            - Habit name and frequency
             - Total times completed
             - Date of last completion
+            - Current and longest streak, in periods of the habit's frequency
+            - Rolling completion rates (see pkm.streaks.RATE_WINDOWS)
         """
         self.check_database()
+        yield from _limit_lines(self._habits_lines(), max_lines)
+
+    def _habits_lines(self):
         conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT h.name,
-                   COUNT(hl.id) as completions,
-                   MAX(hl.completed_at) as last_completed
-            FROM habits h
-            LEFT JOIN habit_logs hl ON h.id = hl.habit_id
-            GROUP BY h.id
-            ORDER BY h.name
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        if not rows:
-            return "No habits tracked yet."
-        
-        result = "Habit Tracking:\n\n"
-        for row in rows:
-            result += f"Habit: {row[0]}\n"
-            result += f"Total Completions: {row[1]}\n"
-            if row[2]:
-                result += f"Last Completed: {row[2]}\n"
-            result += "-" * 30 + "\n"
-        
-        return result
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT h.name,
+                       COUNT(hl.id) as completions,
+                       MAX(hl.completed_at) as last_completed,
+                       h.id
+                FROM habits h
+                LEFT JOIN habit_logs hl ON h.id = hl.habit_id
+                GROUP BY h.id
+                ORDER BY h.name
+            ''')
+            
+            first = cursor.fetchone()
+            if first is None:
+                yield "No habits tracked yet."
+                return
+            
+            yield "Habit Tracking:\n"
+            yield "\n"
+            for row in itertools.chain([first], cursor):
+                streak = self.streaks.stats(row[3])
+                yield f"Habit: {row[0]} ({streak.frequency})\n"
+                yield f"Total Completions: {row[1]}\n"
+                if row[2]:
+                    yield f"Last Completed: {row[2]}\n"
+                yield f"Current Streak: {streak.current} {streak.unit}\n"
+                yield f"Longest Streak: {streak.longest} {streak.unit}\n"
+                rates = ", ".join(f"{rate:.0%} of last {window} {streak.unit}"
+                                  for window, rate in streak.rates.items())
+                yield f"Completion Rate: {rates}\n"
+                yield "-" * 30 + "\n"
+        finally:
+            conn.close()
 
-    def get_alcohol_log(self):
+    def get_habits(self):
         """
-        Get recent alcohol logs.
+        Get habits and recent completions.
         
         Returns:
-            str: Formatted string of recent alcohol consumption (last 10 entries)
+            str: Formatted string of habits and their completion stats
+        """
+        return "".join(self.render_habits())
+
+    def render_alcohol_log(self, max_lines=None):
+        """
+        Stream recent alcohol logs as text, one line per chunk.
+        
+        Args:
+            max_lines (int, optional): Stop after this many lines
+            
+        Yields:
+            str: Lines of the report (last 10 entries)
             
         Log Details:
             - Date
@@ -313,32 +573,62 @@ class PKMManager:
             - Optional notes
         """
         self.check_database()
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT date, drink_type, units, notes
-            FROM alcohol_logs
-            ORDER BY date DESC
-            LIMIT 10
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        if not rows:
-            return "No alcohol consumption logged yet."
-        
-        result = "Recent Alcohol Logs:\n\n"
-        for row in rows:
-            result += f"Date: {row[0]}\n"
-            result += f"Drink: {row[1]}\n"
-            result += f"Units: {row[2]}\n"
-            if row[3]:
-                result += f"Notes: {row[3]}\n"
-            result += "-" * 30 + "\n"
+        yield from _limit_lines(self._alcohol_log_lines(), max_lines)
+
+    def _alcohol_log_lines(self):
+        rows = self.repo.stream(AlcoholLog, limit=10, descending=True)
+        first = next(rows, None)
+        if first is None:
+            yield "No alcohol consumption logged yet."
+            return
         
-        return result
+        yield "Recent Alcohol Logs:\n"
+        yield "\n"
+        for row in itertools.chain([first], rows):
+            yield f"Date: {row.date}\n"
+            yield f"Drink: {row.drink_type}\n"
+            yield f"Units: {row.units}\n"
+            if row.notes:
+                yield f"Notes: {row.notes}\n"
+            yield "-" * 30 + "\n"
+
+    def get_alcohol_log(self):
+        """
+        Get recent alcohol logs.
+        
+        Returns:
+            str: Formatted string of recent alcohol consumption (last 10 entries)
+        """
+        return "".join(self.render_alcohol_log())
+
+    def render_recent_logs(self, max_lines=None):
+        """
+        Stream recent daily logs as text, reading each file line by line.
+        
+        Args:
+            max_lines (int, optional): Stop after this many lines
+            
+        Yields:
+            str: Lines of the report (last 5 entries, full content of each)
+        """
+        yield from _limit_lines(self._recent_logs_lines(), max_lines)
+
+    def _recent_logs_lines(self):
+        entries = self.daily_catalog.recent(5)
+        
+        if not entries:
+            yield "No daily logs found."
+            return
+        
+        yield "Recent Daily Logs:\n"
+        yield "\n"
+        for entry in entries:
+            yield f"=== {entry.date} ===\n"
+            with open(entry.path, 'r') as f:
+                yield from f
+            yield "\n"
+            yield "=" * 50 + "\n"
+            yield "\n"
 
     def get_recent_logs(self):
         """
@@ -350,22 +640,398 @@ class PKMManager:
         Note:
             Returns full content of each log file
         """
-        logs = []
-        for filename in sorted(os.listdir(self.daily_dir), reverse=True)[:5]:
-            if filename.endswith('.md'):
-                with open(os.path.join(self.daily_dir, filename), 'r') as f:
-                    logs.append((filename[:-3], f.read()))
+        return "".join(self.render_recent_logs())
+
+    def heatmap(self, year=None, habit_id=None):
+        """
+        Get per-day mood, work, alcohol and habit values for a whole year.
         
-        if not logs:
-            return "No daily logs found."
+        Args:
+            year (int, optional): Calendar year. Defaults to the current year.
+            habit_id (int, optional): Also include this habit's completions (0/1)
+            
+        Returns:
+            tuple: (etag, payload); see pkm.heatmap.HeatmapCache.get()
+            
+        Raises:
+            ValueError: If year is out of range
+            
+        Note:
+            Built from daily_rollup in one range read and cached until the
+            next write, so repeated requests only check the change counters.
+        """
+        self.check_database()
+        year = int(today()[:4]) if year is None else year
+        if not isinstance(year, int) or not 1 <= year <= 9998:
+            raise ValueError(f"year must be between 1 and 9998, got {year!r}")
+        return self.heatmaps.get(year, habit_id)
+
+    def render_heatmap(self, year=None, max_lines=None):
+        """
+        Stream a year's heatmaps as text grids (weekday rows, week columns).
         
-        result = "Recent Daily Logs:\n\n"
-        for date, content in logs:
-            result += f"=== {date} ===\n"
-            result += content + "\n"
-            result += "=" * 50 + "\n\n"
+        Args:
+            year (int, optional): Calendar year. Defaults to the current year.
+            max_lines (int, optional): Stop after this many lines
+            
+        Yields:
+            str: Lines of the report, one grid per metric
+        """
+        _, payload = self.heatmap(year)
+        yield from _limit_lines(self._heatmap_lines(payload), max_lines)
+
+    def _heatmap_lines(self, payload):
+        labels = {
+            'mood': 'Mood',
+            'work': 'Work Hours',
+            'alcohol': 'Alcohol Units',
+            'habits': 'Habit Completions',
+        }
+        for name in HEATMAP_METRICS:
+            yield from grid_lines(payload['metrics'][name], payload['year'], labels[name])
+            yield "\n"
+
+    def resample(self, metrics, bucket='day', how='mean', start=None, end=None):
+        """
+        Aggregate metric series into day/week/month/quarter/year buckets.
         
-        return result
+        Args:
+            metrics (list): Names from pkm.resample.METRICS (mood, energy,
+                sleep, work, alcohol, habits, intraday_mood, intraday_energy)
+            bucket (str, optional): day, week, month, quarter or year. Defaults to day.
+            how (str, optional): sum, mean, min, max or count. Defaults to mean.
+            start (str, optional): First date (YYYY-MM-DD). Defaults to the first logged day.
+            end (str, optional): Last date (YYYY-MM-DD). Defaults to the last logged day.
+            
+        Returns:
+            tuple: (bucket start dates, dict of metric -> list of values);
+                None marks buckets without data
+                
+        Raises:
+            ValueError: For unknown metrics, buckets or aggregates, or invalid dates
+            
+        Note:
+            Served from the cached per-day columns of pkm.analytics, so any
+            range costs one daily_rollup read per write, not per request.
+            The range is clamped to the logged days, so buckets never start
+            before the first or end after the last one.
+        """
+        self.check_database()
+        _check_date(start, 'start')
+        _check_date(end, 'end')
+        metrics = list(metrics)
+        resampling.check_request(metrics, bucket, how)
+        start, end = self.analytics.span(start, end)
+        
+        def compute(conn):
+            first, columns = self.analytics.columns(start, end)
+            labels, series = [], {}
+            for name in metrics:
+                column, entries, total = resampling.METRICS[name]
+                ids, series[name] = resampling.resample_series(
+                    columns[column], columns[entries], first, bucket, how, total)
+                labels = ids
+            return resampling.bucket_labels(labels, bucket), series
+            
+        return self.analytics.cached(('resample', tuple(metrics), bucket, how, start, end), compute)
+
+    def chart_series(self, metric, start=None, end=None, points=downsample.DEFAULT_POINTS):
+        """
+        Get a metric's points for a chart, downsampled with LTTB.
+        
+        Args:
+            metric (str): A pkm.resample metric (one value per logged day) or
+                intraday_mood/intraday_energy (every sub-daily check-in)
+            start (str, optional): First date (YYYY-MM-DD)
+            end (str, optional): Last date (YYYY-MM-DD)
+            points (int, optional): Maximum points returned (3-5000). Defaults to 500.
+            
+        Returns:
+            tuple: (x as epoch milliseconds, y values, points before downsampling)
+            
+        Raises:
+            ValueError: For an unknown metric, invalid dates or point count
+            
+        Note:
+            The range is clamped to the logged days, and results are kept per
+            (metric, clamped range, points) in the bounded LRU of
+            pkm.analytics until the next write, so payload size, cost and
+            memory stay bounded however much history exists.
+        """
+        self.check_database()
+        _check_date(start, 'start')
+        _check_date(end, 'end')
+        downsample.check_request([metric], points)
+        start, end = self.analytics.span(start, end)
+        
+        def compute(conn):
+            if metric in downsample.INTRADAY_COLUMNS:
+                x, y = downsample.intraday_points(conn, metric, start, end)
+            else:
+                first, columns = self.analytics.columns(start, end)
+                x, y = downsample.daily_points(columns, first, metric)
+            keep = downsample.lttb(x, y, points)
+            return x[keep].tolist(), y[keep].tolist(), len(x)
+            
+        return self.analytics.cached(('chart', metric, start, end, points), compute)
+
+    def render_correlations(self, max_lines=None):
+        """
+        Stream the cross-metric correlation report as text.
+        
+        Args:
+            max_lines (int, optional): Stop after this many lines
+            
+        Yields:
+            str: Lines of the report: the correlation matrix over all logged
+                days, then next-day effects of alcohol, work and sleep on mood
+        """
+        self.check_database()
+        yield from _limit_lines(self._correlation_lines(), max_lines)
+
+    def _correlation_lines(self):
+        labels = {
+            'mood_rating': 'Mood',
+            'energy_level': 'Energy',
+            'sleep_hours': 'Sleep',
+            'alcohol_units': 'Alcohol',
+            'work_hours': 'Work',
+            'habit_completions': 'Habits',
+            'sub_mood_avg': 'Mood*',
+            'sub_energy_avg': 'Energy*',
+        }
+        names, matrix, counts = self.analytics.correlations()
+        if not counts.any():
+            yield "No data recorded yet."
+            return
+        
+        yield "Correlations (Pearson, over days with both values):\n"
+        yield "\n"
+        yield " " * 9 + "".join(f"{labels[name]:>8}" for name in names) + "\n"
+        for i, name in enumerate(names):
+            cells = "".join("       -" if matrix[i, j] != matrix[i, j] else f"{matrix[i, j]:8.2f}"
+                            for j in range(len(names)))
+            yield f"{labels[name]:<9}{cells}\n"
+        yield "* average of the day's mood check-ins\n"
+        
+        yield "\n"
+        yield "Next-Day Effects on Mood (lag 0 = same day):\n"
+        for leading in ('alcohol_units', 'work_hours', 'sleep_hours'):
+            lags = self.analytics.lagged(leading, 'mood_rating', max_lag=2)
+            cells = ", ".join(f"lag {lag}: {'-' if corr is None else f'{corr:+.2f}'}"
+                              for lag, corr, _ in lags)
+            yield f"{labels[leading]:<9}{cells}\n"
+
+    def recent_anomalies(self, days=14):
+        """
+        Get the unusual days of the last `days` days, newest first.
+        
+        Args:
+            days (int, optional): How far back to look. Defaults to 14.
+            
+        Returns:
+            list: pkm.anomalies.Anomaly records (date, metric, value,
+                baseline, score); baseline is the trailing window's median
+                
+        Note:
+            Only days logged since the previous call are scored; see
+            pkm.anomalies for when a full rescan is needed.
+        """
+        self.check_database()
+        return self.anomalies.recent(days)
+
+    def forecast(self, series, horizon=None):
+        """
+        Forecast daily mood/energy/sleep or weekly alcohol units.
+        
+        Args:
+            series (str): mood, energy, sleep or alcohol
+            horizon (int, optional): Days (1-90) or, for alcohol, weeks (1-26)
+                to forecast. Defaults to 14 days or 8 weeks.
+                
+        Returns:
+            dict: series, period ('day' or 'week'), labels (period start
+                dates), values and rmse (one-step error of the fit)
+                
+        Raises:
+            ValueError: For an unknown series or a horizon out of range
+            
+        Note:
+            Served from the stored Holt-Winters state (see pkm.forecast), so
+            a forecast never refits the model.
+        """
+        self.check_database()
+        labels, values, rmse = self.forecasts.forecast(series, horizon)
+        period = FORECAST_SERIES[series][1]
+        return {'series': series, 'period': period, 'labels': labels, 'values': values, 'rmse': rmse}
+
+    def search(self, query, sources=None, start=None, end=None, limit=20, offset=0, markers=('[', ']')):
+        """
+        Full-text search across daily logs, notes and work descriptions.
+        
+        Args:
+            query (str): Words, "quoted phrases", prefix* terms and OR
+            sources (list, optional): Restrict to pkm.search.SOURCES names
+            start (str, optional): First date (YYYY-MM-DD)
+            end (str, optional): Last date (YYYY-MM-DD)
+            limit (int, optional): Results per page (1-200). Defaults to 20.
+            offset (int, optional): Results to skip. Defaults to 0.
+            markers (tuple, optional): Placed around each match in the snippets
+            
+        Returns:
+            tuple: (list of pkm.search.Hit, best first; total matches)
+            
+        Raises:
+            ValueError: For an empty query, unknown source, invalid dates or limit
+        """
+        self.check_database()
+        _check_date(start, 'start')
+        _check_date(end, 'end')
+        return self.search_index.search(query, sources, start, end, limit, offset, markers)
+
+    def render_search(self, query, max_lines=None):
+        """
+        Stream search results as text.
+        
+        Args:
+            query (str): See search()
+            max_lines (int, optional): Stop after this many lines
+            
+        Yields:
+            str: A header, then date, source and snippet for each of the
+                best 50 matches
+        """
+        yield from _limit_lines(self._search_lines(query), max_lines)
+
+    def _search_lines(self, query):
+        try:
+            hits, total = self.search(query, limit=50, markers=('»', '«'))
+        except ValueError as e:
+            yield f"{e}\n"
+            return
+        if not hits:
+            yield f"No matches for {query!r}.\n"
+            return
+        
+        yield f"{total} match(es) for {query!r}" + (", best 50:\n" if total > len(hits) else ":\n")
+        for hit in hits:
+            yield "\n"
+            yield f"{hit.date}  {hit.label}\n"
+            yield "  " + " ".join(hit.snippet.split()) + "\n"
+
+    def tasks(self, states=None, limit=100):
+        """
+        Get tasks from the daily logs, most recently listed first.
+        
+        Args:
+            states (list, optional): States to get (in_progress, planned,
+                completed). Defaults to the open ones: in_progress and planned.
+            limit (int, optional): Maximum tasks per state. Defaults to 100.
+            
+        Returns:
+            dict: State -> list of pkm.task_index.Task
+            
+        Raises:
+            ValueError: For an unknown state
+        """
+        self.check_database()
+        states = states or ['in_progress', 'planned']
+        for state in states:
+            check_task_state(state)
+        self.task_index.refresh()
+        return {state: self.task_index.tasks(state, limit) for state in states}
+
+    def render_tasks(self, max_lines=None):
+        """
+        Stream the open tasks as text.
+        
+        Args:
+            max_lines (int, optional): Stop after this many lines
+            
+        Yields:
+            str: In progress, then planned tasks with when they were first
+                and last listed
+        """
+        yield from _limit_lines(self._tasks_lines(), max_lines)
+
+    def _tasks_lines(self):
+        tasks = self.tasks()
+        if not any(tasks.values()):
+            yield "No open tasks in the daily logs."
+            return
+        
+        dates = self.daily_catalog.dates()
+        latest = dates[-1] if dates else None
+        for state, items in tasks.items():
+            yield f"{TASK_STATES[state]} ({len(items)}):\n"
+            for task in items:
+                since = f"since {task.first_seen}, {task.days} logs" if task.carried_over else f"on {task.first_seen}"
+                dropped = "" if task.last_seen == latest else f", last listed {task.last_seen}"
+                yield f"  - {task.text}  ({since}{dropped})\n"
+            yield "\n"
+
+    def tags(self, tag=None, limit=100):
+        """
+        Get the tags used in the daily logs, or the logs carrying one tag.
+        
+        Args:
+            tag (str, optional): Tag to list the notes of, with or without its #
+            limit (int, optional): Maximum tags (or notes for a tag). Defaults to 100.
+            
+        Returns:
+            list: (tag, number of notes) pairs, most used first; or the notes
+                carrying `tag`, newest first
+        """
+        self.check_database()
+        self.note_graph.refresh()
+        if tag is None:
+            return self.note_graph.tag_counts(limit)
+        return self.note_graph.notes_with_tag(tag, limit)
+
+    def note_links(self, note):
+        """
+        Get a note's tags, the notes it links to and the notes linking to it.
+        
+        Args:
+            note (str): Note name or daily log date
+            
+        Returns:
+            dict: note (its key), tags, links and backlinks
+        """
+        self.check_database()
+        self.note_graph.refresh()
+        return {
+            'note': note_key(note),
+            'tags': self.note_graph.tags(note),
+            'links': self.note_graph.links(note),
+            'backlinks': self.note_graph.backlinks(note),
+        }
+
+    def note_neighbourhood(self, note, depth=2):
+        """
+        Get the notes within `depth` links of a note and the links between them.
+        
+        Args:
+            note (str): Note name or daily log date
+            depth (int, optional): Maximum number of links (1-4). Defaults to 2.
+            
+        Returns:
+            dict: nodes, a list of {'note', 'depth', 'exists'} nearest first,
+                where exists is False for linked notes with no daily log; and
+                edges, a list of {'source', 'target'}
+            
+        Raises:
+            ValueError: For a depth out of range
+        """
+        check_graph_depth(depth)
+        self.check_database()
+        self.note_graph.refresh()
+        nodes, edges = self.note_graph.neighbourhood(note, depth)
+        logs = set(self.daily_catalog.dates())
+        return {
+            'nodes': [{'note': name, 'depth': distance, 'exists': name in logs} for name, distance in nodes],
+            'edges': [{'source': source, 'target': target} for source, target in edges],
+        }
 
     def query_database(self):
         """
@@ -381,46 +1047,131 @@ class PKMManager:
             - Alcohol log summary (entries and total units)
         """
         self.check_database()
+        # Running counts and sums kept by triggers; cached until the next write
         conn = self.get_db_connection()
-        cursor = conn.cursor()
+        try:
+            totals = self.stats.summary(conn)
+        finally:
+            conn.close()
         
         stats = []
         
         # Get metrics stats
-        cursor.execute('SELECT COUNT(*), AVG(mood_rating), AVG(energy_level), AVG(sleep_hours) FROM daily_metrics')
-        row = cursor.fetchone()
-        if row[0] > 0:
-            stats.append(f"Daily Metrics Entries: {row[0]}")
-            stats.append(f"Average Mood: {row[1]:.1f}/10")
-            stats.append(f"Average Energy: {row[2]:.1f}/10")
-            stats.append(f"Average Sleep: {row[3]:.1f} hours")
+        if totals['metrics_entries'] > 0:
+            stats.append(f"Daily Metrics Entries: {totals['metrics_entries']}")
+            stats.append(f"Average Mood: {totals['avg_mood']:.1f}/10")
+            stats.append(f"Average Energy: {totals['avg_energy']:.1f}/10")
+            stats.append(f"Average Sleep: {totals['avg_sleep']:.1f} hours")
         
         # Get habit stats
-        cursor.execute('SELECT COUNT(*) FROM habit_logs')
-        habits_completed = cursor.fetchone()[0]
-        stats.append(f"Total Habits Completed: {habits_completed}")
+        stats.append(f"Total Habits Completed: {totals['habits_completed']}")
         
         # Get work stats
-        cursor.execute('SELECT COUNT(*), SUM(total_hours) FROM work_logs')
-        row = cursor.fetchone()
-        if row[0] > 0:
-            stats.append(f"Work Log Entries: {row[0]}")
-            stats.append(f"Total Hours Worked: {row[1]:.1f}")
+        if totals['work_entries'] > 0:
+            stats.append(f"Work Log Entries: {totals['work_entries']}")
+            stats.append(f"Total Hours Worked: {totals['work_hours']:.1f}")
         
         # Get alcohol stats
-        cursor.execute('SELECT COUNT(*), SUM(units) FROM alcohol_logs')
-        row = cursor.fetchone()
-        if row[0] > 0:
-            stats.append(f"Alcohol Log Entries: {row[0]}")
-            stats.append(f"Total Units Consumed: {row[1]:.1f}")
+        if totals['alcohol_entries'] > 0:
+            stats.append(f"Alcohol Log Entries: {totals['alcohol_entries']}")
+            stats.append(f"Total Units Consumed: {totals['alcohol_units']:.1f}")
         
-        conn.close()
+        # Get daily log stats
+        logs = self.daily_catalog.entries()
+        if logs:
+            stats.append(f"Daily Logs: {len(logs)} ({sum(entry.words for entry in logs.values())} words)")
         
         if not stats:
             return "No data recorded yet."
         
+        # Get open task counts
+        task_counts = self.task_index.counts()
+        if any(task_counts.values()):
+            stats.append(f"Tasks: {task_counts['in_progress']} in progress, {task_counts['planned']} planned, "
+                         f"{task_counts['completed']} completed")
+        
+        # Get recent anomalies
+        anomalies = self.anomalies.recent(14)
+        if anomalies:
+            stats.append("")
+            stats.append("Unusual Days (Last 14 Days):")
+            for anomaly in anomalies:
+                stats.append(f"  {anomaly.date}  {anomaly.label}: {anomaly.value:g} "
+                             f"(usually {anomaly.baseline:g}, score {anomaly.score:+.1f})")
+        
         return "Database Statistics:\n\n" + "\n".join(stats)
 
+    def query_logs(self, table, start=None, end=None, cursor=None, page_size=50, descending=False):
+        """
+        Get one page of a log table, paginated by (date, id).
+        
+        Args:
+            table (str): daily_metrics, work_logs, alcohol_logs, habit_logs,
+                sub_daily_moods, daily_rollup or project_rollup
+            start (str, optional): First date (YYYY-MM-DD)
+            end (str, optional): Last date (YYYY-MM-DD)
+            cursor (str, optional): next_cursor from the previous page
+            page_size (int, optional): Rows per page (1-1000). Defaults to 50.
+            descending (bool, optional): Newest first. Defaults to False.
+            
+        Returns:
+            Page: (rows, next_cursor); next_cursor is None on the last page
+            
+        Raises:
+            ValueError: For an unknown table, invalid dates, cursor or page size
+            
+        Note:
+            Each page seeks directly past the previous page's last (date, id)
+            through the date index, so deep pages cost the same as the first.
+        """
+        self.check_database()
+        _check_date(start, 'start')
+        _check_date(end, 'end')
+        return self.repo.page(table, start, end, cursor, page_size, descending)
+
+    def iter_logs(self, table, start=None, end=None, page_size=500, descending=False):
+        """
+        Lazily iterate over every row of a log table in a date range.
+        
+        Rows are fetched one page at a time as the generator is consumed, so
+        memory stays bounded by page_size regardless of the range.
+        
+        Args:
+            table (str): See query_logs()
+            start (str, optional): First date (YYYY-MM-DD)
+            end (str, optional): Last date (YYYY-MM-DD)
+            page_size (int, optional): Rows fetched per query. Defaults to 500.
+            descending (bool, optional): Newest first. Defaults to False.
+            
+        Yields:
+            Typed records from pkm.repository
+        """
+        self.check_database()
+        _check_date(start, 'start')
+        _check_date(end, 'end')
+        yield from self.repo.iterate(table, start, end, page_size, descending)
+
+    def missing_logs(self, start=None, end=None, sources=PRESENCE_SOURCES):
+        """
+        Find days missing a markdown log, daily metrics or a work log.
+        
+        Args:
+            start (str, optional): First date (YYYY-MM-DD). Defaults to 364 days before end.
+            end (str, optional): Last date (YYYY-MM-DD). Defaults to today.
+            sources (tuple, optional): Any of 'markdown', 'daily_metrics', 'work_logs'
+            
+        Returns:
+            dict: Date string -> list of missing sources, in date order
+            
+        Note:
+            Answered from the calendar bitmaps (see pkm.calendar_index), so a
+            multi-year range is a few blob reads rather than a table scan.
+        """
+        self.check_database()
+        _check_date(start, 'start')
+        _check_date(end, 'end')
+        return self.calendar.incomplete_days(start, end, sources)
+
     def log_habit(self, habit_name, completed=True, notes=None):
         """
         Log a habit completion.
@@ -434,27 +1185,23 @@ class PKMManager:
             Creates habit if it doesn't exist
         """
         self.check_database()  # Check database before operation
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get or create habit
-        cursor.execute('''
-            INSERT OR IGNORE INTO habits (name, frequency)
-            VALUES (?, 'daily')
-        ''', (habit_name,))
-        
-        cursor.execute('SELECT id FROM habits WHERE name = ?', (habit_name,))
-        habit_id = cursor.fetchone()[0]
-        
-        # Log completion
-        cursor.execute('''
-            INSERT INTO habit_logs (habit_id, notes)
-            VALUES (?, ?)
-        ''', (habit_id, notes))
-        
-        conn.commit()
-        conn.close()
         
+        def write(cursor):
+            # Get or create habit
+            resolved = {}
+            habit_id = self._get_habit_id(cursor, habit_name, resolved)
+            
+            # Log completion
+            cursor.execute('''
+                INSERT INTO habit_logs (habit_id, notes)
+                VALUES (?, ?)
+            ''', (habit_id, notes))
+            cursor.execute('SELECT date(completed_at) FROM habit_logs WHERE id = ?', (cursor.lastrowid,))
+            return habit_id, cursor.fetchone()[0], resolved
+                
+        habit_id, day, resolved = self.run_write(write)
+        self._remember_habits(resolved)
+        self.streaks.record(habit_id, day, habit_name)
         print(f"Logged habit: {habit_name}")
 
     def log_alcohol(self, drink_type, units, notes=None):
@@ -467,17 +1214,15 @@ class PKMManager:
             notes (str, optional): Additional notes about consumption
         """
         self.check_database()  # Check database before operation
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO alcohol_logs (date, drink_type, units, notes)
-            VALUES (date('now'), ?, ?, ?)
-        ''', (drink_type, units, notes))
-        
-        conn.commit()
-        conn.close()
         
+        def write(cursor):
+            cursor.execute('''
+                INSERT INTO alcohol_logs (date, drink_type, units, notes)
+                VALUES (date('now'), ?, ?, ?)
+            ''', (drink_type, units, notes))
+            
+        self.run_write(write)
+        self.forecasts.update()
         print(f"Logged {units} units of {drink_type}")
 
     def log_work_hours(self, start_time, end_time=None, project=None, description=None):
@@ -501,17 +1246,13 @@ class PKMManager:
         end = datetime.strptime(end_time, '%Y-%m-%d %H:%M:%S')
         total_hours = (end - start).total_seconds() / 3600
         
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO work_logs (date, start_time, end_time, project, description, total_hours)
-            VALUES (date(?), ?, ?, ?, ?, ?)
-        ''', (start_time, start_time, end_time, project, description, total_hours))
-        
-        conn.commit()
-        conn.close()
-        
+        def write(cursor):
+            cursor.execute('''
+                INSERT INTO work_logs (date, start_time, end_time, project, description, total_hours)
+                VALUES (date(?), ?, ?, ?, ?, ?)
+            ''', (start_time, start_time, end_time, project, description, total_hours))
+            
+        self.run_write(write)
         print(f"Logged {total_hours:.2f} hours of work")
 
     def log_work_hours_direct(self, hours, project=None, description=None):
@@ -529,17 +1270,13 @@ class PKMManager:
         self.check_database()  # Check database before operation
         now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO work_logs (date, start_time, end_time, project, description, total_hours)
-            VALUES (date(?), ?, ?, ?, ?, ?)
-        ''', (now, now, now, project, description, hours))
-        
-        conn.commit()
-        conn.close()
-        
+        def write(cursor):
+            cursor.execute('''
+                INSERT INTO work_logs (date, start_time, end_time, project, description, total_hours)
+                VALUES (date(?), ?, ?, ?, ?, ?)
+            ''', (now, now, now, project, description, hours))
+            
+        self.run_write(write)
         print(f"Logged {hours:.2f} hours of work")
 
     def log_daily_metrics(self, mood, energy, sleep_hours, notes=None):
@@ -556,16 +1293,280 @@ class PKMManager:
             Replaces existing metrics for current date if any exist
         """
         self.check_database()  # Check database before operation
+        
+        def write(cursor):
+            cursor.execute('''
+                INSERT INTO daily_metrics
+                (date, mood_rating, energy_level, sleep_hours, notes)
+                VALUES (date('now'), ?, ?, ?, ?)
+                ON CONFLICT (date) DO UPDATE SET
+                    mood_rating = excluded.mood_rating,
+                    energy_level = excluded.energy_level,
+                    sleep_hours = excluded.sleep_hours,
+                    notes = excluded.notes,
+                    logged_at = CURRENT_TIMESTAMP
+            ''', (mood, energy, sleep_hours, notes))
+            
+        self.run_write(write)
+        self.forecasts.update()
+        print("Logged daily metrics")
+
+    def attach_writer(self, writer):
+        """
+        Route all writes through a single-writer queue.
+        
+        Args:
+            writer (WriteQueue): Writer owning the process's write connection,
+                or None to go back to committing on pooled connections
+        """
+        self.writer = writer
+
+    def run_write(self, fn, timeout=WRITE_TIMEOUT):
+        """
+        Run a mutation and commit it.
+        
+        Args:
+            fn (callable): Called as fn(cursor); must not commit
+            timeout (float, optional): Seconds to wait for the writer's group
+                commit. Defaults to pkm.writer.WRITE_TIMEOUT.
+            
+        Returns:
+            Whatever fn returns
+            
+        Raises:
+            concurrent.futures.TimeoutError: If the writer has not committed
+                the mutation in time (it may still be committed later)
+            
+        Note:
+            With a writer attached the mutation is queued and this blocks until
+            its group commit finishes; otherwise it commits on a pooled connection.
+        """
+        if self.writer is not None:
+            return self.writer.submit(fn).result(timeout)
+            
         conn = self.get_db_connection()
-        cursor = conn.cursor()
+        try:
+            result = fn(conn.cursor())
+            conn.commit()
+            return result
+        finally:
+            conn.close()
+
+    def execute_write(self, sql, params=()):
+        """
+        Run a single INSERT/UPDATE/DELETE statement through run_write().
         
-        cursor.execute('''
-            INSERT OR REPLACE INTO daily_metrics 
-            (date, mood_rating, energy_level, sleep_hours, notes)
-            VALUES (date('now'), ?, ?, ?, ?)
-        ''', (mood, energy, sleep_hours, notes))
+        Returns:
+            tuple: (rowcount, lastrowid)
+        """
+        def write(cursor):
+            cursor.execute(sql, params)
+            return cursor.rowcount, cursor.lastrowid
+            
+        return self.run_write(write)
+
+    def _write_batch(self, records, validate, write, label):
+        """
+        Validate records up front, then write the valid ones in one transaction.
         
-        conn.commit()
-        conn.close()
+        Args:
+            records (iterable): Batch records (dicts)
+            validate (callable): Maps a record to a parameter tuple, raising
+                ValueError/TypeError/KeyError for invalid records
+            write (callable): Writes a list of parameter tuples with a cursor
+            label (str): Description for the summary message
+            
+        Returns:
+            dict: {'inserted': int, 'errors': [(index, message), ...]}
+        """
+        self.check_database()
         
-        print("Logged daily metrics")
+        rows = []
+        errors = []
+        for index, record in enumerate(records):
+            try:
+                rows.append(validate(record))
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                errors.append((index, str(e)))
+                
+        if rows:
+            self.run_write(lambda cursor: write(cursor, rows))
+                
+        print(f"Logged {len(rows)} {label}" + (f" ({len(errors)} rejected)" if errors else ""))
+        return {'inserted': len(rows), 'errors': errors}
+
+    def log_habit_batch(self, records):
+        """
+        Log many habit completions in a single transaction.
+        
+        Args:
+            records (iterable): Dicts with keys:
+                - habit (str): Name of the habit (created if missing)
+                - completed_at (str, optional): YYYY-MM-DD HH:MM:SS, or
+                - date (str, optional): YYYY-MM-DD (logged at midnight)
+                - notes (str, optional)
+                
+        Returns:
+            dict: {'inserted': int, 'errors': [(index, message), ...]}
+        """
+        def validate(record):
+            name = _require(record, 'habit')
+            completed_at = _check_timestamp(record.get('completed_at'), 'completed_at')
+            if completed_at is None and record.get('date'):
+                completed_at = f"{_check_date(record['date'])} 00:00:00"
+            return (name, completed_at, record.get('notes'))
+            
+        resolved = {}
+        
+        def write(cursor, rows):
+            resolved.clear()
+            params = [(self._get_habit_id(cursor, name, resolved), completed_at, notes)
+                      for name, completed_at, notes in rows]
+            cursor.executemany('''
+                INSERT INTO habit_logs (habit_id, completed_at, notes)
+                VALUES (?, COALESCE(?, CURRENT_TIMESTAMP), ?)
+            ''', params)
+                
+        result = self._write_batch(records, validate, write, "habit completions")
+        # Only now is the write committed (_write_batch raises otherwise)
+        self._remember_habits(resolved)
+        return result
+
+    def log_alcohol_batch(self, records):
+        """
+        Log many alcohol entries in a single transaction.
+        
+        Args:
+            records (iterable): Dicts with keys:
+                - drink_type (str)
+                - units (float): Must be greater than 0
+                - date (str, optional): YYYY-MM-DD. Defaults to today.
+                - notes (str, optional)
+                
+        Returns:
+            dict: {'inserted': int, 'errors': [(index, message), ...]}
+        """
+        def validate(record):
+            return (
+                _check_date(record.get('date')),
+                _require(record, 'drink_type'),
+                _check_positive(_require(record, 'units'), 'units'),
+                record.get('notes'),
+            )
+            
+        def write(cursor, rows):
+            cursor.executemany('''
+                INSERT INTO alcohol_logs (date, drink_type, units, notes)
+                VALUES (COALESCE(?, date('now')), ?, ?, ?)
+            ''', rows)
+            
+        return self._write_batch(records, validate, write, "alcohol entries")
+
+    def log_work_hours_batch(self, records):
+        """
+        Log many work sessions (start/end time) in a single transaction.
+        
+        Args:
+            records (iterable): Dicts with keys:
+                - start_time (str): YYYY-MM-DD HH:MM:SS
+                - end_time (str, optional): YYYY-MM-DD HH:MM:SS. Defaults to now.
+                - project (str, optional)
+                - description (str, optional)
+                
+        Returns:
+            dict: {'inserted': int, 'errors': [(index, message), ...]}
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        def validate(record):
+            start_time = _check_timestamp(_require(record, 'start_time'), 'start_time')
+            end_time = _check_timestamp(record.get('end_time'), 'end_time') or now
+            start = datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S')
+            end = datetime.strptime(end_time, '%Y-%m-%d %H:%M:%S')
+            if end < start:
+                raise ValueError("end_time is before start_time")
+            total_hours = (end - start).total_seconds() / 3600
+            return (start_time, start_time, end_time, record.get('project'), record.get('description'), total_hours)
+            
+        def write(cursor, rows):
+            cursor.executemany('''
+                INSERT INTO work_logs (date, start_time, end_time, project, description, total_hours)
+                VALUES (date(?), ?, ?, ?, ?, ?)
+            ''', rows)
+            
+        return self._write_batch(records, validate, write, "work sessions")
+
+    def log_work_hours_direct_batch(self, records):
+        """
+        Log many direct work-hour entries in a single transaction.
+        
+        Args:
+            records (iterable): Dicts with keys:
+                - hours (float): Must be between 0 and 24
+                - date (str, optional): YYYY-MM-DD. Defaults to now.
+                - project (str, optional)
+                - description (str, optional)
+                
+        Returns:
+            dict: {'inserted': int, 'errors': [(index, message), ...]}
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        def validate(record):
+            hours = _check_positive(_require(record, 'hours'), 'hours', maximum=24)
+            date = _check_date(record.get('date'))
+            timestamp = f"{date} 00:00:00" if date else now
+            return (timestamp, timestamp, timestamp, record.get('project'), record.get('description'), hours)
+            
+        def write(cursor, rows):
+            cursor.executemany('''
+                INSERT INTO work_logs (date, start_time, end_time, project, description, total_hours)
+                VALUES (date(?), ?, ?, ?, ?, ?)
+            ''', rows)
+            
+        return self._write_batch(records, validate, write, "work entries")
+
+    def log_daily_metrics_batch(self, records):
+        """
+        Log daily metrics for many days in a single transaction.
+        
+        Args:
+            records (iterable): Dicts with keys:
+                - mood (int): 1-10
+                - energy (int): 1-10
+                - sleep_hours (float): 0-24
+                - date (str, optional): YYYY-MM-DD. Defaults to today.
+                - notes (str, optional)
+                
+        Returns:
+            dict: {'inserted': int, 'errors': [(index, message), ...]}
+            
+        Note:
+            Replaces existing metrics for any date in the batch
+        """
+        def validate(record):
+            sleep_hours = float(_require(record, 'sleep_hours'))
+            if not 0 <= sleep_hours <= 24:
+                raise ValueError("sleep_hours must be between 0 and 24")
+            return (
+                _check_date(record.get('date')),
+                _check_rating(_require(record, 'mood'), 'mood'),
+                _check_rating(_require(record, 'energy'), 'energy'),
+                sleep_hours,
+                record.get('notes'),
+            )
+            
+        def write(cursor, rows):
+            cursor.executemany('''
+                INSERT INTO daily_metrics
+                (date, mood_rating, energy_level, sleep_hours, notes)
+                VALUES (COALESCE(?, date('now')), ?, ?, ?, ?)
+                ON CONFLICT (date) DO UPDATE SET
+                    mood_rating = excluded.mood_rating,
+                    energy_level = excluded.energy_level,
+                    sleep_hours = excluded.sleep_hours,
+                    notes = excluded.notes,
+                    logged_at = CURRENT_TIMESTAMP
+            ''', rows)
+            
+        return self._write_batch(records, validate, write, "daily metrics")
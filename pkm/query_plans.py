@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Query Plan Regression Check
+
+Extracts every literal SQL statement passed to execute(), executemany() or
+execute_write() in the modules listed in SOURCES, plus the generated query
+shapes from pkm.repository and the SQL of the cache and index modules
+(pkm.stats, pkm.streaks, pkm.calendar_index, pkm.heatmap, pkm.analytics,
+pkm.downsample, pkm.anomalies, pkm.forecast, pkm.search,
+pkm.daily_catalog, pkm.render_cache, pkm.markdown_sync, pkm.task_index,
+pkm.note_graph), runs EXPLAIN QUERY PLAN for each against a generated
+multi-year demo database, and fails if any statement scans a table without
+an index.
+
+Covering-index scans (SCAN t USING COVERING INDEX ...) are accepted; a bare
+"SCAN t" is a failure unless the table is listed in ALLOWED_SCANS.
+
+Usage:
+    python3 -m pkm.query_plans            # 10 years of demo data
+    python3 -m pkm.query_plans --years 2
+"""
+
+import argparse
+import ast
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+from . import (analytics, anomalies, calendar_index, daily_catalog, downsample, forecast, heatmap, markdown_sync,
+               migrations, note_graph, render_cache, repository, search, stats, streaks, task_index)
+from .benchmark_db import build_demo_database
+
+PKM_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose SQL is checked
+SOURCES = [
+    os.path.join(PKM_DIR, 'pkm_manager.py'),
+    os.path.join(PKM_DIR, 'web', 'app.py'),
+]
+
+# Tables that may be scanned in full, with the reason
+ALLOWED_SCANS = {
+    'habits': 'dimension table; every habit is listed',
+    'daily_rollup': 'one row per day; all-time summaries read every day',
+    'project_rollup': 'one row per day and project; all-time summaries read every row',
+    'calendar_pending': 'queue of days touched since the last calendar query; drained as a whole',
+    'anomaly_state': 'one row per detected metric; loaded as a whole',
+    'forecast_state': 'one row per forecast series; loaded as a whole',
+    'search_files': 'one row per daily markdown log; compared with the catalog as a whole',
+    'daily_files': 'one row per daily markdown log; loaded as a whole once per process',
+    'markdown_sync': 'one row per daily markdown log; compared with the catalog as a whole',
+    'note_tags': 'tag counts read the whole inverted index, in primary key (tag) order',
+    'hood': 'the recursive CTE of a note neighbourhood; each step searches note_links by index',
+}
+
+SCAN_PATTERN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+
+def collect_statements(paths=SOURCES):
+    """
+    Find literal SQL passed to execute()/executemany()/execute_write().
+
+    Returns:
+        list: (location, sql) tuples
+    """
+    statements = []
+    for path in paths:
+        with open(path, 'r') as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)):
+                continue
+            if node.func.attr not in ('execute', 'executemany', 'execute_write') or not node.args:
+                continue
+            arg = node.args[0]
+            if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                location = f"{os.path.relpath(path, PKM_DIR)}:{node.lineno}"
+                statements.append((location, ' '.join(arg.value.split())))
+    return statements
+
+
+def explain(conn, sql):
+    """Return the EXPLAIN QUERY PLAN detail lines for a statement."""
+    params = (None,) * sql.count('?')
+    rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+    return [row[3] for row in rows]
+
+
+def full_scans(plan, tables):
+    """Return the tables a plan scans without using an index."""
+    scanned = []
+    for detail in plan:
+        match = SCAN_PATTERN.match(detail)
+        if not match:
+            continue
+        # SCAN details name the alias when one is used; resolve it back to a table
+        name = match.group(1)
+        table = tables.get(name, name)
+        if table not in ALLOWED_SCANS:
+            scanned.append(table)
+    return scanned
+
+
+def table_aliases(sql, known_tables):
+    """Map aliases used in FROM/JOIN clauses to their table names."""
+    aliases = {}
+    for table, alias in re.findall(r'(?:FROM|JOIN)\s+(\w+)\s+(?:AS\s+)?(\w+)', sql, re.IGNORECASE):
+        if table in known_tables:
+            aliases[alias] = table
+    return aliases
+
+
+def check(conn, statements):
+    """
+    Explain every statement and collect failures.
+
+    Returns:
+        list: (location, sql, scanned tables, plan) for each failing statement
+    """
+    known_tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    failures = []
+    for location, sql in statements:
+        plan = explain(conn, sql)
+        scanned = full_scans(plan, table_aliases(sql, known_tables))
+        if scanned:
+            failures.append((location, sql, scanned, plan))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail on full table scans in PKM queries')
+    parser.add_argument('--years', type=float, default=10, help='Years of demo data to generate')
+    parser.add_argument('--db', help='Check against an existing database instead of demo data')
+    args = parser.parse_args()
+
+    statements = collect_statements()
+    statements += [(f"repository ({label})", sql) for label, sql in repository.plan_statements()]
+    statements += [('stats (version)', stats.VERSION_SQL), ('stats (summary)', stats.STATS_SQL)]
+    statements += [('streaks (load)', streaks.LOAD_SQL), ('streaks (habits)', streaks.HABITS_SQL),
+                   ('streaks (version)', streaks.VERSION_SQL)]
+    statements += [(f"calendar_index (recompute {source})", sql)
+                   for source, sql in calendar_index.RECOMPUTE_SQL.items()]
+    statements += [('calendar_index (bitmap)', calendar_index.BITMAP_SQL)]
+    statements += [('heatmap (year)', heatmap.YEAR_SQL)]
+    statements += [('analytics (load)', analytics.LOAD_SQL), ('analytics (version)', analytics.VERSION_SQL),
+                   ('analytics (span)', analytics.SPAN_SQL)]
+    statements += [(f"downsample ({metric})", sql) for metric, sql in downsample.INTRADAY_SQL.items()]
+    statements += [('anomalies (state)', anomalies.STATE_SQL), ('anomalies (first day)', anomalies.FIRST_DAY_SQL),
+                   ('anomalies (recent)', anomalies.RECENT_SQL)]
+    statements += [('forecast (state)', forecast.STATE_SQL), ('forecast (version)', forecast.VERSION_SQL)]
+    statements += [('search (match)', search.SEARCH_SQL.format(sources='')),
+                   ('search (count)', search.COUNT_SQL.format(sources='')), ('search (files)', search.FILES_SQL)]
+    statements += [('daily_catalog (load)', daily_catalog.CATALOG_SQL)]
+    statements += [('render_cache (lookup)', render_cache.LOOKUP_SQL)]
+    statements += [('markdown_sync (state)', markdown_sync.STATE_SQL), ('markdown_sync (sha1)', markdown_sync.SHA_SQL)]
+    statements += [(f"markdown_sync (delete {source})", sql) for source, sql in markdown_sync.DELETE_SQL.items()]
+    statements += [('task_index (tasks)', task_index.TASKS_SQL), ('task_index (counts)', task_index.COUNTS_SQL),
+                   ('task_index (day)', task_index.DAY_TASKS_SQL), ('task_index (refresh)', task_index.REFRESH_SQL)]
+    statements += [('note_graph (tag notes)', note_graph.TAG_NOTES_SQL), ('note_graph (tags)', note_graph.TAG_COUNTS_SQL),
+                   ('note_graph (note tags)', note_graph.NOTE_TAGS_SQL), ('note_graph (links)', note_graph.LINKS_SQL),
+                   ('note_graph (backlinks)', note_graph.BACKLINKS_SQL),
+                   ('note_graph (neighbourhood)', note_graph.NEIGHBOURHOOD_SQL), ('note_graph (edges)', note_graph.EDGES_SQL)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        if db_path is None:
+            db_path = os.path.join(tmp, 'plans.db')
+            print(f"Generating {args.years:g} years of demo data...")
+            build_demo_database(db_path, args.years)
+
+        conn = sqlite3.connect(db_path)
+        migrations.migrate(conn, log=lambda msg: None)
+        failures = check(conn, statements)
+        conn.close()
+
+    for location, sql, scanned, plan in failures:
+        print(f"\nFULL SCAN of {', '.join(scanned)} at {location}")
+        print(f"  {sql}")
+        for detail in plan:
+            print(f"    {detail}")
+
+    print(f"\nChecked {len(statements)} statements: {len(failures)} full table scan(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
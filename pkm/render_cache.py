@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Markdown Render Cache
+
+Caches the HTML of rendered markdown files in two tiers: an in-memory LRU
+per process and the rendered_markdown table (migration 0012), which
+survives restarts. Entries are keyed by file path and the SHA-1 of the
+source text, so an edit made by any program is never served stale; code
+that writes a log still calls invalidate() so the old HTML is dropped
+rather than left to age out.
+
+Every lookup is counted in `stats` and reported to the optional `hook`
+callable as hook(event, path, seconds), where event is 'memory', 'db' or
+'render' and seconds is the time spent rendering (0 for hits).
+
+Usage:
+    cache = RenderCache(pkm)
+    html = cache.render(path, text)
+    cache.invalidate(path)
+    cache.warm_in_background(5)
+    print(cache.summary()['hit_rate'])
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import markdown
+
+MARKDOWN_EXTENSIONS = ('fenced_code', 'tables')
+
+# Rows rendered by another markdown version or extension set are not reused
+RENDERER = f"markdown {markdown.__version__}: {', '.join(MARKDOWN_EXTENSIONS)}"
+
+LOOKUP_SQL = 'SELECT html FROM rendered_markdown WHERE path = ? AND sha1 = ? AND renderer = ?'
+
+
+def render_markdown(text):
+    """Render markdown the way the daily log views display it."""
+    return markdown.markdown(text, extensions=list(MARKDOWN_EXTENSIONS))
+
+
+def store(cursor, rows):
+    """Save (path, sha1, html) renders inside the caller's transaction."""
+    cursor.executemany('''
+        INSERT INTO rendered_markdown (path, sha1, renderer, html) VALUES (?, ?, ?, ?)
+        ON CONFLICT (path) DO UPDATE SET
+            sha1 = excluded.sha1, renderer = excluded.renderer, html = excluded.html
+    ''', [(path, sha1, RENDERER, html) for path, sha1, html in rows])
+
+
+class RenderCache:
+    """
+    Two-tier cache of rendered markdown.
+
+    Attributes:
+        pkm (PKMManager): Manager whose pool, writer and base_dir are used
+        max_entries (int): Renders kept in memory
+        stats (dict): Counters for memory hits, database hits, renders and
+            total render seconds
+        hook (callable): Optional hook(event, path, seconds) called per lookup
+    """
+
+    def __init__(self, pkm, max_entries=64):
+        self.pkm = pkm
+        self.max_entries = max_entries
+        self.stats = {'memory': 0, 'db': 0, 'render': 0, 'render_seconds': 0.0}
+        self.hook = None
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # path -> (sha1, html), least recently used first
+
+    def _key(self, path):
+        # Stored paths are relative so the table survives moving the project
+        return os.path.relpath(os.path.abspath(path), self.pkm.base_dir)
+
+    def _record(self, event, path, seconds=0.0):
+        with self._lock:
+            self.stats[event] += 1
+            self.stats['render_seconds'] += seconds
+        if self.hook is not None:
+            self.hook(event, path, seconds)
+
+    def _remember(self, key, sha1, html):
+        with self._lock:
+            self._memory[key] = (sha1, html)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def render_many(self, documents):
+        """
+        Render several markdown files, reusing cached HTML where possible.
+
+        Args:
+            documents (list): (path, text) pairs
+
+        Returns:
+            list: HTML for each document, in order
+        """
+        results = [None] * len(documents)
+        pending = []  # (index, path, key, sha1, text) missing from memory
+        for index, (path, text) in enumerate(documents):
+            key = self._key(path)
+            sha1 = hashlib.sha1(text.encode('utf-8')).hexdigest()
+            with self._lock:
+                cached = self._memory.get(key)
+                if cached is not None and cached[0] == sha1:
+                    self._memory.move_to_end(key)
+                    results[index] = cached[1]
+            if results[index] is not None:
+                self._record('memory', path)
+            else:
+                pending.append((index, path, key, sha1, text))
+        if not pending:
+            return results
+
+        # Get stored renders for whatever memory did not have
+        conn = self.pkm.get_db_connection()
+        try:
+            stored = [conn.execute(LOOKUP_SQL, (key, sha1, RENDERER)).fetchone()
+                      for _, _, key, sha1, _ in pending]
+        finally:
+            conn.close()
+
+        rendered = []
+        for (index, path, key, sha1, text), row in zip(pending, stored):
+            if row is not None:
+                results[index] = row[0]
+                self._record('db', path)
+            else:
+                started = time.perf_counter()
+                results[index] = render_markdown(text)
+                self._record('render', path, time.perf_counter() - started)
+                rendered.append((key, sha1, results[index]))
+            self._remember(key, sha1, results[index])
+
+        if rendered:
+            self.pkm.run_write(lambda cursor: store(cursor, rendered))
+        return results
+
+    def render(self, path, text):
+        """
+        Render one markdown file, reusing cached HTML where possible.
+
+        Args:
+            path (str): File the text was read from
+            text (str): Current content of the file
+
+        Returns:
+            str: Rendered HTML
+        """
+        return self.render_many([(path, text)])[0]
+
+    def invalidate(self, path):
+        """Drop a file's cached HTML from both tiers after writing it."""
+        key = self._key(path)
+        with self._lock:
+            self._memory.pop(key, None)
+        self.pkm.run_write(lambda cursor: cursor.execute('DELETE FROM rendered_markdown WHERE path = ?', (key,)))
+
+    def clear(self):
+        """Drop every cached render from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        self.pkm.run_write(lambda cursor: cursor.execute('DELETE FROM rendered_markdown'))
+
+    def warm(self, count):
+        """
+        Load (or render) the `count` most recent daily logs into memory.
+
+        Returns:
+            int: Logs warmed
+        """
+        documents = []
+        for entry in self.pkm.daily_catalog.recent(count):
+            try:
+                with open(entry.path, 'r') as f:
+                    documents.append((entry.path, f.read()))
+            except FileNotFoundError:
+                continue  # Removed since it was cataloged
+        self.render_many(documents)
+        return len(documents)
+
+    def warm_in_background(self, count):
+        """
+        Run warm() on a daemon thread so startup does not wait for it.
+
+        Returns:
+            threading.Thread: The started thread
+        """
+        thread = threading.Thread(target=self.warm, args=(count,), name='pkm-render-warm', daemon=True)
+        thread.start()
+        return thread
+
+    def summary(self):
+        """
+        Get hit rate and render time so far.
+
+        Returns:
+            dict: lookups, hit_rate (memory and database hits over lookups, or
+                None before the first lookup), memory_hits, db_hits, renders,
+                avg_render_ms and cached (renders held in memory)
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            cached = len(self._memory)
+        hits = stats['memory'] + stats['db']
+        lookups = hits + stats['render']
+        return {
+            'lookups': lookups,
+            'hit_rate': round(hits / lookups, 4) if lookups else None,
+            'memory_hits': stats['memory'],
+            'db_hits': stats['db'],
+            'renders': stats['render'],
+            'avg_render_ms': round(stats['render_seconds'] * 1000 / stats['render'], 3) if stats['render'] else None,
+            'cached': cached,
+        }
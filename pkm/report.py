@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Text Reports
+
+Prints the PKMManager text reports to stdout, writing each line as soon as
+it is rendered instead of building the whole report first.
+
+Usage:
+    python3 -m pkm.report metrics
+    python3 -m pkm.report logs --lines 200
+    python3 -m pkm.report search knee '"long run"'
+"""
+
+import argparse
+import os
+import sys
+
+from .pkm_manager import PKMManager
+
+REPORTS = {
+    'metrics': 'render_metrics',
+    'work': 'render_work_log',
+    'habits': 'render_habits',
+    'alcohol': 'render_alcohol_log',
+    'logs': 'render_recent_logs',
+    'heatmap': 'render_heatmap',
+    'correlations': 'render_correlations',
+    'search': 'render_search',
+    'tasks': 'render_tasks',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print a PKM text report')
+    parser.add_argument('report', choices=list(REPORTS))
+    parser.add_argument('terms', nargs='*', help='Search query (search report only)')
+    parser.add_argument('--lines', type=int, help='Maximum number of lines to print')
+    args = parser.parse_args()
+    if args.report == 'search' and not args.terms:
+        parser.error('the search report needs a query')
+
+    pkm = PKMManager()
+    render = getattr(pkm, REPORTS[args.report])
+    options = {'query': ' '.join(args.terms)} if args.report == 'search' else {}
+    try:
+        for line in render(max_lines=args.lines, **options):
+            sys.stdout.write(line)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Output piped into head/less that exited early; silence the flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+if __name__ == "__main__":
+    main()
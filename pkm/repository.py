@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+Repository Module
+
+Typed, read-side access to the PKM log tables. Every front end (web,
+Textual, curses) reads rows through the same parameterized range queries
+here instead of re-selecting and re-shaping columns by position.
+
+Rows are returned as compact record types: namedtuple subclasses with
+empty __slots__, so each row is a plain tuple (no per-instance __dict__)
+with named field access. Cursors build them directly through a row factory,
+and the SELECT list for each record is generated from its field names.
+
+Longer histories are read with keyset pagination on (date, id): each page
+continues strictly after the last row of the previous one through the date
+index, so page N costs the same as page 1 (no OFFSET scans).
+
+Usage:
+    repo = Repository(pkm)
+    for log in repo.work_logs(start=days_ago(7), descending=True):
+        print(log.date, log.project, log.total_hours)
+
+    page = repo.page('work_logs', start='2020-01-01', page_size=100)
+    page = repo.page('work_logs', start='2020-01-01', cursor=page.next_cursor)
+"""
+
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+
+def today():
+    """Current date as YYYY-MM-DD, matching SQLite's date('now') (UTC)."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+
+def days_ago(days):
+    """Date `days` before today as YYYY-MM-DD, matching date('now', '-N days')."""
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+class DailyMetric(namedtuple('DailyMetric', 'id date mood_rating energy_level sleep_hours notes')):
+    __slots__ = ()
+    SOURCE = 'daily_metrics'
+    DATE_COLUMN = 'date'
+
+
+class WorkLog(namedtuple('WorkLog', 'id date project description total_hours start_time end_time')):
+    __slots__ = ()
+    SOURCE = 'work_logs'
+    DATE_COLUMN = 'date'
+
+
+class AlcoholLog(namedtuple('AlcoholLog', 'id date drink_type units notes')):
+    __slots__ = ()
+    SOURCE = 'alcohol_logs'
+    DATE_COLUMN = 'date'
+
+
+class HabitLog(namedtuple('HabitLog', 'id habit_id habit completed_at notes')):
+    __slots__ = ()
+    SOURCE = 'habit_logs hl JOIN habits h ON h.id = hl.habit_id'
+    COLUMNS = ('hl.id', 'hl.habit_id', 'h.name', 'hl.completed_at', 'hl.notes')
+    DATE_COLUMN = 'hl.completed_at'
+    ID_COLUMN = 'hl.id'
+
+
+class SubDailyMood(namedtuple('SubDailyMood', 'id logged_at mood energy notes')):
+    __slots__ = ()
+    SOURCE = 'sub_daily_moods'
+    DATE_COLUMN = 'logged_at'
+
+
+class DailyRollup(namedtuple('DailyRollup', 'date metrics_logged mood_rating energy_level sleep_hours '
+                                         'work_entries work_hours alcohol_entries alcohol_units '
+                                         'habit_completions mood_entries mood_min mood_avg mood_max '
+                                         'energy_min energy_avg energy_max')):
+    __slots__ = ()
+    SOURCE = 'daily_rollup'
+    DATE_COLUMN = 'date'
+    ID_COLUMN = None  # One row per date
+
+
+class ProjectRollup(namedtuple('ProjectRollup', 'date project entries hours')):
+    __slots__ = ()
+    SOURCE = 'project_rollup'
+    DATE_COLUMN = 'date'
+    ID_COLUMN = 'project'
+
+
+MAX_PAGE_SIZE = 1000
+
+RECORD_TYPES = {
+    'daily_metrics': DailyMetric,
+    'work_logs': WorkLog,
+    'alcohol_logs': AlcoholLog,
+    'habit_logs': HabitLog,
+    'sub_daily_moods': SubDailyMood,
+    'daily_rollup': DailyRollup,
+    'project_rollup': ProjectRollup,
+}
+
+
+class Page(namedtuple('Page', 'rows next_cursor')):
+    """One page of records; next_cursor is None on the last page."""
+    __slots__ = ()
+
+
+def record_type_for(table):
+    """
+    Look up the record type for a table name.
+
+    Raises:
+        ValueError: If the table has no record type
+    """
+    try:
+        return RECORD_TYPES[table]
+    except KeyError:
+        raise ValueError(f"Unknown log table: {table}. Expected one of: {', '.join(RECORD_TYPES)}")
+
+
+def _key_columns(record_type):
+    id_column = getattr(record_type, 'ID_COLUMN', 'id')
+    return (record_type.DATE_COLUMN, id_column) if id_column else (record_type.DATE_COLUMN,)
+
+
+def _key_of(record_type, record):
+    # Key values sit at the positions of the key columns in the SELECT list
+    columns = list(getattr(record_type, 'COLUMNS', record_type._fields))
+    return [record[columns.index(column)] for column in _key_columns(record_type)]
+
+
+def encode_cursor(values):
+    """Encode the (date, id) key of the last row as an opaque URL-safe token."""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, size=2):
+    """
+    Decode a token from encode_cursor().
+
+    Args:
+        token (str): Token from a previous page
+        size (int, optional): Key columns of the record type: a date string,
+            then the id (an int, or the text key of rollup rows). Defaults to 2.
+
+    Raises:
+        ValueError: If the token is malformed or does not hold such a key
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid page cursor")
+    if not (isinstance(values, list) and len(values) == size and isinstance(values[0], str)
+            and all(isinstance(value, (int, str)) and not isinstance(value, bool) for value in values[1:])):
+        raise ValueError("Invalid page cursor")
+    return values
+
+
+def record_factory(record_type):
+    """Return a sqlite3 row factory that builds `record_type` instances."""
+    make = tuple.__new__
+    return lambda cursor, row: make(record_type, row)
+
+
+def select_clause(record_type):
+    """Build the SELECT ... FROM ... prefix for a record type."""
+    columns = getattr(record_type, 'COLUMNS', record_type._fields)
+    return f"SELECT {', '.join(columns)} FROM {record_type.SOURCE}"
+
+
+def range_sql(record_type, start=None, end=None, limit=None, descending=False):
+    """
+    Build the shared date-range query for a record type.
+
+    Bounds are inclusive dates (YYYY-MM-DD). The end bound compares against
+    the following day, so it works for DATE and TIMESTAMP columns alike and
+    stays a plain index range.
+
+    Returns:
+        tuple: (sql, params)
+    """
+    date_column = record_type.DATE_COLUMN
+    id_column = getattr(record_type, 'ID_COLUMN', 'id')
+    clauses = []
+    params = []
+
+    if start is not None:
+        clauses.append(f"{date_column} >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append(f"{date_column} < date(?, '+1 day')")
+        params.append(end)
+
+    sql = select_clause(record_type)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+
+    direction = 'DESC' if descending else 'ASC'
+    sql += f" ORDER BY {date_column} {direction}"
+    if id_column:
+        sql += f", {id_column} {direction}"
+
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    return sql, tuple(params)
+
+
+def page_sql(record_type, start=None, end=None, after=None, page_size=50, descending=False):
+    """
+    Build a keyset-paginated range query.
+
+    Args:
+        after (list, optional): Key of the last row already returned; the page
+            starts strictly after it in the requested order
+
+    Returns:
+        tuple: (sql, params)
+    """
+    date_column = record_type.DATE_COLUMN
+    key = _key_columns(record_type)
+    clauses = []
+    params = []
+
+    if start is not None:
+        clauses.append(f"{date_column} >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append(f"{date_column} < date(?, '+1 day')")
+        params.append(end)
+    if after is not None:
+        if len(after) != len(key):
+            raise ValueError("Invalid page cursor")
+        operator = '<' if descending else '>'
+        placeholders = ', '.join('?' * len(key))
+        clauses.append(f"({', '.join(key)}) {operator} ({placeholders})")
+        params.extend(after)
+
+    sql = select_clause(record_type)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+
+    direction = 'DESC' if descending else 'ASC'
+    sql += " ORDER BY " + ", ".join(f"{column} {direction}" for column in key)
+    sql += " LIMIT ?"
+    params.append(int(page_size))
+
+    return sql, tuple(params)
+
+
+def _date_bounds(start, end):
+    clauses = []
+    params = []
+    if start is not None:
+        clauses.append("date >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("date <= ?")
+        params.append(end)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    return where, tuple(params)
+
+
+def totals_sql(start=None, end=None):
+    """Build the daily_rollup summary query. Returns (sql, params)."""
+    where, params = _date_bounds(start, end)
+    sql = f'''
+        SELECT SUM(metrics_logged) AS metrics_days,
+               AVG(mood_rating) AS avg_mood,
+               AVG(energy_level) AS avg_energy,
+               AVG(sleep_hours) AS avg_sleep,
+               SUM(habit_completions) AS habit_completions,
+               SUM(work_entries) AS work_entries,
+               SUM(work_hours) AS work_hours,
+               SUM(alcohol_entries) AS alcohol_entries,
+               SUM(alcohol_units) AS alcohol_units
+        FROM daily_rollup{where}
+    '''
+    return sql, params
+
+
+def project_hours_sql(start=None, end=None):
+    """Build the per-project hours query over project_rollup. Returns (sql, params)."""
+    where, params = _date_bounds(start, end)
+    sql = f'''
+        SELECT project, SUM(hours) AS hours
+        FROM project_rollup{where}
+        GROUP BY project
+        ORDER BY hours DESC, project
+    '''
+    return sql, params
+
+
+class Repository:
+    """
+    Read-side access to PKM log tables through shared range queries.
+
+    Attributes:
+        pkm (PKMManager): Manager whose connection pool is used
+    """
+
+    def __init__(self, pkm):
+        self.pkm = pkm
+
+    def _fetch(self, record_type, sql, params=()):
+        conn = self.pkm.get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = record_factory(record_type)
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
+    def _column(self, sql, params=()):
+        conn = self.pkm.get_db_connection()
+        try:
+            return [row[0] for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def range(self, record_type, start=None, end=None, limit=None, descending=False):
+        """
+        Fetch records of one type within an inclusive date range.
+
+        Args:
+            record_type (type): One of the record classes in RECORD_TYPES
+            start (str, optional): First date (YYYY-MM-DD)
+            end (str, optional): Last date (YYYY-MM-DD)
+            limit (int, optional): Maximum rows
+            descending (bool, optional): Newest first. Defaults to False.
+
+        Returns:
+            list: Records ordered by date, then id
+        """
+        sql, params = range_sql(record_type, start, end, limit, descending)
+        return self._fetch(record_type, sql, params)
+
+    def stream(self, record_type, start=None, end=None, limit=None, descending=False):
+        """
+        Like range(), but yield records straight from the cursor.
+
+        The pooled connection is held until the generator is exhausted or
+        closed, so consume it promptly (or close() it) on the same thread.
+
+        Yields:
+            Records ordered by date, then id
+        """
+        sql, params = range_sql(record_type, start, end, limit, descending)
+        conn = self.pkm.get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = record_factory(record_type)
+            cursor.execute(sql, params)
+            yield from cursor
+        finally:
+            conn.close()
+
+    def page(self, table, start=None, end=None, cursor=None, page_size=50, descending=False):
+        """
+        Fetch one keyset-paginated page of a log table.
+
+        Args:
+            table (str): Table name (a key of RECORD_TYPES)
+            start (str, optional): First date (YYYY-MM-DD)
+            end (str, optional): Last date (YYYY-MM-DD)
+            cursor (str, optional): next_cursor from the previous page
+            page_size (int, optional): Rows per page. Defaults to 50.
+            descending (bool, optional): Newest first. Defaults to False.
+
+        Returns:
+            Page: Records and the cursor for the following page
+
+        Raises:
+            ValueError: For an unknown table, bad cursor or page size
+        """
+        record_type = record_type_for(table)
+        page_size = int(page_size)
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"Page size must be between 1 and {MAX_PAGE_SIZE}")
+        after = decode_cursor(cursor, len(_key_columns(record_type))) if cursor else None
+
+        # Fetch one extra row to learn whether another page follows
+        sql, params = page_sql(record_type, start, end, after, page_size + 1, descending)
+        rows = self._fetch(record_type, sql, params)
+        if len(rows) <= page_size:
+            return Page(rows, None)
+        rows = rows[:page_size]
+        return Page(rows, encode_cursor(_key_of(record_type, rows[-1])))
+
+    def iterate(self, table, start=None, end=None, page_size=500, descending=False):
+        """
+        Lazily yield every record of a table in the range, one page at a time.
+
+        Only one page is held in memory, and each page is its own short query,
+        so the pooled connection is not held between pages.
+
+        Yields:
+            Records of the table's type, ordered by date, then id
+        """
+        cursor = None
+        while True:
+            page = self.page(table, start, end, cursor, page_size, descending)
+            yield from page.rows
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    def daily_metrics(self, start=None, end=None, limit=None, descending=False):
+        return self.range(DailyMetric, start, end, limit, descending)
+
+    def work_logs(self, start=None, end=None, limit=None, descending=False):
+        return self.range(WorkLog, start, end, limit, descending)
+
+    def alcohol_logs(self, start=None, end=None, limit=None, descending=False):
+        return self.range(AlcoholLog, start, end, limit, descending)
+
+    def habit_logs(self, start=None, end=None, limit=None, descending=False):
+        return self.range(HabitLog, start, end, limit, descending)
+
+    def sub_daily_moods(self, start=None, end=None, limit=None, descending=False):
+        return self.range(SubDailyMood, start, end, limit, descending)
+
+    def daily_rollup(self, start=None, end=None, limit=None, descending=False):
+        return self.range(DailyRollup, start, end, limit, descending)
+
+    def project_rollup(self, start=None, end=None, limit=None, descending=False):
+        return self.range(ProjectRollup, start, end, limit, descending)
+
+    def totals(self, start=None, end=None):
+        """
+        Sum the daily rollup over an inclusive date range (all days by default).
+
+        Cost depends on the number of days in the range, not on raw row counts.
+
+        Returns:
+            dict: metrics_days, avg_mood, avg_energy, avg_sleep, habit_completions,
+                work_entries, work_hours, alcohol_entries, alcohol_units
+        """
+        sql, params = totals_sql(start, end)
+        conn = self.pkm.get_db_connection()
+        try:
+            cursor = conn.execute(sql, params)
+            names = [column[0] for column in cursor.description]
+            return dict(zip(names, cursor.fetchone()))
+        finally:
+            conn.close()
+
+    def project_hours(self, start=None, end=None):
+        """
+        Total hours per project over an inclusive date range, most hours first.
+
+        Returns:
+            list: (project, hours) tuples
+        """
+        sql, params = project_hours_sql(start, end)
+        conn = self.pkm.get_db_connection()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def metrics_for(self, date):
+        """
+        Get the daily metrics row for one date.
+
+        Returns:
+            DailyMetric: The row, or None if nothing was logged
+        """
+        rows = self._fetch(DailyMetric, select_clause(DailyMetric) + " WHERE date = ?", (date,))
+        return rows[0] if rows else None
+
+    def projects(self):
+        """Distinct non-empty project names, sorted."""
+        return self._column('SELECT DISTINCT project FROM work_logs WHERE project IS NOT NULL ORDER BY project')
+
+    def drink_types(self):
+        """Distinct drink types, sorted."""
+        return self._column('SELECT DISTINCT drink_type FROM alcohol_logs WHERE drink_type IS NOT NULL ORDER BY drink_type')
+
+    def habit_names(self):
+        """All habit names, sorted."""
+        return self._column('SELECT name FROM habits ORDER BY name')
+
+
+def plan_statements():
+    """
+    Representative SQL for every generated query shape (for pkm.query_plans).
+
+    Returns:
+        list: (label, sql) tuples
+    """
+    statements = []
+    for table, record_type in RECORD_TYPES.items():
+        for kwargs in ({'start': '', 'end': ''}, {'start': ''}, {'limit': 10}):
+            for descending in (False, True):
+                sql, _ = range_sql(record_type, descending=descending, **kwargs)
+                statements.append((f"{table} {sorted(kwargs)} desc={descending}", sql))
+        for descending in (False, True):
+            sql, _ = page_sql(record_type, '', '', [''] * len(_key_columns(record_type)), 50, descending)
+            statements.append((f"{table} page desc={descending}", sql))
+    statements.append(('daily_metrics by date', select_clause(DailyMetric) + " WHERE date = ?"))
+    statements.append(('daily_rollup totals', totals_sql('', '')[0]))
+    statements.append(('project_rollup hours', project_hours_sql('', '')[0]))
+    return statements
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Daily Rollup Module
+
+Rebuilds the materialized daily_rollup and project_rollup tables (created by
+migration 0003) from the raw log tables. Triggers keep both tables current
+on every write; a rebuild is only needed after bulk edits made with triggers
+disabled, or to verify the rollups against the source data.
+
+REBUILD_SQL is also the backfill of migration 0003 (see
+pkm.migrations.BACKFILLS), so a column change is made here only. It starts
+by emptying both tables, so days whose source rows are all gone are dropped
+too.
+
+Usage:
+    python3 -m pkm.manage rebuild-rollup [--db PATH]
+"""
+
+REBUILD_SQL = '''
+DELETE FROM daily_rollup;
+DELETE FROM project_rollup;
+
+INSERT INTO daily_rollup (date)
+SELECT date FROM daily_metrics
+UNION SELECT date FROM work_logs
+UNION SELECT date FROM alcohol_logs
+UNION SELECT date(completed_at) FROM habit_logs WHERE date(completed_at) IS NOT NULL
+UNION SELECT date(logged_at) FROM sub_daily_moods WHERE date(logged_at) IS NOT NULL;
+
+UPDATE daily_rollup
+SET metrics_logged = 1, mood_rating = m.mood_rating, energy_level = m.energy_level, sleep_hours = m.sleep_hours
+FROM daily_metrics m
+WHERE m.date = daily_rollup.date;
+
+UPDATE daily_rollup
+SET work_entries = w.entries, work_hours = w.hours
+FROM (SELECT date, COUNT(*) AS entries, COALESCE(SUM(total_hours), 0) AS hours
+      FROM work_logs GROUP BY date) w
+WHERE w.date = daily_rollup.date;
+
+UPDATE daily_rollup
+SET alcohol_entries = a.entries, alcohol_units = a.units
+FROM (SELECT date, COUNT(*) AS entries, COALESCE(SUM(units), 0) AS units
+      FROM alcohol_logs GROUP BY date) a
+WHERE a.date = daily_rollup.date;
+
+UPDATE daily_rollup
+SET habit_completions = h.completions
+FROM (SELECT date(completed_at) AS date, COUNT(*) AS completions
+      FROM habit_logs GROUP BY date(completed_at)) h
+WHERE h.date = daily_rollup.date;
+
+UPDATE daily_rollup
+SET mood_entries = s.entries,
+    mood_min = s.mood_min, mood_avg = s.mood_avg, mood_max = s.mood_max,
+    energy_min = s.energy_min, energy_avg = s.energy_avg, energy_max = s.energy_max
+FROM (SELECT date(logged_at) AS date, COUNT(*) AS entries,
+             MIN(mood) AS mood_min, AVG(mood) AS mood_avg, MAX(mood) AS mood_max,
+             MIN(energy) AS energy_min, AVG(energy) AS energy_avg, MAX(energy) AS energy_max
+      FROM sub_daily_moods GROUP BY date(logged_at)) s
+WHERE s.date = daily_rollup.date;
+
+INSERT INTO project_rollup (date, project, entries, hours)
+SELECT date, project, COUNT(*), COALESCE(SUM(total_hours), 0)
+FROM work_logs
+WHERE project IS NOT NULL
+GROUP BY date, project;
+'''
+
+
+def rebuild(conn):
+    """
+    Recompute both rollup tables from the raw log tables in one transaction.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        int: Number of days in daily_rollup after the rebuild
+    """
+    conn.executescript(f"BEGIN;\n{REBUILD_SQL}\nCOMMIT;")
+    return conn.execute('SELECT COUNT(*) FROM daily_rollup').fetchone()[0]
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Full-Text Search
+
+Searches the daily markdown logs and every free-text column (metrics,
+check-in, habit and alcohol notes, work descriptions, daily entries)
+through the FTS5 table search_index (migration 0010). Database rows are
+indexed by triggers as they are written; daily/*.md files are re-read only
+when their mtime or size changes, checked against pkm.daily_catalog on
+each search.
+
+Results are ranked with BM25 and come with a snippet whose matches are
+wrapped in caller-chosen markers.
+
+Query syntax: words must all appear (stemmed, case-insensitive), "quoted
+phrases" match in order, a trailing * matches a prefix, and OR between two
+terms matches either.
+
+Usage:
+    index = SearchIndex(pkm)
+    hits, total = index.search('"long run" knee*', limit=20)
+    for hit in hits:
+        print(hit.date, hit.label, hit.snippet)
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+
+from . import daily_catalog
+
+ROWID_STRIDE = 8  # rowid = id * ROWID_STRIDE + source code
+
+# Source -> (rowid code, label)
+SOURCES = {
+    'daily_metrics': (1, 'Metrics notes'),
+    'sub_daily_moods': (2, 'Mood check-in'),
+    'work_logs': (3, 'Work log'),
+    'habit_logs': (4, 'Habit notes'),
+    'alcohol_logs': (5, 'Alcohol notes'),
+    'daily_entries': (6, 'Daily entry'),
+    'markdown': (7, 'Daily log'),
+}
+
+# Re-index a table from scratch (see migration 0010 for the triggers)
+INDEX_SQL = {
+    'daily_metrics': "SELECT id * 8 + 1, notes, 'daily_metrics', date FROM daily_metrics WHERE notes != ''",
+    'sub_daily_moods': ("SELECT id * 8 + 2, notes, 'sub_daily_moods', date(logged_at) FROM sub_daily_moods "
+                        "WHERE notes != ''"),
+    'work_logs': "SELECT id * 8 + 3, description, 'work_logs', date FROM work_logs WHERE description != ''",
+    'habit_logs': "SELECT id * 8 + 4, notes, 'habit_logs', date(completed_at) FROM habit_logs WHERE notes != ''",
+    'alcohol_logs': "SELECT id * 8 + 5, notes, 'alcohol_logs', date FROM alcohol_logs WHERE notes != ''",
+    'daily_entries': "SELECT id * 8 + 6, content, 'daily_entries', date FROM daily_entries WHERE content != ''",
+}
+
+SEARCH_SQL = '''
+    SELECT rowid, source, date, snippet(search_index, 0, ?, ?, '...', ?), bm25(search_index)
+    FROM search_index
+    WHERE search_index MATCH ? AND (? IS NULL OR date >= ?) AND (? IS NULL OR date <= ?){sources}
+    ORDER BY rank
+    LIMIT ? OFFSET ?
+'''
+
+COUNT_SQL = '''
+    SELECT COUNT(*) FROM search_index
+    WHERE search_index MATCH ? AND (? IS NULL OR date >= ?) AND (? IS NULL OR date <= ?){sources}
+'''
+
+FILES_SQL = 'SELECT name, id, mtime_ns, size FROM search_files'
+
+SNIPPET_TOKENS = 16
+MAX_LIMIT = 200
+
+TOKEN_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+class Hit(namedtuple('Hit', 'source key date snippet score')):
+    """A search result; key is the row id (or search_files id for markdown)."""
+    __slots__ = ()
+
+    @property
+    def label(self):
+        return SOURCES[self.source][1]
+
+
+def to_match(query):
+    """
+    Translate a search box query into an FTS5 MATCH expression.
+
+    Every word and phrase is quoted, so punctuation and FTS5 keywords in the
+    text never reach the FTS5 parser; only a trailing * and a bare OR
+    between two terms keep their meaning (a bare AND is implied anyway).
+
+    Raises:
+        ValueError: If the query has no terms
+    """
+    terms = []
+    for phrase, word in TOKEN_PATTERN.findall(query):
+        if word == 'AND':
+            continue  # Terms are ANDed anyway
+        if word == 'OR':
+            if terms and terms[-1] != 'OR':
+                terms.append('OR')
+            continue
+        text = phrase if phrase else word
+        prefix = not phrase and len(word) > 1 and word.endswith('*')
+        text = text.rstrip('*') if prefix else text
+        if not text.strip():
+            continue
+        terms.append('"' + text.replace('"', '""') + '"' + ('*' if prefix else ''))
+    if terms and terms[-1] == 'OR':
+        terms.pop()
+    if not terms:
+        raise ValueError("Search query is empty")
+    return ' '.join(terms)
+
+
+def sync_markdown(cursor, daily_dir, files):
+    """
+    Bring the markdown part of the index in line with a directory scan.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the caller's write transaction
+        daily_dir (str): Directory of YYYY-MM-DD.md files
+        files (dict): Date -> (mtime_ns, size), as from daily_catalog.scan()
+
+    Returns:
+        int: Files (re)indexed or removed
+    """
+    code = SOURCES['markdown'][0]
+    known = {name: (file_id, mtime_ns, size) for name, file_id, mtime_ns, size in cursor.execute(FILES_SQL)}
+    changed = 0
+
+    files = {f'{date}.md': stat for date, stat in files.items()}
+    for name in known.keys() - files.keys():
+        file_id = known[name][0]
+        cursor.execute('DELETE FROM search_index WHERE rowid = ?', (file_id * ROWID_STRIDE + code,))
+        cursor.execute('DELETE FROM search_files WHERE id = ?', (file_id,))
+        changed += 1
+
+    for name, (mtime_ns, size) in files.items():
+        if name in known and known[name][1:] == (mtime_ns, size):
+            continue
+        try:
+            with open(os.path.join(daily_dir, name), 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+        except OSError:
+            continue  # Removed since the scan; the next scan drops it
+        cursor.execute('''
+            INSERT INTO search_files (name, mtime_ns, size) VALUES (?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET mtime_ns = excluded.mtime_ns, size = excluded.size
+        ''', (name, mtime_ns, size))
+        file_id = cursor.execute('SELECT id FROM search_files WHERE name = ?', (name,)).fetchone()[0]
+        rowid = file_id * ROWID_STRIDE + code
+        cursor.execute('DELETE FROM search_index WHERE rowid = ?', (rowid,))
+        cursor.execute('INSERT INTO search_index (rowid, body, source, date) VALUES (?, ?, ?, ?)',
+                       (rowid, text, 'markdown', name[:-3]))
+        changed += 1
+    return changed
+
+
+def rebuild(conn, daily_dir):
+    """
+    Re-index every table and markdown file from scratch.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        daily_dir (str): Directory of YYYY-MM-DD.md files
+
+    Returns:
+        int: Documents in the index
+    """
+    files = daily_catalog.scan(daily_dir)
+    cursor = conn.cursor()
+    cursor.execute('BEGIN')
+    try:
+        cursor.execute('DELETE FROM search_index')
+        cursor.execute('DELETE FROM search_files')
+        for sql in INDEX_SQL.values():
+            cursor.execute(f'INSERT INTO search_index (rowid, body, source, date) {sql}')
+        sync_markdown(cursor, daily_dir, files)
+        cursor.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return conn.execute('SELECT COUNT(*) FROM search_index').fetchone()[0]
+
+
+def check_sources(sources):
+    """
+    Validate source names for a search.
+
+    Raises:
+        ValueError: For an unknown source
+    """
+    for source in sources:
+        if source not in SOURCES:
+            raise ValueError(f"Unknown source {source!r}; expected one of {', '.join(SOURCES)}")
+
+
+class SearchIndex:
+    """
+    Ranked full-text search over logs and notes.
+
+    Attributes:
+        pkm (PKMManager): Manager whose pool, writer and daily_dir are used
+    """
+
+    def __init__(self, pkm):
+        self.pkm = pkm
+        self._lock = threading.Lock()
+        self._files = None  # Date -> (mtime_ns, size) as of the last sync
+
+    def refresh(self):
+        """Re-index daily/*.md files added, changed or removed since the last search."""
+        entries = self.pkm.daily_catalog.entries(check_files=True)
+        files = {date: (entry.mtime_ns, entry.size) for date, entry in entries.items()}
+        with self._lock:
+            if files == self._files:
+                return
+        self.pkm.run_write(lambda cursor: sync_markdown(cursor, self.pkm.daily_dir, files))
+        with self._lock:
+            self._files = files
+
+    def search(self, query, sources=None, start=None, end=None, limit=20, offset=0, markers=('[', ']')):
+        """
+        Find the best matches for a query.
+
+        Args:
+            query (str): Search box text (see the module docstring)
+            sources (list, optional): Restrict to these SOURCES. Defaults to all.
+            start (str, optional): First date (YYYY-MM-DD)
+            end (str, optional): Last date (YYYY-MM-DD)
+            limit (int, optional): Results per page (1-200). Defaults to 20.
+            offset (int, optional): Results to skip. Defaults to 0.
+            markers (tuple, optional): Text placed before and after each match
+                in the snippet. Defaults to square brackets.
+
+        Returns:
+            tuple: (list of Hit, total number of matches)
+
+        Raises:
+            ValueError: For an empty query, unknown source or limit out of range
+        """
+        match = to_match(query)
+        sources = list(sources or [])
+        check_sources(sources)
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_LIMIT}, got {limit}")
+        if offset < 0:
+            raise ValueError(f"offset must not be negative, got {offset}")
+
+        self.refresh()
+        source_filter = f" AND source IN ({', '.join('?' * len(sources))})" if sources else ''
+        filters = (match, start, start, end, end, *sources)
+        conn = self.pkm.get_db_connection()
+        try:
+            rows = conn.execute(SEARCH_SQL.format(sources=source_filter),
+                                (*markers, SNIPPET_TOKENS, *filters, limit, offset)).fetchall()
+            total = conn.execute(COUNT_SQL.format(sources=source_filter), filters).fetchone()[0]
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query: {e}")
+        finally:
+            conn.close()
+        return [Hit(source, rowid // ROWID_STRIDE, date, snippet, -score)
+                for rowid, source, date, snippet, score in rows], total
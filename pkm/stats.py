@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Statistics Cache Module
+
+Reads the all-time database summary from the trigger-maintained table_stats
+table (migration 0004) instead of scanning the log tables. Each tracked table
+has a change counter that its triggers bump on every write; StatsCache keeps
+the last summary in memory and only re-reads table_stats when the counters
+have moved, so repeated summaries cost one primary-key lookup per table.
+
+Change counters are used rather than PRAGMA data_version because
+data_version is per connection and does not move for a connection's own
+commits, while the pool hands out a different connection per thread.
+
+Usage:
+    cache = StatsCache()
+    summary = cache.summary(conn)
+    print(summary['work_entries'], summary['work_hours'])
+"""
+
+import threading
+
+VERSION_SQL = '''
+    SELECT table_name, changes FROM table_stats
+    WHERE table_name IN ('daily_metrics', 'habit_logs', 'work_logs', 'alcohol_logs')
+      AND column_name = '*'
+'''
+
+STATS_SQL = '''
+    SELECT table_name, column_name, value_count, value_sum FROM table_stats
+    WHERE table_name IN ('daily_metrics', 'habit_logs', 'work_logs', 'alcohol_logs')
+'''
+
+# Recompute every counter from the source tables; `changes` keeps increasing
+# so cached summaries are invalidated
+REBUILD_SQL = '''
+INSERT INTO table_stats (table_name, column_name, value_count, value_sum)
+SELECT 'daily_metrics', '*', COUNT(*), 0 FROM daily_metrics
+UNION ALL SELECT 'daily_metrics', 'mood_rating', COUNT(mood_rating), COALESCE(SUM(mood_rating), 0) FROM daily_metrics
+UNION ALL SELECT 'daily_metrics', 'energy_level', COUNT(energy_level), COALESCE(SUM(energy_level), 0) FROM daily_metrics
+UNION ALL SELECT 'daily_metrics', 'sleep_hours', COUNT(sleep_hours), COALESCE(SUM(sleep_hours), 0) FROM daily_metrics
+UNION ALL SELECT 'habit_logs', '*', COUNT(*), 0 FROM habit_logs
+UNION ALL SELECT 'work_logs', '*', COUNT(*), 0 FROM work_logs
+UNION ALL SELECT 'work_logs', 'total_hours', COUNT(total_hours), COALESCE(SUM(total_hours), 0) FROM work_logs
+UNION ALL SELECT 'alcohol_logs', '*', COUNT(*), 0 FROM alcohol_logs
+UNION ALL SELECT 'alcohol_logs', 'units', COUNT(units), COALESCE(SUM(units), 0) FROM alcohol_logs
+UNION ALL SELECT 'sub_daily_moods', '*', COUNT(*), 0 FROM sub_daily_moods WHERE true
+ON CONFLICT (table_name, column_name) DO UPDATE SET
+    value_count = excluded.value_count,
+    value_sum = excluded.value_sum,
+    changes = changes + 1;
+'''
+
+
+def _average(stats, table, column):
+    count, total = stats.get((table, column), (0, 0))
+    return total / count if count else None
+
+
+def build_summary(rows):
+    """
+    Turn table_stats rows into the summary dict.
+
+    Args:
+        rows (list): (table_name, column_name, value_count, value_sum) tuples
+
+    Returns:
+        dict: metrics_entries, avg_mood, avg_energy, avg_sleep,
+            habits_completed, work_entries, work_hours, alcohol_entries,
+            alcohol_units
+    """
+    stats = {(table, column): (count, total) for table, column, count, total in rows}
+    return {
+        'metrics_entries': stats.get(('daily_metrics', '*'), (0, 0))[0],
+        'avg_mood': _average(stats, 'daily_metrics', 'mood_rating'),
+        'avg_energy': _average(stats, 'daily_metrics', 'energy_level'),
+        'avg_sleep': _average(stats, 'daily_metrics', 'sleep_hours'),
+        'habits_completed': stats.get(('habit_logs', '*'), (0, 0))[0],
+        'work_entries': stats.get(('work_logs', '*'), (0, 0))[0],
+        'work_hours': stats.get(('work_logs', 'total_hours'), (0, 0))[1],
+        'alcohol_entries': stats.get(('alcohol_logs', '*'), (0, 0))[0],
+        'alcohol_units': stats.get(('alcohol_logs', 'units'), (0, 0))[1],
+    }
+
+
+class StatsCache:
+    """
+    In-memory summary validated against the table_stats change counters.
+
+    Attributes:
+        hits (int): Summaries served without re-reading table_stats
+        misses (int): Summaries rebuilt from table_stats
+    """
+
+    def __init__(self):
+        self._version = None
+        self._summary = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def summary(self, conn):
+        """
+        Get the all-time summary, re-reading table_stats only after writes.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+
+        Returns:
+            dict: See build_summary()
+        """
+        version = tuple(sorted(conn.execute(VERSION_SQL).fetchall()))
+        with self._lock:
+            if version == self._version:
+                self.hits += 1
+                return self._summary
+
+        summary = build_summary(conn.execute(STATS_SQL).fetchall())
+        with self._lock:
+            self._version = version
+            self._summary = summary
+            self.misses += 1
+        return summary
+
+    def invalidate(self):
+        """Forget the cached summary."""
+        with self._lock:
+            self._version = None
+            self._summary = None
+
+
+def rebuild(conn):
+    """
+    Recompute table_stats from the source tables in one transaction.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+    """
+    conn.executescript(f"BEGIN;\n{REBUILD_SQL}\nCOMMIT;")
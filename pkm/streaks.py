@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Habit Streak Engine
+
+Computes current and longest streaks and rolling completion rates per habit,
+honouring each habit's frequency: a daily habit needs a completion every
+day, a weekly habit once per ISO week (Monday-Sunday), a monthly habit once
+per calendar month.
+
+Each habit's completions are held as a sorted numpy array of unique days
+(days since 1970-01-01, UTC like SQLite's CURRENT_TIMESTAMP). Streaks and
+rates are vectorized over that array. log_habit() appends to the array
+directly; anything else that changes habit_logs is detected through the
+habit_logs change counter in table_stats and triggers a reload.
+
+Usage:
+    engine = StreakEngine(pkm)
+    for habit_id, name, frequency in engine.habits():
+        streak = engine.stats(habit_id)
+        print(name, streak.current, streak.longest, streak.rates)
+"""
+
+import threading
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+EPOCH_WEEKDAY_OFFSET = 3  # 1970-01-01 was a Thursday; shift so weeks start Monday
+
+# Rolling completion-rate windows, in periods of the habit's frequency
+RATE_WINDOWS = {
+    'daily': (7, 30),
+    'weekly': (4, 12),
+    'monthly': (3, 12),
+}
+
+PERIOD_LABELS = {
+    'daily': 'days',
+    'weekly': 'weeks',
+    'monthly': 'months',
+}
+
+LOAD_SQL = '''
+    SELECT habit_id, CAST(julianday(date(completed_at)) - 2440587.5 AS INTEGER)
+    FROM habit_logs
+    WHERE habit_id IS NOT NULL AND completed_at IS NOT NULL
+    ORDER BY habit_id, completed_at
+'''
+
+HABITS_SQL = 'SELECT id, name, frequency FROM habits ORDER BY name'
+
+VERSION_SQL = '''
+    SELECT changes FROM table_stats
+    WHERE table_name = 'habit_logs' AND column_name = '*'
+'''
+
+
+class HabitStreak(namedtuple('HabitStreak', 'frequency current longest rates last_day')):
+    """
+    Streak summary for one habit.
+
+    current and longest count periods (days, weeks or months); rates maps a
+    window length in periods to the fraction of those periods completed.
+    """
+    __slots__ = ()
+
+    @property
+    def unit(self):
+        return PERIOD_LABELS.get(self.frequency, 'days')
+
+
+def normalize_frequency(frequency):
+    """Map a habits.frequency value to daily/weekly/monthly (default daily)."""
+    frequency = (frequency or '').strip().lower()
+    return frequency if frequency in RATE_WINDOWS else 'daily'
+
+
+def epoch_day(value=None):
+    """Days since 1970-01-01 for a YYYY-MM-DD string (today in UTC by default)."""
+    if value is None:
+        value = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    return int(np.datetime64(value[:10], 'D').astype(np.int64))
+
+
+def to_periods(days, frequency):
+    """
+    Convert epoch days to period numbers for a frequency.
+
+    Args:
+        days (np.ndarray): Days since 1970-01-01
+        frequency (str): daily, weekly or monthly
+
+    Returns:
+        np.ndarray: Period numbers (consecutive periods differ by 1)
+    """
+    days = np.asarray(days, dtype=np.int64)
+    if frequency == 'weekly':
+        return (days + EPOCH_WEEKDAY_OFFSET) // 7
+    if frequency == 'monthly':
+        return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    return days
+
+
+def compute_streak(days, frequency, today=None):
+    """
+    Compute streaks and completion rates from completion days.
+
+    Args:
+        days (np.ndarray): Sorted unique days since 1970-01-01
+        frequency (str): daily, weekly or monthly
+        today (int, optional): Epoch day to evaluate at. Defaults to today.
+
+    Returns:
+        HabitStreak: The current streak counts the period in progress only
+            once it is completed; an unfinished current period does not
+            break a streak that reached the previous one.
+    """
+    frequency = normalize_frequency(frequency)
+    today = epoch_day() if today is None else today
+    windows = RATE_WINDOWS[frequency]
+
+    if len(days) == 0:
+        return HabitStreak(frequency, 0, 0, {window: 0.0 for window in windows}, None)
+
+    periods = np.unique(to_periods(days, frequency))
+    current_period = int(to_periods([today], frequency)[0])
+
+    # Runs of consecutive periods: split wherever the gap is not exactly 1
+    breaks = np.flatnonzero(np.diff(periods) != 1)
+    run_starts = np.concatenate(([0], breaks + 1))
+    run_ends = np.concatenate((breaks, [len(periods) - 1]))
+    run_lengths = run_ends - run_starts + 1
+    longest = int(run_lengths.max())
+
+    last_period = int(periods[-1])
+    if last_period >= current_period - 1 and last_period <= current_period:
+        current = int(run_lengths[-1])
+    else:
+        current = 0
+
+    rates = {}
+    for window in windows:
+        first = current_period - window + 1
+        done = int(np.count_nonzero((periods >= first) & (periods <= current_period)))
+        rates[window] = done / window
+
+    return HabitStreak(frequency, current, longest, rates, int(days[-1]))
+
+
+class StreakEngine:
+    """
+    Per-habit completion arrays and cached streak summaries.
+
+    Attributes:
+        pkm (PKMManager): Manager whose connection pool is used
+    """
+
+    def __init__(self, pkm):
+        self.pkm = pkm
+        self._lock = threading.Lock()
+        self._habits = []          # (id, name, frequency) sorted by name
+        self._frequency = {}       # habit id -> frequency
+        self._days = {}            # habit id -> sorted unique epoch days
+        self._cache = {}           # habit id -> (today, HabitStreak)
+        self._version = None       # habit_logs change counter at last load
+        self._applied = 0          # log_habit() writes applied since then
+
+    def _current_version(self, conn):
+        row = conn.execute(VERSION_SQL).fetchone()
+        return row[0] if row else None
+
+    def _load(self, conn, version):
+        habits = [(row[0], row[1], normalize_frequency(row[2])) for row in conn.execute(HABITS_SQL)]
+        rows = np.array(conn.execute(LOAD_SQL).fetchall(), dtype=np.int64).reshape(-1, 2)
+
+        days = {}
+        if len(rows):
+            # Rows are ordered by habit; split the day column at each habit change
+            splits = np.flatnonzero(np.diff(rows[:, 0])) + 1
+            for chunk in np.split(rows, splits):
+                days[int(chunk[0, 0])] = np.unique(chunk[:, 1])
+
+        self._habits = habits
+        self._frequency = {habit_id: frequency for habit_id, _, frequency in habits}
+        self._days = days
+        self._cache = {}
+        self._version = version
+        self._applied = 0
+
+    def _ensure_current(self):
+        conn = self.pkm.get_db_connection()
+        try:
+            version = self._current_version(conn)
+            with self._lock:
+                if self._version is not None and version == self._version + self._applied:
+                    return
+                self._load(conn, version)
+        finally:
+            conn.close()
+
+    def habits(self):
+        """
+        List habits with their normalized frequency.
+
+        Returns:
+            list: (id, name, frequency) tuples sorted by name
+        """
+        self._ensure_current()
+        with self._lock:
+            return list(self._habits)
+
+    def stats(self, habit_id, today=None):
+        """
+        Get the streak summary for one habit (cached until its logs change).
+
+        Returns:
+            HabitStreak: Summary; a habit without completions has zero streaks
+        """
+        self._ensure_current()
+        today = epoch_day() if today is None else today
+        with self._lock:
+            cached = self._cache.get(habit_id)
+            if cached is not None and cached[0] == today:
+                return cached[1]
+            days = self._days.get(habit_id, np.empty(0, dtype=np.int64))
+            streak = compute_streak(days, self._frequency.get(habit_id, 'daily'), today)
+            self._cache[habit_id] = (today, streak)
+            return streak
+
+    def record(self, habit_id, day, habit_name=None):
+        """
+        Apply a completion written by log_habit() without reloading.
+
+        Args:
+            habit_id (int): Habit that was completed
+            day (str): Completion date (YYYY-MM-DD)
+            habit_name (str, optional): Name, for habits created by this write
+        """
+        value = epoch_day(day)
+        with self._lock:
+            if self._version is None:
+                return  # Nothing loaded yet; the first read loads everything
+            days = self._days.get(habit_id, np.empty(0, dtype=np.int64))
+            position = np.searchsorted(days, value)
+            if position == len(days) or days[position] != value:
+                self._days[habit_id] = np.insert(days, position, value)
+            if habit_id not in self._frequency:
+                self._frequency[habit_id] = 'daily'
+                self._habits = sorted(self._habits + [(habit_id, habit_name, 'daily')],
+                                      key=lambda habit: habit[1] or '')
+            self._cache.pop(habit_id, None)
+            self._applied += 1
+
+    def invalidate(self):
+        """Drop everything; the next read reloads from the database."""
+        with self._lock:
+            self._version = None
+            self._cache = {}
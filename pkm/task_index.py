@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Task Index
+
+Indexes the Completed / In Progress / Planned lists of the "## Tasks"
+sections of the daily logs in the tasks and task_days tables (migration
+0014). The same task listed in several logs - carried over from day to day
+- is one tasks row, matched on its lower-cased text with whitespace
+collapsed, whose state is the one in the latest log listing it.
+
+pkm.markdown_sync calls replace_day() when it re-parses a log, so the index
+is updated per changed log - by the watcher, after the app writes a log, or
+by `manage sync-markdown` - and "what is still in progress" is a lookup on
+idx_tasks_state_last_seen.
+
+Usage:
+    index = TaskIndex(pkm)
+    index.refresh()
+    for task in index.tasks('in_progress'):
+        print(task.text, task.first_seen, task.days)
+"""
+
+from collections import namedtuple
+from datetime import date as Date
+
+STATES = {'in_progress': 'In Progress', 'planned': 'Planned', 'completed': 'Completed'}
+
+# When a log lists a task twice, the furthest-along state wins
+STATE_RANK = {'planned': 0, 'in_progress': 1, 'completed': 2}
+
+TASKS_SQL = '''
+    SELECT id, text, state, first_seen, last_seen, days, completed_on FROM tasks
+    WHERE state = ?
+    ORDER BY last_seen DESC, id DESC
+    LIMIT ?
+'''
+
+COUNTS_SQL = 'SELECT state, COUNT(*) FROM tasks GROUP BY state'
+
+DAY_TASKS_SQL = 'SELECT task_id FROM task_days WHERE date = ?'
+
+# Recompute a task from its task_days rows
+REFRESH_SQL = '''
+    UPDATE tasks SET
+        text = (SELECT text FROM task_days WHERE task_id = tasks.id ORDER BY date DESC LIMIT 1),
+        state = (SELECT state FROM task_days WHERE task_id = tasks.id ORDER BY date DESC LIMIT 1),
+        first_seen = (SELECT MIN(date) FROM task_days WHERE task_id = tasks.id),
+        last_seen = (SELECT MAX(date) FROM task_days WHERE task_id = tasks.id),
+        days = (SELECT COUNT(*) FROM task_days WHERE task_id = tasks.id),
+        completed_on = (SELECT MIN(date) FROM task_days WHERE task_id = tasks.id AND state = 'completed')
+    WHERE id = ?
+'''
+
+
+class Task(namedtuple('Task', 'id text state first_seen last_seen days completed_on')):
+    """A task as of the latest log listing it."""
+    __slots__ = ()
+
+    @property
+    def label(self):
+        return STATES[self.state]
+
+    @property
+    def age(self):
+        """Days from the first to the last log listing the task."""
+        return (Date.fromisoformat(self.last_seen) - Date.fromisoformat(self.first_seen)).days
+
+    @property
+    def carried_over(self):
+        return self.days > 1
+
+
+def task_key(text):
+    """Key two listings of the same task share."""
+    return ' '.join(text.lower().split())
+
+
+def replace_day(cursor, date, tasks):
+    """
+    Replace one log's task entries inside the caller's transaction.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the caller's write transaction
+        date (str): Date of the log
+        tasks (list): (state, text) pairs, as parsed by pkm.markdown_sync;
+            empty when the log was deleted
+    """
+    touched = {row[0] for row in cursor.execute(DAY_TASKS_SQL, (date,))}
+    cursor.execute('DELETE FROM task_days WHERE date = ?', (date,))
+
+    entries = {}
+    for state, text in tasks:
+        key = task_key(text)
+        if key not in entries or STATE_RANK[state] > STATE_RANK[entries[key][0]]:
+            entries[key] = (state, text)
+
+    for key, (state, text) in entries.items():
+        row = cursor.execute('SELECT id FROM tasks WHERE key = ?', (key,)).fetchone()
+        if row:
+            task_id = row[0]
+        else:
+            cursor.execute('''
+                INSERT INTO tasks (key, text, state, first_seen, last_seen, days) VALUES (?, ?, ?, ?, ?, 0)
+            ''', (key, text, state, date, date))
+            task_id = cursor.lastrowid
+        cursor.execute('INSERT INTO task_days (task_id, date, state, text) VALUES (?, ?, ?, ?)',
+                       (task_id, date, state, text))
+        touched.add(task_id)
+
+    for task_id in touched:
+        cursor.execute('DELETE FROM tasks WHERE id = ? AND NOT EXISTS '
+                       '(SELECT 1 FROM task_days WHERE task_id = ?)', (task_id, task_id))
+        cursor.execute(REFRESH_SQL, (task_id,))
+
+
+def check_state(state):
+    """
+    Validate a task state.
+
+    Raises:
+        ValueError: For an unknown state
+    """
+    if state not in STATES:
+        raise ValueError(f"Unknown task state {state!r}; expected one of {', '.join(STATES)}")
+
+
+class TaskIndex:
+    """
+    Queries over the task index of a PKMManager's database.
+
+    Attributes:
+        pkm (PKMManager): Manager whose pool and markdown sync are used
+    """
+
+    def __init__(self, pkm):
+        self.pkm = pkm
+
+    def refresh(self):
+        """Sync logs added or removed since the last markdown sync (see MarkdownSync.catch_up())."""
+        self.pkm.markdown_sync.catch_up()
+
+    def tasks(self, state, limit=100):
+        """
+        Get tasks in a state, most recently listed first.
+
+        Args:
+            state (str): One of STATES
+            limit (int, optional): Maximum tasks. Defaults to 100.
+
+        Returns:
+            list: Task tuples
+
+        Raises:
+            ValueError: For an unknown state
+        """
+        check_state(state)
+        conn = self.pkm.get_db_connection()
+        try:
+            return [Task(*row) for row in conn.execute(TASKS_SQL, (state, limit))]
+        finally:
+            conn.close()
+
+    def counts(self):
+        """Get the number of tasks in each state."""
+        conn = self.pkm.get_db_connection()
+        try:
+            counts = dict(conn.execute(COUNTS_SQL).fetchall())
+        finally:
+            conn.close()
+        return {state: counts.get(state, 0) for state in STATES}
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Daily Log Watcher
+
+Watches daily/ for logs that are created, saved, renamed or deleted - by
+the app or by an editor - and passes the affected dates to registered
+index updaters, so the catalog, render cache, markdown sync and search
+index stay fresh without full rescans.
+
+Changes are picked up with inotify (through ctypes) where the platform has
+it, falling back to polling the directory with one os.scandir pass per
+interval. Events are debounced: a burst of saves (editors often write a
+file several times) is coalesced into one call per updater with the set of
+dates that changed, made on a single worker thread once the directory has
+been quiet for `debounce` seconds.
+
+Usage:
+    ./pkm.sh watch [--poll] [--debounce SECONDS]
+
+    watcher = DailyWatcher(pkm.daily_dir)
+    watcher.register('catalog', lambda dates: print(dates))
+    watcher.start()
+    ...
+    watcher.stop()
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import signal
+import struct
+import sys
+import threading
+import time
+
+from . import daily_catalog
+from .pkm_manager import PKMManager
+
+# inotify event masks (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len; followed by the name
+READ_SIZE = 64 * 1024
+STOP_CHECK = 0.5  # Seconds between checks for stop() while idle
+
+
+def load_inotify():
+    """
+    Get libc with the inotify functions, or None where they do not exist.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class InotifySource:
+    """Reports changed dates from inotify events on one directory."""
+
+    def __init__(self, directory, changed, libc):
+        self.directory = directory
+        self.changed = changed
+        self.libc = libc
+
+    def run(self, stopping):
+        """
+        Report changes until `stopping` is set.
+
+        Returns:
+            bool: True if the watch was lost because the directory itself
+                was moved or deleted, False once stopped
+
+        Raises:
+            OSError: If the directory cannot be watched
+        """
+        fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        try:
+            if self.libc.inotify_add_watch(fd, os.fsencode(self.directory), WATCH_MASK) < 0:
+                errno = ctypes.get_errno()
+                raise OSError(errno, os.strerror(errno), self.directory)
+            while not stopping.is_set():
+                if not select.select([fd], [], [], STOP_CHECK)[0]:
+                    continue
+                try:
+                    data = os.read(fd, READ_SIZE)
+                except BlockingIOError:
+                    continue
+                if self._dispatch(data):
+                    return True
+            return False
+        finally:
+            os.close(fd)
+
+    def _dispatch(self, data):
+        # Report the dates in a buffer of events; True if the watch was lost
+        dates = set()
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+            if mask & (IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF):
+                self.changed(None)  # Events were lost; everything may have changed
+                return bool(mask & (IN_DELETE_SELF | IN_MOVE_SELF))
+            date = daily_catalog.log_date(os.fsdecode(name))
+            if date:
+                dates.add(date)
+        if dates:
+            self.changed(dates)
+        return False
+
+
+class PollingSource:
+    """Reports changed dates by comparing directory scans."""
+
+    def __init__(self, directory, changed, interval):
+        self.directory = directory
+        self.changed = changed
+        self.interval = interval
+
+    def run(self, stopping):
+        """Report changes until `stopping` is set."""
+        files = daily_catalog.scan(self.directory)
+        while not stopping.wait(self.interval):
+            current = daily_catalog.scan(self.directory)
+            dates = {date for date in files.keys() | current.keys() if files.get(date) != current.get(date)}
+            files = current
+            if dates:
+                self.changed(dates)
+
+
+class DailyWatcher:
+    """
+    Debounced fan-out of daily log changes to index updaters.
+
+    Attributes:
+        directory (str): Directory of YYYY-MM-DD.md files
+        debounce (float): Quiet seconds to wait before running updaters
+        poll_interval (float): Seconds between scans when polling
+        polling (bool): Poll even where inotify is available
+        log (callable): Receives progress and error messages
+        stats (dict): Counters for events, update batches and updater errors
+    """
+
+    def __init__(self, directory, debounce=0.5, poll_interval=2.0, polling=False, log=print):
+        self.directory = directory
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.polling = polling
+        self.log = log
+        self.stats = {'events': 0, 'batches': 0, 'errors': 0}
+        self._updaters = {}
+        self._pending = set()
+        self._everything = False
+        self._known = set()  # Every date seen, for rescans after lost events
+        self._last_event = 0.0
+        self._cond = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def register(self, name, updater):
+        """
+        Add an index updater.
+
+        Args:
+            name (str): Name used in error messages; registering a name
+                again replaces its updater
+            updater (callable): Called as updater(dates) on the worker
+                thread with the sorted dates whose logs changed
+        """
+        with self._cond:
+            self._updaters[name] = updater
+
+    def changed(self, dates):
+        """Queue changed dates (None: rescan everything)."""
+        with self._cond:
+            if dates is None:
+                self._everything = True
+            else:
+                self._pending.update(dates)
+            self._last_event = time.monotonic()
+            self.stats['events'] += 1
+            self._cond.notify()
+
+    def _watch(self):
+        libc = None if self.polling else load_inotify()
+        if libc is not None:
+            try:
+                while InotifySource(self.directory, self.changed, libc).run(self._stopping):
+                    pass  # Directory replaced; watch the new one (or fall back if it is gone)
+                return
+            except OSError as e:
+                self.log(f"Cannot watch {self.directory} with inotify ({e}); polling instead")
+        PollingSource(self.directory, self.changed, self.poll_interval).run(self._stopping)
+
+    def _take(self):
+        # Wait for events, then for `debounce` quiet seconds; None once stopped
+        with self._cond:
+            while not (self._pending or self._everything):
+                if self._stopping.is_set():
+                    return None
+                self._cond.wait(STOP_CHECK)
+            while not self._stopping.is_set():
+                quiet = self._last_event + self.debounce - time.monotonic()
+                if quiet <= 0:
+                    break
+                self._cond.wait(quiet)
+            dates, everything = self._pending, self._everything
+            self._pending, self._everything = set(), False
+            updaters = list(self._updaters.items())
+        if everything:
+            dates |= self._known | set(daily_catalog.scan(self.directory))
+        self._known |= dates
+        return sorted(dates), updaters
+
+    def _work(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            dates, updaters = batch
+            for name, updater in updaters:
+                try:
+                    updater(dates)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    self.log(f"Updating {name} for {len(dates)} log(s) failed: {e}")
+            self.stats['batches'] += 1
+            self.log(f"Updated indexes for {', '.join(dates[:5])}" + (f" and {len(dates) - 5} more" if len(dates) > 5 else ''))
+
+    def start(self):
+        """Start the watching and worker threads."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._known = set(daily_catalog.scan(self.directory))
+        self._stopping.clear()
+        self._threads = [threading.Thread(target=self._watch, name='pkm-watch', daemon=True),
+                         threading.Thread(target=self._work, name='pkm-watch-worker', daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop watching; changes already queued are still applied."""
+        self._stopping.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep PKM indexes in step with daily/*.md')
+    parser.add_argument('--db', help='Path to SQLite database')
+    parser.add_argument('--poll', action='store_true', help='Poll instead of using inotify')
+    parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls')
+    parser.add_argument('--debounce', type=float, default=0.5, help='Quiet seconds before updating')
+    args = parser.parse_args()
+
+    pkm = PKMManager(db_path=args.db)
+    pkm.check_database()
+    pkm.sync_markdown()  # Catch up on changes made while nothing was watching
+    watcher = pkm.start_watcher(debounce=args.debounce, poll_interval=args.interval, polling=args.poll)
+    print(f"Watching {pkm.daily_dir} (Ctrl-C to stop)")
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # Stop cleanly as a service too
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
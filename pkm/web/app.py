@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from markupsafe import Markup, escape
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user
 from werkzeug.security import check_password_hash
 import os
@@ -8,14 +9,19 @@ import sqlite3
 from datetime import datetime, timedelta
 import sys
 import argparse
-import markdown
 import logging
+import atexit
 from time import strftime
 
-# Add parent directory to Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from pkm_manager import PKMManager
-from utils import format_timestamp
+# Add project root to Python path so the pkm package resolves when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from pkm import migrations
+from pkm.pkm_manager import PKMManager
+from pkm.repository import RECORD_TYPES, today, days_ago
+from pkm.search import SOURCES as SEARCH_SOURCES
+from pkm.task_index import STATES as TASK_STATES
+from pkm.utils import format_timestamp
+from pkm.writer import WriteQueue
 
 # Configure logging before creating the app
 logging.basicConfig(
@@ -44,6 +50,11 @@ def after_request(response):
     app.logger.debug(f'Response Headers: {dict(response.headers)}')
     return response
 
+@app.teardown_request
+def release_db_connection(exc):
+    # Hand back any pooled connection a route left open (e.g. after an exception)
+    pkm.pool.release_thread()
+
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -51,31 +62,20 @@ login_manager.login_view = 'login'
 pkm = PKMManager()
 app.logger.info(f"Database path: {pkm.db_path}")  # Debug output
 app.logger.info(f"Database exists: {os.path.exists(pkm.db_path)}")  # Debug output
+app.logger.info(f"Database profile: {pkm.pool.profile}")  # Debug output
 
-# Initialize database with sub_daily_moods table
+# Bring the database schema up to date (non-destructive, versioned migrations)
 def init_db():
     app.logger.info("Initializing database...")  # Debug output
+    os.makedirs(os.path.dirname(pkm.db_path), exist_ok=True)
     conn = pkm.get_db_connection()
-    cursor = conn.cursor()
-    
-    # Create sub_daily_moods table if it doesn't exist
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS sub_daily_moods (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            logged_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            mood INTEGER,
-            energy INTEGER,
-            notes TEXT
-        )
-    ''')
-    
-    # Debug output - list all tables
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = cursor.fetchall()
-    app.logger.info(f"Tables in database: {[table[0] for table in tables]}")  # Debug output
-    
-    conn.commit()
-    conn.close()
+    try:
+        applied = migrations.migrate(conn, log=app.logger.info)
+        migrations.ensure_schema(conn, pkm.db_path, log=app.logger.info)
+        app.logger.info(f"Applied migrations: {applied or 'none'}")  # Debug output
+        app.logger.info(f"Schema version: {migrations.current_version(conn)}")  # Debug output
+    finally:
+        conn.close()
 
 # Call init_db when the app starts
 init_db()
@@ -93,6 +93,36 @@ def load_config():
 config = load_config()
 app.secret_key = config.get('secret_key', os.urandom(24))
 
+# Serialize all writes through one writer thread with group commit
+db_config = config.get('database', {})
+writer = WriteQueue(
+    pkm.db_path,
+    pkm.pool.profile,
+    max_batch=db_config.get('group_commit_max_batch', 128),
+    max_latency=db_config.get('group_commit_ms', 0) / 1000
+)
+pkm.attach_writer(writer)
+atexit.register(writer.close)
+
+# Report each rendered daily log and fill the render cache with the logs
+# /daily_logs shows before the first request asks for them
+RECENT_LOGS = 5
+
+def log_render(event, path, seconds):
+    if event == 'render':
+        app.logger.debug(f'Rendered {os.path.basename(path)} in {seconds * 1000:.1f} ms')
+
+pkm.render_cache.hook = log_render
+
+def start_background_tasks():
+    """Warm the render cache and start the daily log watcher."""
+    pkm.render_cache.warm_in_background(RECENT_LOGS)
+    
+    # Keep the daily log indexes fresh when logs are edited outside the app
+    if config.get('watch_daily_logs', True):
+        watcher = pkm.start_watcher(log=app.logger.info)
+        atexit.register(watcher.stop)
+
 # Make config and global functions available to all templates
 @app.context_processor
 def inject_config():
@@ -140,65 +170,50 @@ def get_energy_emoji(value):
 @login_required
 def index():
     app.logger.info("Accessing index route...")  # Debug output
-    conn = pkm.get_db_connection()
-    cursor = conn.cursor()
     
     try:
         # Get unique projects
         app.logger.info("Fetching projects...")  # Debug output
-        cursor.execute('SELECT DISTINCT project FROM work_logs WHERE project IS NOT NULL ORDER BY project')
-        projects = [row[0] for row in cursor.fetchall()]
+        projects = pkm.repo.projects()
         app.logger.info(f"Found projects: {projects}")  # Debug output
         
         # Get unique habits
         app.logger.info("Fetching habits...")  # Debug output
-        cursor.execute('SELECT name FROM habits ORDER BY name')
-        habits = [row[0] for row in cursor.fetchall()]
+        habits = pkm.repo.habit_names()
         app.logger.info(f"Found habits: {habits}")  # Debug output
         
         # Get unique drink types
         app.logger.info("Fetching drink types...")  # Debug output
-        cursor.execute('''
-            SELECT DISTINCT drink_type 
-            FROM alcohol_logs 
-            WHERE drink_type IS NOT NULL 
-            ORDER BY drink_type
-        ''')
-        drink_types = [row[0] for row in cursor.fetchall()]
+        drink_types = pkm.repo.drink_types()
         app.logger.info(f"Found drink types: {drink_types}")  # Debug output
         
         # Get today's sub-daily mood logs
         app.logger.info("Fetching today's mood logs...")  # Debug output
-        cursor.execute('''
-            SELECT logged_at, mood, energy, notes 
-            FROM sub_daily_moods 
-            WHERE date(logged_at) = date('now')
-            ORDER BY logged_at DESC
-        ''')
+        day = today()
         sub_daily_logs = []
-        for row in cursor.fetchall():
-            timestamp, mood, energy, notes = row
-            time = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').strftime('%I:%M %p')
+        for log in pkm.repo.sub_daily_moods(start=day, end=day, descending=True):
+            time = datetime.strptime(log.logged_at, '%Y-%m-%d %H:%M:%S').strftime('%I:%M %p')
             sub_daily_logs.append({
                 'time': time,
-                'mood': mood,
-                'mood_emoji': get_mood_emoji(mood),
-                'energy': energy,
-                'energy_emoji': get_energy_emoji(energy),
-                'notes': notes
+                'mood': log.mood,
+                'mood_emoji': get_mood_emoji(log.mood),
+                'energy': log.energy,
+                'energy_emoji': get_energy_emoji(log.energy),
+                'notes': log.notes
             })
         app.logger.info(f"Found {len(sub_daily_logs)} mood logs for today")  # Debug output
         
-        conn.close()
+        # Get unusual days from the rolling anomaly detector
+        anomalies = pkm.recent_anomalies()
         
         return render_template('index.html', 
                              projects=projects, 
                              habits=habits, 
                              drink_types=drink_types,
-                             sub_daily_logs=sub_daily_logs)
+                             sub_daily_logs=sub_daily_logs,
+                             anomalies=anomalies)
     except Exception as e:
         app.logger.error(f"Error in index route: {str(e)}")  # Debug output
-        conn.close()
         raise
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -234,17 +249,11 @@ def sub_daily_mood():
         energy = int(request.form.get('sub_energy'))
         notes = request.form.get('sub_notes')
         
-        conn = pkm.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        pkm.execute_write('''
             INSERT INTO sub_daily_moods (mood, energy, notes)
             VALUES (?, ?, ?)
         ''', (mood, energy, notes))
         
-        conn.commit()
-        conn.close()
-        
         flash('Mood state logged successfully')
     except ValueError:
         flash('Invalid input')
@@ -270,42 +279,22 @@ def metrics():
         return redirect(url_for('metrics'))
         
     # Get today's metrics
-    conn = pkm.get_db_connection()
-    cursor = conn.cursor()
-    
-    # Get today's metrics
-    cursor.execute('SELECT * FROM daily_metrics WHERE date = date("now")')
-    today_metrics = cursor.fetchone()
+    today_metrics = pkm.repo.metrics_for(today())
     
-    # Get historical metrics for the past 30 days
-    cursor.execute('''
-        SELECT date, mood_rating, energy_level, sleep_hours, notes 
-        FROM daily_metrics 
-        WHERE date >= date('now', '-30 days')
-        ORDER BY date ASC
-    ''')
-    historical_metrics = cursor.fetchall()
-    
-    # Format historical metrics for Chart.js
-    dates = []
-    moods = []
-    energies = []
-    sleep_hours = []
-    
-    for metric in historical_metrics:
-        dates.append(metric[0])  # date
-        moods.append(metric[1])  # mood_rating
-        energies.append(metric[2])  # energy_level
-        sleep_hours.append(metric[3])  # sleep_hours
-    
-    conn.close()
+    # Past 30 days, one point per day; the chart re-buckets via /api/series
+    dates, series = pkm.resample(['mood', 'energy', 'sleep', 'intraday_mood'], 'day', 'mean', days_ago(30), today())
+    moods = series['mood']
+    energies = series['energy']
+    sleep_hours = series['sleep']
+    intraday_moods = series['intraday_mood']
     
     return render_template('metrics.html', 
                          metrics=today_metrics,
                          dates=dates,
                          moods=moods,
                          energies=energies,
-                         sleep_hours=sleep_hours)
+                         sleep_hours=sleep_hours,
+                         intraday_moods=intraday_moods)
 
 @app.route('/work', methods=['GET', 'POST'])
 @login_required
@@ -327,25 +316,11 @@ def work():
         return redirect(url_for('work'))
         
     # Get recent work logs and unique projects
-    conn = pkm.get_db_connection()
-    cursor = conn.cursor()
-    
-    # Get work logs with ID included
-    cursor.execute('''
-        SELECT date, project, description, total_hours, id
-        FROM work_logs 
-        WHERE date >= date('now', '-7 days')
-        ORDER BY date DESC
-    ''')
-    work_logs = cursor.fetchall()
+    work_logs = pkm.repo.work_logs(start=days_ago(7), descending=True)
+    projects = pkm.repo.projects()
+    weekly_hours = pkm.repo.totals(start=days_ago(7))['work_hours'] or 0
     
-    # Get unique projects
-    cursor.execute('SELECT DISTINCT project FROM work_logs WHERE project IS NOT NULL ORDER BY project')
-    projects = [row[0] for row in cursor.fetchall()]
-    
-    conn.close()
-    
-    return render_template('work.html', work_logs=work_logs, projects=projects)
+    return render_template('work.html', work_logs=work_logs, projects=projects, weekly_hours=weekly_hours)
 
 @app.route('/update_work_log', methods=['POST'])
 @login_required
@@ -357,18 +332,12 @@ def update_work_log():
         description = data.get('description')
         total_hours = float(data.get('total_hours'))
         
-        conn = pkm.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        pkm.execute_write('''
             UPDATE work_logs 
             SET project = ?, description = ?, total_hours = ?
             WHERE id = ?
         ''', (project, description, total_hours, log_id))
         
-        conn.commit()
-        conn.close()
-        
         return jsonify({'status': 'success'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 400
@@ -383,14 +352,8 @@ def delete_project():
         if not project_name:
             return jsonify({'status': 'error', 'message': 'Project name is required'}), 400
             
-        conn = pkm.get_db_connection()
-        cursor = conn.cursor()
-        
         # Delete all work logs for this project
-        cursor.execute('DELETE FROM work_logs WHERE project = ?', (project_name,))
-        
-        conn.commit()
-        conn.close()
+        pkm.execute_write('DELETE FROM work_logs WHERE project = ?', (project_name,))
         
         return jsonify({'status': 'success'})
     except Exception as e:
@@ -406,22 +369,22 @@ def delete_habit():
         if not habit_name:
             return jsonify({'status': 'error', 'message': 'Habit name is required'}), 400
             
-        conn = pkm.get_db_connection()
-        cursor = conn.cursor()
-        
-        # First get the habit ID
-        cursor.execute('SELECT id FROM habits WHERE name = ?', (habit_name,))
-        habit = cursor.fetchone()
-        
-        if habit:
+        def delete(cursor):
+            # First get the habit ID
+            cursor.execute('SELECT id FROM habits WHERE name = ?', (habit_name,))
+            habit = cursor.fetchone()
+            if not habit:
+                return False
+            
             habit_id = habit[0]
             # Delete all habit logs for this habit
             cursor.execute('DELETE FROM habit_logs WHERE habit_id = ?', (habit_id,))
             # Delete the habit itself
             cursor.execute('DELETE FROM habits WHERE id = ?', (habit_id,))
-            
-            conn.commit()
-            conn.close()
+            return True
+        
+        if pkm.run_write(delete):
+            pkm.forget_habit(habit_name)
             return jsonify({'status': 'success'})
         else:
             return jsonify({'status': 'error', 'message': 'Habit not found'}), 404
@@ -443,30 +406,37 @@ def habits():
             flash(f'Error: {str(e)}')
         return redirect(url_for('habits'))
         
-    # Get habits, their completion counts, and recent notes
+    # Get this week's completions and notes (one index range on completed_at)
     conn = pkm.get_db_connection()
     cursor = conn.cursor()
     cursor.execute('''
-        SELECT 
-            h.name,
-            COUNT(DISTINCT hl1.id) as completions,
-            GROUP_CONCAT(DISTINCT hl2.notes) as recent_notes
-        FROM habits h
-        LEFT JOIN habit_logs hl1 
-            ON h.id = hl1.habit_id
-            AND hl1.completed_at >= date('now', '-7 days')
-        LEFT JOIN (
-            SELECT habit_id, notes
-            FROM habit_logs
-            WHERE notes IS NOT NULL AND notes != ''
-            AND completed_at >= date('now', '-7 days')
-            ORDER BY completed_at DESC
-        ) hl2 ON h.id = hl2.habit_id
-        GROUP BY h.name
+        SELECT habit_id, notes
+        FROM habit_logs
+        WHERE completed_at >= date('now', '-7 days')
+        ORDER BY completed_at DESC
     ''')
-    habits = cursor.fetchall()
+    week_logs = cursor.fetchall()
     conn.close()
     
+    week_completions = {}
+    week_notes = {}
+    for habit_id, notes in week_logs:
+        week_completions[habit_id] = week_completions.get(habit_id, 0) + 1
+        if notes and notes not in week_notes.setdefault(habit_id, []):
+            week_notes[habit_id].append(notes)
+    
+    # Streaks and completion rates come from the cached streak engine
+    habits = []
+    for habit_id, name, frequency in pkm.streaks.habits():
+        streak = pkm.streaks.stats(habit_id)
+        habits.append({
+            'name': name,
+            'frequency': frequency,
+            'completions': week_completions.get(habit_id, 0),
+            'notes': week_notes.get(habit_id, []),
+            'streak': streak,
+        })
+    
     return render_template('habits.html', habits=habits)
 
 @app.route('/alcohol', methods=['GET', 'POST'])
@@ -497,30 +467,12 @@ def alcohol():
             return redirect(url_for('alcohol'))
             
         # Get recent alcohol logs and unique drink types
-        conn = pkm.get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get recent logs with IDs
-        cursor.execute('''
-            SELECT id, date, drink_type, units, notes
-            FROM alcohol_logs
-            WHERE date >= date('now', '-7 days')
-            ORDER BY date DESC
-        ''')
-        alcohol_logs = cursor.fetchall()
+        alcohol_logs = pkm.repo.alcohol_logs(start=days_ago(7), descending=True)
+        drink_types = pkm.repo.drink_types()
+        weekly_units = pkm.repo.totals(start=days_ago(7))['alcohol_units'] or 0
         
-        # Get unique drink types
-        cursor.execute('''
-            SELECT DISTINCT drink_type 
-            FROM alcohol_logs 
-            WHERE drink_type IS NOT NULL 
-            ORDER BY drink_type
-        ''')
-        drink_types = [row[0] for row in cursor.fetchall()]
-        
-        conn.close()
-        
-        return render_template('alcohol.html', alcohol_logs=alcohol_logs, drink_types=drink_types)
+        return render_template('alcohol.html', alcohol_logs=alcohol_logs, drink_types=drink_types,
+                               weekly_units=weekly_units)
     except Exception as e:
         flash(f'An unexpected error occurred: {str(e)}')
         return redirect(url_for('index'))
@@ -535,22 +487,209 @@ def update_alcohol_log():
         units = float(data.get('units'))
         notes = data.get('notes')
         
-        conn = pkm.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        pkm.execute_write('''
             UPDATE alcohol_logs 
             SET drink_type = ?, units = ?, notes = ?
             WHERE id = ?
         ''', (drink_type, units, notes, log_id))
         
-        conn.commit()
-        conn.close()
-        
         return jsonify({'status': 'success'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 400
 
+def _page_args():
+    """Read keyset pagination parameters from the query string."""
+    return {
+        'start': request.args.get('start') or None,
+        'end': request.args.get('end') or None,
+        'cursor': request.args.get('cursor') or None,
+        'page_size': request.args.get('page_size', 50, type=int),
+        'descending': request.args.get('order', 'desc') != 'asc',
+    }
+
+@app.route('/api/logs/<table>')
+@login_required
+def api_logs(table):
+    try:
+        page = pkm.query_logs(table, **_page_args())
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify({
+        'status': 'success',
+        'rows': [row._asdict() for row in page.rows],
+        'next_cursor': page.next_cursor
+    })
+
+@app.route('/history/<table>')
+@login_required
+def history(table):
+    args = _page_args()
+    try:
+        page = pkm.query_logs(table, **args)
+    except ValueError as e:
+        flash(f'Invalid history request: {str(e)}')
+        return redirect(url_for('history', table='daily_metrics'))
+    
+    columns = page.rows[0]._fields if page.rows else []
+    return render_template('history.html',
+                         table=table,
+                         tables=list(RECORD_TYPES),
+                         columns=columns,
+                         rows=page.rows,
+                         next_cursor=page.next_cursor,
+                         start=args['start'] or '',
+                         end=args['end'] or '',
+                         page_size=args['page_size'],
+                         order='desc' if args['descending'] else 'asc')
+
+SEARCH_PAGE_SIZE = 20
+
+@app.route('/search')
+@login_required
+def search():
+    query = request.args.get('q', '').strip()
+    source = request.args.get('source') or None
+    start = request.args.get('start') or None
+    end = request.args.get('end') or None
+    page = max(request.args.get('page', 1, type=int), 1)
+    
+    results, total = [], 0
+    if query:
+        try:
+            # Control characters mark the matches so they survive HTML escaping
+            hits, total = pkm.search(query, [source] if source else None, start, end,
+                                     limit=SEARCH_PAGE_SIZE, offset=(page - 1) * SEARCH_PAGE_SIZE,
+                                     markers=('\x02', '\x03'))
+        except ValueError as e:
+            flash(f'Invalid search: {str(e)}')
+            hits = []
+        for hit in hits:
+            if hit.source == 'markdown':
+                link = url_for('edit_log', date=hit.date)
+            elif hit.source in RECORD_TYPES:
+                link = url_for('history', table=hit.source, start=hit.date, end=hit.date)
+            else:
+                link = None
+            snippet = str(escape(hit.snippet)).replace('\x02', '<mark>').replace('\x03', '</mark>')
+            results.append({'date': hit.date, 'label': hit.label, 'snippet': Markup(snippet), 'link': link})
+    
+    return render_template('search.html',
+                         query=query,
+                         source=source or '',
+                         sources=SEARCH_SOURCES,
+                         start=start or '',
+                         end=end or '',
+                         page=page,
+                         total=total,
+                         results=results,
+                         has_next=page * SEARCH_PAGE_SIZE < total)
+
+@app.route('/tasks')
+@login_required
+def tasks():
+    # Open tasks in full, plus the most recently completed ones
+    lists = pkm.tasks(['in_progress', 'planned'])
+    lists['completed'] = pkm.tasks(['completed'], limit=20)['completed']
+    dates = pkm.daily_catalog.dates()
+    return render_template('tasks.html',
+                         lists=lists,
+                         states=TASK_STATES,
+                         latest=dates[-1] if dates else None)
+
+@app.route('/api/heatmap')
+@app.route('/api/heatmap/<int:year>')
+@login_required
+def api_heatmap(year=None):
+    try:
+        etag, payload = pkm.heatmap(year, request.args.get('habit', type=int))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    # Revalidate instead of re-downloading: unchanged years answer 304
+    response = jsonify(dict(payload, status='success'))
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/series')
+@login_required
+def api_series():
+    metrics = [name for name in request.args.get('metrics', 'mood').split(',') if name]
+    bucket = request.args.get('bucket', 'day')
+    how = request.args.get('agg', 'mean')
+    start = request.args.get('start') or None
+    end = request.args.get('end') or None
+    try:
+        labels, series = pkm.resample(metrics, bucket, how, start, end)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify({
+        'status': 'success',
+        'bucket': bucket,
+        'agg': how,
+        'labels': labels,
+        'series': series
+    })
+
+@app.route('/api/chart')
+@login_required
+def api_chart():
+    metrics = [name for name in request.args.get('metrics', 'mood').split(',') if name]
+    start = request.args.get('start') or None
+    end = request.args.get('end') or None
+    points = request.args.get('points', 500, type=int)
+    try:
+        series = {}
+        for metric in metrics:
+            x, y, total = pkm.chart_series(metric, start, end, points)
+            series[metric] = {'x': x, 'y': y, 'total': total}
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify({'status': 'success', 'points': points, 'series': series})
+
+@app.route('/api/forecast')
+@login_required
+def api_forecast():
+    names = [name for name in request.args.get('series', 'mood').split(',') if name]
+    horizon = request.args.get('horizon', type=int)
+    try:
+        forecasts = {name: pkm.forecast(name, horizon) for name in names}
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify({'status': 'success', 'forecasts': forecasts})
+
+@app.route('/api/tags')
+@login_required
+def api_tags():
+    tag = request.args.get('tag')
+    if tag:
+        return jsonify({'status': 'success', 'tag': tag.lstrip('#').lower(), 'notes': pkm.tags(tag, limit=500)})
+    counts = pkm.tags(limit=request.args.get('limit', 100, type=int))
+    return jsonify({'status': 'success', 'tags': [{'tag': tag, 'notes': count} for tag, count in counts]})
+
+@app.route('/api/graph')
+@login_required
+def api_graph():
+    note = request.args.get('note')
+    if not note:
+        return jsonify({'status': 'error', 'message': 'note is required'}), 400
+    try:
+        graph = pkm.note_neighbourhood(note, request.args.get('depth', 2, type=int))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify(dict(graph, status='success', links=pkm.note_links(note)))
+
+@app.route('/api/render_cache')
+@login_required
+def api_render_cache():
+    return jsonify(dict(pkm.render_cache.summary(), status='success'))
+
 @app.route('/daily_logs', methods=['GET', 'POST'])
 @login_required
 def daily_logs():
@@ -558,10 +697,10 @@ def daily_logs():
         try:
             # Create today's log
             today = datetime.now().strftime('%Y-%m-%d')
-            file_path = os.path.join(pkm.daily_dir, f'{today}.md')
+            file_path = pkm.daily_catalog.path(today)
             
             # Check if file already exists
-            if os.path.exists(file_path):
+            if pkm.daily_catalog.exists(today):
                 flash('Today\'s log already exists')
                 return redirect(url_for('daily_logs'))
             
@@ -579,6 +718,7 @@ def daily_logs():
             # Create the new log file
             with open(file_path, 'w') as f:
                 f.write(template_content)
+            pkm.daily_log_written(today)
             
             flash('Today\'s log created successfully')
             return redirect(url_for('edit_log', date=today))
@@ -589,17 +729,20 @@ def daily_logs():
     logs = []
     
     try:
-        if os.path.exists(pkm.daily_dir):
-            for log_file in sorted(os.listdir(pkm.daily_dir), reverse=True)[:5]:
-                if log_file.endswith('.md'):
-                    with open(os.path.join(pkm.daily_dir, log_file), 'r') as f:
-                        content = f.read()
-                        html_content = markdown.markdown(content, extensions=['fenced_code', 'tables'])
-                        logs.append({
-                            'date': log_file.replace('.md', ''),
-                            'content': html_content,
-                            'raw_content': content
-                        })
+        entries = pkm.daily_catalog.recent(RECENT_LOGS)
+        documents = []
+        for entry in entries:
+            with open(entry.path, 'r') as f:
+                documents.append((entry.path, f.read()))
+        
+        # Unchanged logs reuse their cached HTML
+        rendered = pkm.render_cache.render_many(documents)
+        for entry, (_, content), html_content in zip(entries, documents, rendered):
+            logs.append({
+                'date': entry.date,
+                'content': html_content,
+                'raw_content': content
+            })
     except Exception as e:
         flash(f'Error reading logs: {str(e)}')
     
@@ -608,14 +751,17 @@ def daily_logs():
 @app.route('/edit_log/<date>', methods=['GET', 'POST'])
 @login_required
 def edit_log(date):
-    file_path = os.path.join(pkm.daily_dir, f'{date}.md')
+    file_path = pkm.daily_catalog.path(date)
     
     if request.method == 'POST':
         content = request.form.get('content')
         try:
             with open(file_path, 'w') as f:
                 f.write(content)
+            problems = pkm.daily_log_written(date)
             flash('Log updated successfully')
+            if problems:
+                flash('Some values were not saved to the database: ' + '; '.join(problems))
             return redirect(url_for('daily_logs'))
         except Exception as e:
             flash(f'Error updating log: {str(e)}')
@@ -624,7 +770,8 @@ def edit_log(date):
     try:
         with open(file_path, 'r') as f:
             content = f.read()
-        return render_template('edit_log.html', date=date, content=content)
+        return render_template('edit_log.html', date=date, content=content,
+                             graph=pkm.note_links(date), logs=set(pkm.daily_catalog.dates()))
     except FileNotFoundError:
         flash('Log file not found')
         return redirect(url_for('daily_logs'))
@@ -650,7 +797,13 @@ def start_server(host='0.0.0.0', port=None):
     if port is None:
         port = config.get('port', 5000)
     
-    app.run(host=host, port=port, debug=True)  # Enable debug mode
+    # The debug reloader imports the app in a watching parent and a serving
+    # child process; only the one serving requests starts background threads
+    debug = True  # Enable debug mode
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_tasks()
+    
+    app.run(host=host, port=port, debug=debug)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='PKM Web Interface')
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Single-Writer Queue Module
+
+This module serializes all database writes of a process through one
+background thread that owns the only write connection. Callers submit
+mutations and get a concurrent.futures.Future back; the writer drains
+whatever has queued within a latency budget and commits it as one
+transaction (group commit), so concurrent requests share a single fsync
+instead of contending for the database lock.
+
+Each job runs inside its own SAVEPOINT, so a failing job is rolled back and
+reported through its future without affecting the rest of the group. If the
+writer thread itself dies (the connection cannot be opened, or a job raises
+a BaseException), every job it was holding or had queued fails with that
+error and the next submit starts a new thread.
+
+Usage:
+    writer = WriteQueue(db_path)
+    future = writer.execute('INSERT INTO sub_daily_moods (mood, energy) VALUES (?, ?)', (7, 6))
+    future.result()  # Blocks until the group containing it has committed
+    writer.close()
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from .database import connect
+
+_STOP = object()
+
+WRITE_TIMEOUT = 60.0  # Seconds a caller waits for its group commit by default
+
+
+class WriteQueue:
+    """
+    In-process writer thread with group commit.
+
+    Attributes:
+        db_path (str): Path to SQLite database
+        max_batch (int): Maximum jobs committed in one transaction
+        max_latency (float): Extra seconds to wait for more jobs after the first
+            one arrives. 0 commits whatever has queued as soon as the writer is
+            free, which already groups writes that arrive during a commit.
+        stats (dict): Counters for committed jobs and transactions
+    """
+
+    def __init__(self, db_path, profile=None, max_batch=128, max_latency=0.0):
+        self.db_path = db_path
+        self.profile = profile
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.stats = {'jobs': 0, 'failed': 0, 'transactions': 0}
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the writer thread (called automatically on first submit)."""
+        with self._lock:
+            self._start()
+
+    def _start(self):
+        # Caller holds self._lock
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='pkm-writer', daemon=True)
+            self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue a mutation.
+
+        Args:
+            fn (callable): Called as fn(cursor, *args, **kwargs) on the writer
+                thread inside the group transaction. Must not commit.
+
+        Returns:
+            Future: Resolves to fn's return value once the group has committed
+        """
+        future = Future()
+        with self._lock:
+            self._start()
+            self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def execute(self, sql, params=()):
+        """
+        Queue a single SQL statement.
+
+        Returns:
+            Future: Resolves to (rowcount, lastrowid)
+        """
+        def run(cursor):
+            cursor.execute(sql, params)
+            return cursor.rowcount, cursor.lastrowid
+        return self.submit(run)
+
+    def close(self, timeout=None):
+        """Flush queued jobs and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _collect(self, first):
+        """Gather jobs that arrive within the latency budget after `first`."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        conn = None
+        batch = []
+        try:
+            conn = connect(self.db_path, self.profile)
+            conn.isolation_level = None  # Transactions are managed explicitly below
+            cursor = conn.cursor()
+            while True:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+                batch = self._collect(first)
+                self._commit_group(conn, cursor, batch)
+                batch = []
+        except BaseException as e:
+            self._abandon(batch, e)
+            raise
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _abandon(self, batch, error):
+        """Fail the dying writer's jobs so no caller waits on them forever."""
+        with self._lock:
+            # Under the lock, so no job can be queued between the drain and the reset
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not _STOP:
+                    batch.append(job)
+            self._thread = None
+        for future, fn, args, kwargs in batch:
+            if not future.done():
+                future.set_exception(error)
+        self.stats['failed'] += len(batch)
+
+    def _commit_group(self, conn, cursor, batch):
+        outcomes = []
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for future, fn, args, kwargs in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                cursor.execute('SAVEPOINT job')
+                try:
+                    result = fn(cursor, *args, **kwargs)
+                    cursor.execute('RELEASE job')
+                    outcomes.append((future, result, None))
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO job')
+                    cursor.execute('RELEASE job')
+                    outcomes.append((future, None, e))
+            cursor.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            # Nothing in the group was committed
+            for future, fn, args, kwargs in batch:
+                if not future.done():
+                    future.set_exception(e)
+            self.stats['failed'] += len(batch)
+            return
+
+        self.stats['transactions'] += 1
+        for future, result, error in outcomes:
+            if error is None:
+                self.stats['jobs'] += 1
+                future.set_result(result)
+            else:
+                self.stats['failed'] += 1
+                future.set_exception(error)
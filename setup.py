@@ -8,6 +8,7 @@ setup(
         'flask>=2.0.0',
         'flask-login>=0.5.0',
         'werkzeug>=2.0.0',
-        'markdown>=3.3.0'
+        'markdown>=3.3.0',
+        'numpy>=1.22'
     ],
 )